@@ -1,13 +1,22 @@
 from config.settings import llm
-from prompts.schema_prompt import SQL_SCHEMA_PROMPT
+from utils.llm_async import ainvoke_llm
+from prompts.schema_retriever import build_schema_prompt
 from prompts.dashboard_prompt import DASHBOARD_SYSTEM_PROMPT as SYSTEM_PROMPT
+from utils.clean_utils import clean_json
 import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+def build_dashboard_prompt(user_question: str):
+    # Dashboards span every table, but skip the single-query examples
+    schema_prompt = build_schema_prompt(user_question, all_tables=True)
 
-def run_dashboard_agent(user_question: str):
     prompt = f"""
         DATABASE CONTEXT (source of truth):
 
-        {SQL_SCHEMA_PROMPT}
+        {schema_prompt}
 
         USER REQUEST (high-level intent):
         "{user_question}"
@@ -23,17 +32,102 @@ def run_dashboard_agent(user_question: str):
         - Each question can be solved using tables in this schema
         - Questions are ordered logically (top-down story)
 
+        For each question also give the analysis plan the SQL agent needs:
+        - analysis_goal: what should be analyzed to answer it
+        - visualization: true for comparisons, trends, rankings,
+          distributions and breakdowns; false for a single KPI
+
         OUTPUT FORMAT (IMPORTANT):
-        questions:[
-        "Question 1",
-        "Question 2",
-        "Question 3"
+        {{
+        "questions": [
+            {{
+            "question": "Question 1",
+            "analysis_goal": "",
+            "visualization": true
+            }}
         ]
+        }}
         """
 
-    response = llm.invoke([
+    return [
         {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": prompt}
-    ])
-    print("Dashboard Agent response:", response.content)
+    ]
+
+
+def run_dashboard_agent(user_question: str):
+    messages = build_dashboard_prompt(user_question)
+
+    start = time.perf_counter()
+    response = llm.invoke(messages)
+    logger.info("Dashboard Agent LLM call: %.2fs, prompt %d chars",
+                time.perf_counter() - start, len(messages[1]["content"]))
+    logger.debug("Dashboard Agent response: %s", response.content)
+    return response.content
+
+
+async def arun_dashboard_agent(user_question: str):
+    messages = build_dashboard_prompt(user_question)
+
+    start = time.perf_counter()
+    response = await ainvoke_llm(messages)
+    logger.info("Dashboard Agent LLM call: %.2fs, prompt %d chars",
+                time.perf_counter() - start, len(messages[1]["content"]))
+    logger.debug("Dashboard Agent response: %s", response.content)
     return response.content
+
+
+def build_trusted_plan(question: str, analysis_goal: str = None, visualization: bool = True):
+    """Validator plan for a question the dashboard agent generated itself.
+
+    These are known analytics questions, so the graph can send them straight
+    to the SQL agent instead of asking the validator again.
+    """
+    return {
+        "is_valid": True,
+        "is_analytics": True,
+        "analysis_goal": analysis_goal or question,
+        "require_sql": True,
+        "visualization": visualization,
+        "dashboard": False
+    }
+
+
+def parse_dashboard_questions(raw: str):
+    """Parse the dashboard agent output into [{"question", "plan"}] items.
+
+    Plain string questions (the older output format) get no plan and go
+    through the validator as before. Items become trusted plans that skip
+    the validator, so anything malformed rejects the whole list with a
+    ValueError rather than being guessed at.
+    """
+    data = json.loads(clean_json(raw))
+    items = data.get("questions") if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ValueError("Dashboard agent output has no \"questions\" list")
+
+    parsed = []
+    for index, item in enumerate(items, 1):
+        if isinstance(item, str) and item.strip():
+            parsed.append({"question": item.strip(), "plan": None})
+            continue
+
+        if not isinstance(item, dict):
+            raise ValueError(f"Dashboard question {index} is not a question or an object")
+
+        question = item.get("question")
+        goal = item.get("analysis_goal")
+        visualization = item.get("visualization", True)
+        if not isinstance(question, str) or not question.strip():
+            raise ValueError(f"Dashboard question {index} has no question text")
+        if goal is not None and not isinstance(goal, str):
+            raise ValueError(f"Dashboard question {index} has a non-text analysis_goal")
+        if not isinstance(visualization, bool):
+            raise ValueError(f"Dashboard question {index} has a non-boolean visualization flag")
+
+        question = question.strip()
+        parsed.append({
+            "question": question,
+            "plan": build_trusted_plan(question, goal, visualization)
+        })
+    return parsed
@@ -0,0 +1,60 @@
+from config.settings import llm
+from utils.llm_async import ainvoke_llm
+from prompts.schema_retriever import build_schema_prompt
+from prompts.validator_prompt import VALIDATOR_SYSTEM_PROMPT
+import logging
+
+logger = logging.getLogger(__name__)
+
+JSON_SPEC = """
+Return ONLY JSON in this format:
+
+{
+  "is_valid": boolean,
+  "is_analytics": boolean,
+  "analysis_goal": "",
+  "require_sql": true,
+  "visualization": true,
+  "dashboard": false,
+  "sql": "<POSTGRES QUERY HERE>"
+}
+
+"sql" must be null when the question is not analytics or when
+dashboard = true. Otherwise it must be a single SELECT query that
+follows the SQL rules below.
+"""
+
+
+def build_planner_sql_prompt(question: str):
+    return [
+        {"role": "system", "content": VALIDATOR_SYSTEM_PROMPT},
+        {"role": "user", "content": f"""
+            SQL RULES AND DATABASE SCHEMA:
+            {build_schema_prompt(question)}
+
+            User question:
+            {question}
+
+            {JSON_SPEC}
+            """}
+    ]
+
+
+def run_planner_sql_agent(question: str) -> str:
+    """Plan the question and write its SQL in a single LLM call.
+
+    Returns the raw model output: the validator fields plus "sql".
+    """
+    prompt = build_planner_sql_prompt(question)
+    logger.info("Running Planner+SQL Agent with question: %s", question)
+    response = llm.invoke(prompt)
+    logger.debug("Planner+SQL Agent response: %s", response.content)
+    return response.content
+
+
+async def arun_planner_sql_agent(question: str) -> str:
+    prompt = build_planner_sql_prompt(question)
+    logger.info("Running Planner+SQL Agent (async) with question: %s", question)
+    response = await ainvoke_llm(prompt)
+    logger.debug("Planner+SQL Agent response: %s", response.content)
+    return response.content
@@ -1,6 +1,10 @@
 from typing import Dict, Any
 from config.settings import llm
+from utils.llm_async import ainvoke_llm
 from prompts.validator_prompt import VALIDATOR_SYSTEM_PROMPT as SYSTEM_PROMPT
+import logging
+
+logger = logging.getLogger(__name__)
 
 JSON_SPEC = """
 Return ONLY JSON in this format:
@@ -16,12 +20,24 @@ Return ONLY JSON in this format:
 """
 
 
-def run_validator_agent(question: str) -> Dict[str, Any]:
-    prompt = [
+def build_validator_prompt(question: str):
+    return [
         {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": f"User question:\n{question}\n\n{JSON_SPEC}"}
     ]
-    print("Running Query Validator Agent with question:", question)
+
+
+def run_validator_agent(question: str) -> Dict[str, Any]:
+    prompt = build_validator_prompt(question)
+    logger.info("Running Query Validator Agent with question: %s", question)
     response = llm.invoke(prompt)
-    print("Query Validator Agent response:", response.content)
+    logger.debug("Query Validator Agent response: %s", response.content)
+    return response.content
+
+
+async def arun_validator_agent(question: str) -> Dict[str, Any]:
+    prompt = build_validator_prompt(question)
+    logger.info("Running Query Validator Agent (async) with question: %s", question)
+    response = await ainvoke_llm(prompt)
+    logger.debug("Query Validator Agent response: %s", response.content)
     return response.content
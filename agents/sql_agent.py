@@ -1,63 +1,122 @@
 from config.settings import llm
-from prompts.schema_prompt import SQL_SCHEMA_PROMPT
+from prompts.schema_retriever import build_schema_prompt
+from utils.llm_async import ainvoke_llm
+from utils.tracing import add_to_span
 import json
+import logging
+import time
 
-MAX_RETRIES = 3
+logger = logging.getLogger(__name__)
 
-def run_sql_agent(validator: dict):
-    print("Running SQL Agent with story plan:")
+MAX_RETRIES = 3
 
-    for attempt in range(1, MAX_RETRIES + 1):
-        print(f"\n--- SQL Agent Attempt {attempt} ---")
+def build_sql_prompt(validator: dict, schema_prompt: str, attempt: int):
+    # Retries say so, which also keeps them from hitting the LLM cache entry
+    # of the attempt that just failed
+    retry_note = ""
+    if attempt > 1:
+        retry_note = f"""
+            NOTE: attempt {attempt}. The previous answer was not valid JSON
+            with a usable "sql" value.
+            """
 
-        user_prompt = f"""
+    user_prompt = f"""
             DATABASE SCHEMA:
-            {SQL_SCHEMA_PROMPT}
+            {schema_prompt}
 
             TASK:
             Generate PostgreSQL SQL for this analytics plan:
 
             {validator}
-
+            {retry_note}
             Return ONLY valid JSON:
             {{
             "sql": "<query>"
             }}
             """
-        response = llm.invoke([
-            {"role": "system", "content": "You generate SQL only following instructions strictly."},
-            {"role": "user", "content": user_prompt}
-        ])
-
-        text = response.content.strip()
-        print("Raw model output:\n", text)
-
-        # Remove fences if present
-        if text.startswith("```"):
-            text = (
-                text.replace("```json", "")
-                    .replace("```sql", "")
-                    .replace("```", "")
-                    .strip()
-            )
-
-        # Try parse JSON safely
-        try:
-            data = json.loads(text)
-        except Exception as e:
-            print("JSON parse failed:", e)
-            continue   # retry
-
-        sql = (data.get("sql") or "").strip()
-
-        # if model returned empty / null sql → retry
-        if not sql or sql.lower() == "null" or "unable" in sql.lower():
-            print("Model returned null/invalid SQL — retrying...")
-            continue
-
-        print("SQL Agent produced valid SQL.")
-        return sql
+    return [
+        {"role": "system", "content": "You generate SQL only following instructions strictly."},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def parse_sql_output(text: str):
+    """Return the SQL from the model output, or None if it is unusable."""
+    text = text.strip()
+    logger.debug("Raw model output:\n%s", text)
+
+    # Remove fences if present
+    if text.startswith("```"):
+        text = (
+            text.replace("```json", "")
+                .replace("```sql", "")
+                .replace("```", "")
+                .strip()
+        )
+
+    # Try parse JSON safely
+    try:
+        data = json.loads(text)
+    except Exception as e:
+        logger.warning("JSON parse failed: %s", e)
+        return None
+
+    sql = (data.get("sql") or "").strip()
+
+    # if model returned empty / null sql → retry
+    if not sql or sql.lower() == "null" or "unable" in sql.lower():
+        logger.warning("Model returned null/invalid SQL — retrying...")
+        return None
+
+    logger.info("SQL Agent produced valid SQL.")
+    return sql
+
+
+def run_sql_agent(validator: dict):
+    logger.info("Running SQL Agent with story plan: %s", validator)
+
+    # Only the tables, joins and metrics this goal needs
+    schema_prompt = build_schema_prompt(validator.get("analysis_goal") or "")
+
+    for attempt in range(1, MAX_RETRIES + 1):
+        logger.debug("SQL Agent attempt %d", attempt)
+        if attempt > 1:
+            add_to_span("retries")
+
+        messages = build_sql_prompt(validator, schema_prompt, attempt)
+        start = time.perf_counter()
+        response = llm.invoke(messages)
+        logger.info("SQL Agent LLM call: %.2fs, prompt %d chars",
+                    time.perf_counter() - start, len(messages[1]["content"]))
+
+        sql = parse_sql_output(response.content)
+        if sql:
+            return sql
 
     # After retries failed
-    print("SQL Agent failed after retries.")
+    logger.error("SQL Agent failed after retries.")
+    return "/* unable to generate SQL */"
+
+
+async def arun_sql_agent(validator: dict):
+    logger.info("Running SQL Agent (async) with story plan: %s", validator)
+
+    schema_prompt = build_schema_prompt(validator.get("analysis_goal") or "")
+
+    for attempt in range(1, MAX_RETRIES + 1):
+        logger.debug("SQL Agent attempt %d", attempt)
+        if attempt > 1:
+            add_to_span("retries")
+
+        messages = build_sql_prompt(validator, schema_prompt, attempt)
+        start = time.perf_counter()
+        response = await ainvoke_llm(messages)
+        logger.info("SQL Agent LLM call: %.2fs, prompt %d chars",
+                    time.perf_counter() - start, len(messages[1]["content"]))
+
+        sql = parse_sql_output(response.content)
+        if sql:
+            return sql
+
+    logger.error("SQL Agent failed after retries.")
     return "/* unable to generate SQL */"
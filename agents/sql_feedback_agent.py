@@ -1,8 +1,17 @@
 from config.settings import llm
-from prompts.schema_prompt import SQL_SCHEMA_PROMPT
+from utils.llm_async import ainvoke_llm
+from prompts.schema_retriever import build_schema_prompt
 from prompts.sql_fallback_prompt import SQL_FALLBACK_SYSTEM
+from utils.tracing import traced
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+def build_feedback_prompt(question, sql, error):
+    # The failed SQL names the tables involved, so it steers the pruning too
+    schema_prompt = build_schema_prompt(f"{question}\n{sql}")
 
-def run_sql_feedback_agent(question, sql, error):
     prompt = f"""
         QUESTION:
         {question}
@@ -14,14 +23,36 @@ def run_sql_feedback_agent(question, sql, error):
         {error}
 
         SCHEMA:
-        {SQL_SCHEMA_PROMPT}
+        {schema_prompt}
 
         Fix the SQL and return JSON only.
         """
 
-    resp = llm.invoke([
+    return [
         {"role": "system", "content": SQL_FALLBACK_SYSTEM},
         {"role": "user", "content": prompt}
-    ])
+    ]
+
+
+@traced("sql_feedback_agent")
+def run_sql_feedback_agent(question, sql, error):
+    messages = build_feedback_prompt(question, sql, error)
+
+    start = time.perf_counter()
+    resp = llm.invoke(messages)
+    logger.info("SQL Feedback Agent LLM call: %.2fs, prompt %d chars",
+                time.perf_counter() - start, len(messages[1]["content"]))
+
+    return resp.content
+
+
+@traced("sql_feedback_agent")
+async def arun_sql_feedback_agent(question, sql, error):
+    messages = build_feedback_prompt(question, sql, error)
+
+    start = time.perf_counter()
+    resp = await ainvoke_llm(messages)
+    logger.info("SQL Feedback Agent LLM call: %.2fs, prompt %d chars",
+                time.perf_counter() - start, len(messages[1]["content"]))
 
     return resp.content
@@ -1,11 +1,14 @@
 from config.settings import llm
+from utils.llm_async import ainvoke_llm
 from agents.query_validator_agent import SYSTEM_PROMPT
 from typing import Dict, Any
 from prompts.visualization_prompt import VISUALIZATION_SYSTEM_PROMPT
+from utils.tracing import traced
+import logging
 
-def run_visualization_agent(analysis_goal: str, sample_data: str, columns: str) -> str:
-    print("Running Visualization Agent with analysis goal:")
+logger = logging.getLogger(__name__)
 
+def build_visualization_prompt(analysis_goal: str, sample_data: str, columns: str):
     prompt = f"""
         ANALYSIS GOAL:
         {analysis_goal}
@@ -19,12 +22,29 @@ def run_visualization_agent(analysis_goal: str, sample_data: str, columns: str)
         Generate Python Plotly code to create the best visualization.
         """
 
-    response = llm.invoke([
+    return [
         {"role": "system", "content": VISUALIZATION_SYSTEM_PROMPT},
         {"role": "user", "content": prompt}
-    ])
+    ]
+
+
+@traced("visualization_agent")
+def run_visualization_agent(analysis_goal: str, sample_data: str, columns: str) -> str:
+    logger.info("Running Visualization Agent with analysis goal: %s", analysis_goal)
+
+    response = llm.invoke(build_visualization_prompt(analysis_goal, sample_data, columns))
+
+    visual_json = response.content
+    logger.debug("Raw model output:\n%s", visual_json)
+    return visual_json
+
+
+@traced("visualization_agent")
+async def arun_visualization_agent(analysis_goal: str, sample_data: str, columns: str) -> str:
+    logger.info("Running Visualization Agent (async) with analysis goal: %s", analysis_goal)
+
+    response = await ainvoke_llm(build_visualization_prompt(analysis_goal, sample_data, columns))
 
     visual_json = response.content
-    print("Raw model output:\n", visual_json)
-    print("Visualization Agent produced code.")
-    return visual_json
\ No newline at end of file
+    logger.debug("Raw model output:\n%s", visual_json)
+    return visual_json
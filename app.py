@@ -1,16 +1,22 @@
 import streamlit as st
 import pandas as pd
-import json
 
-from graph.agent_graph import agents_graph
-from tools.data_extractor_tool import run_sql
+from utils.tracing import configure_logging
+
+# Before the imports below, so their start-up messages are logged
+configure_logging()
+
+from graph.agent_graph import invoke_graph, remember_answer
+from tools.data_extractor_tool import run_sql, run_sql_preview, collect_pages, close_pages
 from tools.plots_render_tool import render_plotly
 from tools.dashboard_builder_tool import build_dashboard_from_paths
+from graph.dashboard_executor import run_dashboard_questions
 from utils.clean_utils import clean_json
+from utils.tracing import span
 
 from agents.sql_feedback_agent import run_sql_feedback_agent
 from agents.visualization_agent import run_visualization_agent
-from agents.dashboard_agent import run_dashboard_agent
+from agents.dashboard_agent import run_dashboard_agent, parse_dashboard_questions
 
 
 st.set_page_config(page_title="DataGenie AI Analytics", layout="wide")
@@ -23,9 +29,10 @@ run_btn = st.button("Run Analysis")
 
 if run_btn and query:
 
-    with st.spinner("Thinking..."):
+    # One trace per question: graph nodes, SQL and render are its spans
+    with st.spinner("Thinking..."), span("request", question=query):
 
-        result = agents_graph.invoke({"question": query})
+        result = invoke_graph(query)
         validator = result["validator"]
 
         st.subheader("🧠 Interpretation")
@@ -44,44 +51,37 @@ if run_btn and query:
         if validator.get("dashboard", False):
             st.info("📊 Dashboard request detected — building dashboard...")
 
-            raw_dashboard = run_dashboard_agent(query)
-            dashboard_questions = json.loads(clean_json(raw_dashboard))["questions"]
+            # The graph's dashboard node already asked for the questions
+            raw_dashboard = result.get("dashboard_questions") or run_dashboard_agent(query)
+            try:
+                dashboard_questions = parse_dashboard_questions(raw_dashboard)
+            except ValueError as e:
+                st.error(f"❌ The dashboard plan could not be read: {e}")
+                st.stop()
 
             st.write("Generated dashboard questions:")
-            st.write(dashboard_questions)
+            st.write([q["question"] for q in dashboard_questions])
 
             chart_paths = []
 
-            for dq in dashboard_questions:
-
-                st.write(f"➡ Running: **{dq}**")
+            # Streamlit calls must stay on this thread, so the questions run
+            # in parallel first and are displayed afterwards, in order
+            with st.spinner(f"Running {len(dashboard_questions)} questions in parallel..."):
+                outcomes = run_dashboard_questions(dashboard_questions)
 
-                sub = agents_graph.invoke({"question": dq})
-                sub_sql = sub["sql_query"]
+            for outcome in outcomes:
 
-                sql_res = run_sql(dq, sub_sql)
+                st.write(f"➡ Running: **{outcome['question']}**")
 
-                if not sql_res["success"]:
+                if outcome["error"]:
                     st.warning("Skipping (SQL failed)")
                     continue
 
-                df = sql_res["data"]
-
-                if sub["validator"].get("visualization", True):
-
-                    spec = run_visualization_agent(
-                        sub["validator"]["analysis_goal"],
-                        df.head(2),
-                        df.columns.tolist()
-                    )
-
-                    spec_json = clean_json(spec)
+                if outcome["fig"] is not None:
 
-                    path, fig = render_plotly(df, spec_json)
+                    st.plotly_chart(outcome["fig"], use_container_width=True)
 
-                    st.plotly_chart(fig, use_container_width=True)
-
-                    chart_paths.append(path)
+                    chart_paths.append(outcome["path"])
 
             if chart_paths:
 
@@ -103,7 +103,8 @@ if run_btn and query:
         st.subheader("📝 SQL Generated")
         st.code(sql, language="sql")
 
-        sql_result = run_sql(query, sql)
+        # Only the first page is fetched up front; the rest streams in later
+        sql_result = run_sql_preview(query, sql)
 
         # feedback loop
         if not sql_result["success"]:
@@ -117,22 +118,36 @@ if run_btn and query:
 
             st.code(fixed_sql, language="sql")
 
-            sql_result = run_sql(query, fixed_sql)
+            sql_result = run_sql_preview(query, fixed_sql)
 
             if not sql_result["success"]:
                 st.error("❌ Still failed. Stopping.")
                 st.stop()
 
-        df = sql_result["data"]
+        remember_answer(query, validator, sql_result["sql"])
+
+        preview = sql_result["data"]
 
         st.subheader("📄 Data Preview")
-        st.dataframe(df)
+        table_slot = st.empty()
+        table_slot.dataframe(preview)
 
         if validator.get("visualization", False):
 
             st.subheader("📊 Visualization")
 
-            visual = run_visualization_agent(
+            # The chart needs every row; fetching them before the LLM call
+            # returns the pooled connection while the model is thinking
+            sql_result = collect_pages(sql_result)
+            if not sql_result["success"]:
+                st.error("❌ Failed while fetching the remaining rows.")
+                st.stop()
+
+            df = sql_result["data"]
+            table_slot.dataframe(df)
+
+            # KPI templates come with their chart spec
+            visual = result.get("visual_spec") or run_visualization_agent(
                 validator["analysis_goal"],
                 df.head(2),
                 df.columns.tolist()
@@ -145,6 +160,10 @@ if run_btn and query:
             st.plotly_chart(fig, use_container_width=True)
 
         else:
+            if not sql_result["complete"]:
+                st.caption(f"Showing the first {len(preview)} rows.")
+                close_pages(sql_result)
+
             st.info("No visualization required.")
 
     st.success("✅ Analysis complete!")
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+Build a SQLite copy of the AdventureWorks data for offline benchmarks.
+
+Reads the same CSVs as load_data.py (DATASET_PATH) with the same parsing
+and cleaning, so queries see the same rows as in Postgres.
+
+Usage:
+    python -m benchmarks.build_sqlite_db [--output .cache/adventureworks.sqlite]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import pandas as pd
+
+from load_data import (
+    AGGREGATE_INDEXES,
+    CSV_FILES,
+    DATASET_PATH,
+    AGGREGATE_VIEWS,
+    DIMENSION_COLUMNS,
+    SALES_YEARS,
+    build_calendar_frame,
+    clean_strings,
+    price_map,
+    iter_returns_chunks,
+    iter_sales_year_chunks,
+    iter_source_chunks,
+)
+
+DEFAULT_SQLITE_PATH = os.path.join(".cache", "adventureworks.sqlite")
+
+# Same indexes as the Postgres load, for comparable join performance
+SQLITE_INDEXES = [
+    "CREATE INDEX idx_sales_order_date ON fact_sales(order_date)",
+    "CREATE INDEX idx_sales_product ON fact_sales(product_key)",
+    "CREATE INDEX idx_sales_customer ON fact_sales(customer_key)",
+    "CREATE INDEX idx_sales_territory ON fact_sales(territory_key)",
+    "CREATE INDEX idx_returns_product ON fact_returns(product_key)",
+    "CREATE INDEX idx_returns_territory ON fact_returns(territory_key)",
+    "CREATE INDEX idx_returns_date ON fact_returns(return_date)",
+    "CREATE UNIQUE INDEX idx_calendar_date ON dim_calendar(date)",
+    "CREATE UNIQUE INDEX idx_products_key ON dim_products(product_key)",
+]
+
+
+def write_chunks(conn, table, chunks):
+    rows = 0
+    for chunk in chunks:
+        # SQLite has no DATE type; ISO strings compare and join correctly
+        for column in chunk.columns:
+            if column.endswith("_date") or column in ("date", "quarter_start"):
+                chunk[column] = pd.to_datetime(chunk[column]).dt.strftime("%Y-%m-%d")
+        chunk.to_sql(table, conn, if_exists="append", index=False)
+        rows += len(chunk)
+    print(f"   {table}: {rows:,} rows")
+
+
+def rename(chunks, columns):
+    for chunk in chunks:
+        chunk.columns = columns
+        yield chunk
+
+
+def check_dataset():
+    """Exit with a clear message unless every source CSV is in DATASET_PATH."""
+    if not DATASET_PATH:
+        print("✗ DATASET_PATH is not set — point it at the AdventureWorks CSV folder (e.g. in .env).")
+        sys.exit(1)
+
+    missing = [name for name in CSV_FILES.values() if not os.path.exists(os.path.join(DATASET_PATH, name))]
+    if missing:
+        print(f"✗ Missing CSV files in {DATASET_PATH}: {', '.join(missing)}")
+        sys.exit(1)
+
+
+def build_sqlite_db(path=DEFAULT_SQLITE_PATH):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+
+    start = time.perf_counter()
+    conn = sqlite3.connect(path)
+
+    try:
+        dates = pd.concat(chunk['date'] for chunk in iter_source_chunks('dim_calendar'))
+        write_chunks(conn, 'dim_calendar', [build_calendar_frame(dates)])
+
+        for table, columns in DIMENSION_COLUMNS.items():
+            chunks = (clean_strings(chunk) for chunk in iter_source_chunks(table))
+            write_chunks(conn, table, rename(chunks, columns))
+
+        # Price the facts from the products just written, as load_data.py does
+        prices = price_map(conn.execute(
+            "SELECT product_key, product_price, product_cost FROM dim_products"
+        ).fetchall())
+        for year in SALES_YEARS:
+            write_chunks(conn, 'fact_sales', iter_sales_year_chunks(year, prices))
+        write_chunks(conn, 'fact_returns', iter_returns_chunks(prices))
+
+        for command in SQLITE_INDEXES:
+            conn.execute(command)
+
+        # SQLite has no materialized views; the rollups become plain tables
+        for view_name, query in AGGREGATE_VIEWS.items():
+            conn.execute(f"CREATE TABLE {view_name} AS {query}")
+            rows = conn.execute(f"SELECT COUNT(*) FROM {view_name}").fetchone()[0]
+            print(f"   {view_name}: {rows:,} rows")
+        for command in AGGREGATE_INDEXES:
+            conn.execute(command)
+
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+
+    print(f"✓ Built {path} in {time.perf_counter() - start:.1f}s")
+    return path
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build a SQLite copy of the AdventureWorks data.")
+    parser.add_argument("--output", default=DEFAULT_SQLITE_PATH, help="SQLite file to create")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    check_dataset()
+    build_sqlite_db(args.output)
@@ -0,0 +1,287 @@
+"""
+End-to-end latency benchmark for the analytics pipeline.
+
+Runs a question corpus through the agent graph, run_sql, the visualization
+agent and render_plotly, and reports p50/p95 latency per stage,
+throughput, and the size of the pruned schema prompts against the full
+one. By default everything runs offline: the fake LLM backend
+(LLM_BACKEND=fake) and a SQLite copy of the data (see build_sqlite_db.py).
+
+Usage:
+    python -m benchmarks.build_sqlite_db
+    python -m benchmarks.run_benchmark [--llm-latency-ms 800] [--concurrency 4]
+
+Pass --database-url / --llm-backend gemini to benchmark the real services.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CORPUS_FILES = ["data.csv", "results.csv"]
+DEFAULT_SQLITE_PATH = os.path.join(".cache", "adventureworks.sqlite")
+
+STAGES = ["plan", "sql", "visualize", "render", "total"]
+
+# Always part of the corpus, so runs stay comparable if the CSVs change
+SEED_QUESTIONS = [
+    "What is the total sales for last quarter?",
+    "What are our best-selling products?",
+    "Which products have the highest profit margin?",
+    "Revenue by month",
+    "Return rate by category",
+]
+
+# Questions glued together in the saved CSVs are longer than any real one
+MAX_QUESTION_CHARS = 200
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the analytics pipeline per stage.")
+    parser.add_argument("--corpus", nargs="*", default=DEFAULT_CORPUS_FILES,
+                        help="CSV files with a 'question' column")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the corpus")
+    parser.add_argument("--concurrency", type=int, default=1, help="Questions run at once")
+    parser.add_argument("--llm-backend", default="fake", choices=["fake", "gemini"])
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0,
+                        help="Injected latency per fake LLM call")
+    parser.add_argument("--llm-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--replay", help="Recorded responses (JSONL) for the fake backend")
+    parser.add_argument("--database-url", default=f"sqlite:///{DEFAULT_SQLITE_PATH}")
+    parser.add_argument("--shortcuts", action="store_true",
+                        help="Use invoke_graph (KPI templates, semantic cache) instead of agents_graph")
+    parser.add_argument("--caches", action="store_true",
+                        help="Keep the LLM and result caches enabled")
+    parser.add_argument("--output", help="Write the summary and per-question timings as JSON")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    """Settings are read at import time, so set them before importing the app."""
+    os.environ["LLM_BACKEND"] = args.llm_backend
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["FAKE_LLM_JITTER_MS"] = str(args.llm_jitter_ms)
+    os.environ["DATABASE_URL"] = args.database_url
+    if args.replay:
+        os.environ["FAKE_LLM_REPLAY_PATH"] = args.replay
+    if not args.caches:
+        os.environ["LLM_CACHE_ENABLED"] = "false"
+        os.environ["RESULT_CACHE_ENABLED"] = "false"
+        os.environ["SEMANTIC_CACHE_ENABLED"] = "false"
+
+
+def load_corpus(paths):
+    questions = list(SEED_QUESTIONS)
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"Corpus file not found, skipping: {path}")
+            continue
+        questions.extend(pd.read_csv(path)["question"].dropna().astype(str))
+
+    unique = dict.fromkeys(q.strip() for q in questions if len(q.strip()) <= MAX_QUESTION_CHARS)
+    return [q for q in unique if q]
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1000 if values else None
+
+
+def run_question(question, shortcuts, pipeline):
+    """Time one question through every stage; failures end the run early."""
+    timings = {"question": question, "error": None}
+    start = time.perf_counter()
+
+    def timed(stage, fn, *args):
+        stage_start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            timings[stage] = time.perf_counter() - stage_start
+
+    try:
+        with pipeline["span"]("request", question=question):
+            run_stages(question, shortcuts, pipeline, timed, timings)
+
+    except Exception as e:
+        timings["error"] = f"{type(e).__name__}: {e}"
+
+    finally:
+        timings["total"] = time.perf_counter() - start
+
+    return timings
+
+
+def run_stages(question, shortcuts, pipeline, timed, timings):
+    """run_question's stages; a failed stage records its error and returns."""
+    if shortcuts:
+        result = timed("plan", pipeline["invoke_graph"], question)
+    else:
+        result = timed("plan", pipeline["agents_graph"].invoke, {"question": question})
+
+    validator = result.get("validator") or {}
+    sql = result.get("sql_query")
+    if validator.get("dashboard") or not sql:
+        timings["error"] = "no SQL (dashboard or non-analytics)"
+        return
+
+    # What the SQL agent is (or would be) sent for this plan's goal
+    timings["schema_prompt_chars"] = len(pipeline["build_schema_prompt"](validator.get("analysis_goal") or ""))
+
+    sql_result = timed("sql", pipeline["run_sql"], question, sql)
+    if not sql_result["success"]:
+        timings["error"] = f"sql: {sql_result['reason']}"
+        return
+
+    df = sql_result["data"]
+    if validator.get("visualization", False):
+        spec = result.get("visual_spec") or timed(
+            "visualize", pipeline["run_visualization_agent"],
+            validator["analysis_goal"], df.head(2), df.columns.tolist()
+        )
+        timed("render", pipeline["render_plotly"], df, spec)
+
+
+def missing_tables(database_url):
+    """Tables the prompts point the agents at that ``database_url`` lacks."""
+    from sqlalchemy import create_engine, inspect
+    from sample_tests.database_schema import get_all_table_names
+
+    engine = create_engine(database_url)
+    try:
+        inspector = inspect(engine)
+        existing = set(inspector.get_table_names()) | set(inspector.get_view_names())
+        if engine.dialect.name == "postgresql":
+            existing |= set(inspector.get_materialized_view_names())
+    finally:
+        engine.dispose()
+    return [table for table in get_all_table_names() if table not in existing]
+
+
+def summarize(runs, wall_seconds, full_prompt_chars=None):
+    """Latency and throughput over the successful runs only; a failed run
+    stops early, so its timings would make the pipeline look faster.
+
+    ``full_prompt_chars`` is the unpruned SQL_SCHEMA_PROMPT size, reported
+    next to the pruned schema prompts the runs' goals produce.
+    """
+    succeeded = [run for run in runs if not run["error"]]
+    summary = {"questions": len(runs), "succeeded": len(succeeded), "wall_seconds": wall_seconds,
+               "throughput_qps": len(succeeded) / wall_seconds if wall_seconds else None,
+               "errors": len(runs) - len(succeeded), "stages": {}}
+
+    for stage in STAGES:
+        values = [run[stage] for run in succeeded if stage in run]
+        summary["stages"][stage] = {
+            "count": len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "mean_ms": float(np.mean(values)) * 1000 if values else None,
+        }
+
+    sizes = [run["schema_prompt_chars"] for run in runs if "schema_prompt_chars" in run]
+    if sizes and full_prompt_chars:
+        summary["schema_prompt"] = {
+            "full_chars": full_prompt_chars,
+            "mean_chars": float(np.mean(sizes)),
+            "max_chars": max(sizes),
+            "reduction_pct": 100.0 * (1 - float(np.mean(sizes)) / full_prompt_chars),
+        }
+    return summary
+
+
+def print_summary(summary):
+    print("\n" + "=" * 70)
+    print("BENCHMARK RESULTS")
+    print("=" * 70)
+    print(f"{'stage':<12}{'count':>8}{'p50 ms':>12}{'p95 ms':>12}{'mean ms':>12}")
+    for stage, stats in summary["stages"].items():
+        if not stats["count"]:
+            print(f"{stage:<12}{0:>8}{'-':>12}{'-':>12}{'-':>12}")
+            continue
+        print(f"{stage:<12}{stats['count']:>8}{stats['p50_ms']:>12.1f}"
+              f"{stats['p95_ms']:>12.1f}{stats['mean_ms']:>12.1f}")
+    print("-" * 70)
+    print(f"Questions: {summary['questions']}  Succeeded: {summary['succeeded']}  "
+          f"Errors: {summary['errors']}  Wall: {summary['wall_seconds']:.2f}s  "
+          f"Throughput: {summary['throughput_qps'] or 0:.2f} q/s (successful questions only)")
+    prompt = summary.get("schema_prompt")
+    if prompt:
+        print(f"Schema prompt: mean {prompt['mean_chars']:,.0f} / max {prompt['max_chars']:,} chars "
+              f"vs {prompt['full_chars']:,} unpruned ({prompt['reduction_pct']:.0f}% smaller)")
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+
+    from utils.tracing import configure_logging
+    configure_logging()
+
+    if args.database_url.startswith("sqlite:///"):
+        sqlite_path = args.database_url[len("sqlite:///"):]
+        if not os.path.exists(sqlite_path):
+            print(f"✗ {sqlite_path} not found — run: python -m benchmarks.build_sqlite_db")
+            sys.exit(1)
+
+    missing = missing_tables(args.database_url)
+    if missing:
+        print(f"✗ {args.database_url} is missing tables: {', '.join(missing)}")
+        print("   Build it with python -m benchmarks.build_sqlite_db (or load_data.py for Postgres).")
+        sys.exit(1)
+
+    from graph.agent_graph import agents_graph, invoke_graph
+    from tools.data_extractor_tool import run_sql
+    from agents.visualization_agent import run_visualization_agent
+    import tools.plots_render_tool as plots_render_tool
+    from utils.tracing import span
+    from prompts.schema_prompt import SQL_SCHEMA_PROMPT
+    from prompts.schema_retriever import build_schema_prompt
+
+    # Keep benchmark charts out of the real visualizations folder
+    plots_render_tool.BASE_DIR = tempfile.mkdtemp(prefix="benchmark_charts_")
+
+    pipeline = {
+        "agents_graph": agents_graph,
+        "invoke_graph": invoke_graph,
+        "run_sql": run_sql,
+        "run_visualization_agent": run_visualization_agent,
+        "render_plotly": plots_render_tool.render_plotly,
+        "span": span,
+        "build_schema_prompt": build_schema_prompt,
+    }
+
+    questions = load_corpus(args.corpus) * args.repeat
+    print(f"Running {len(questions)} questions (concurrency {args.concurrency}, "
+          f"LLM {args.llm_backend}, DB {args.database_url})")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+        runs = list(executor.map(lambda q: run_question(q, args.shortcuts, pipeline), questions))
+    wall_seconds = time.perf_counter() - start
+
+    summary = summarize(runs, wall_seconds, len(SQL_SCHEMA_PROMPT))
+    print_summary(summary)
+
+    errors = [run for run in runs if run["error"]]
+    for run in errors[:10]:
+        print(f"   ✗ {run['question'][:60]}: {run['error'].splitlines()[0][:100]}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "runs": runs}, f, indent=2, default=str)
+        print(f"Saved timings to {args.output}")
+
+    if runs and not summary["succeeded"]:
+        print("✗ Every question failed; the timings above are not meaningful.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,37 @@
+import logging
 import os
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
+from utils.llm_cache import CachedLLM, LLM_CACHE_ENABLED
+from utils.tracing import TracedLLM, TRACING_ENABLED
 load_dotenv()
+logger = logging.getLogger(__name__)
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0.2,
-    top_p=0.2, 
-    max_output_tokens=2048,
-    model_kwargs={"response_mime_type": "application/json"},
-)
-print("LLM initialized with Google Gemini-2.5-Flash model.")
\ No newline at end of file
+# "gemini" (default) or "fake" for the offline stand-in in utils/fake_llm.py
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+# Append every response to this JSONL file, for FAKE_LLM_REPLAY_PATH
+LLM_RECORD_PATH = os.getenv("LLM_RECORD_PATH")
+if LLM_BACKEND == "fake":
+    from utils.fake_llm import FakeChatModel
+    llm = FakeChatModel()
+    logger.info("LLM initialized with the offline fake backend.")
+else:
+    llm = ChatGoogleGenerativeAI(
+        model="gemini-2.5-flash",
+        temperature=0.2,
+        top_p=0.2, 
+        max_output_tokens=2048,
+        model_kwargs={"response_mime_type": "application/json"},
+    )
+    logger.info("LLM initialized with Google Gemini-2.5-Flash model.")
+if LLM_RECORD_PATH:
+    from utils.fake_llm import RecordingLLM
+    llm = RecordingLLM(llm, LLM_RECORD_PATH)
+    logger.info("Recording LLM responses to %s", LLM_RECORD_PATH)
+if LLM_CACHE_ENABLED:
+    # Identical prompts are answered from disk instead of the API
+    llm = CachedLLM(llm)
+    logger.info("LLM response cache enabled at %s", llm.path)
+if TRACING_ENABLED:
+    # Outermost, so cache hits show up as fast llm spans with no tokens
+    llm = TracedLLM(llm)
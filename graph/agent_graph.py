@@ -1,10 +1,26 @@
-from langgraph.graph import StateGraph
+from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableLambda
 from typing import TypedDict, Dict, Any
-from agents.query_validator_agent import run_validator_agent
-from agents.dashboard_agent import run_dashboard_agent
-from agents.sql_agent import run_sql_agent
+from agents.query_validator_agent import run_validator_agent, arun_validator_agent
+from agents.dashboard_agent import run_dashboard_agent, arun_dashboard_agent
+from agents.sql_agent import run_sql_agent, arun_sql_agent
+from agents.planner_sql_agent import run_planner_sql_agent, arun_planner_sql_agent
+from utils.semantic_cache import semantic_cache, SEMANTIC_CACHE_ENABLED
+from tools.kpi_templates import build_kpi_answer
+from utils.tracing import span, traced
 import json
+import logging
+import os
 import re
+import time
+
+logger = logging.getLogger(__name__)
+
+# Plan and write SQL in one LLM call, falling back to the two-step
+# validator -> SQL agent path when the fused answer does not validate
+USE_FUSED_PLANNER = os.getenv("USE_FUSED_PLANNER", "false").lower() == "true"
+
+PLAN_FLAGS = ("is_valid", "is_analytics", "require_sql", "visualization", "dashboard")
 
 
 class StoryState(TypedDict, total=False):
@@ -12,6 +28,8 @@ class StoryState(TypedDict, total=False):
     validator: Dict[str, Any]
     sql_query: str | None
     response: str | None
+    dashboard_questions: str | None
+    fused_failed: bool
 
 
 def clean_json(text: str) -> str:
@@ -27,9 +45,8 @@ def clean_json(text: str) -> str:
     return text
 
 
-def query_validator_node(state: StoryState):
-    raw = run_validator_agent(state["question"])
-    print("\nRAW VALIDATOR OUTPUT:", repr(raw))
+def apply_validator_output(state: StoryState, raw: str):
+    logger.debug("Raw validator output: %r", raw)
 
     cleaned = clean_json(raw)
     plan = json.loads(cleaned)
@@ -37,9 +54,79 @@ def query_validator_node(state: StoryState):
     return {**state, "validator": plan}
 
 
+@traced("query_validator")
+def query_validator_node(state: StoryState):
+    return apply_validator_output(state, run_validator_agent(state["question"]))
+
+
+@traced("query_validator")
+async def aquery_validator_node(state: StoryState):
+    return apply_validator_output(state, await arun_validator_agent(state["question"]))
+
+
+def validate_fused_output(data):
+    """Split a fused planner answer into (plan, sql), or None if it is unusable."""
+    if not isinstance(data, dict):
+        return None
+
+    if any(not isinstance(data.get(flag), bool) for flag in PLAN_FLAGS):
+        return None
+
+    if not isinstance(data.get("analysis_goal"), str):
+        return None
+
+    plan = {key: data[key] for key in (*PLAN_FLAGS, "analysis_goal")}
+    sql = data.get("sql")
+
+    needs_sql = plan["is_valid"] and plan["is_analytics"] and not plan["dashboard"]
+    if not needs_sql:
+        return plan, None
+
+    if not isinstance(sql, str):
+        return None
+
+    sql = sql.strip()
+    first_word = sql.split(None, 1)[0].lower() if sql else ""
+    if first_word not in ("select", "with") or "unable" in sql.lower():
+        return None
+
+    return plan, sql
+
+
+def apply_fused_output(state: StoryState, raw: str):
+    try:
+        checked = validate_fused_output(json.loads(clean_json(raw)))
+    except json.JSONDecodeError:
+        checked = None
+
+    if checked is None:
+        logger.warning("Fused planner output failed validation — using two-step path.")
+        return {**state, "fused_failed": True}
+
+    plan, sql = checked
+    return {**state, "validator": plan, "sql_query": sql, "fused_failed": False}
+
+
+@traced("fused_planner")
+def fused_planner_node(state: StoryState):
+    return apply_fused_output(state, run_planner_sql_agent(state["question"]))
+
+
+@traced("fused_planner")
+async def afused_planner_node(state: StoryState):
+    return apply_fused_output(state, await arun_planner_sql_agent(state["question"]))
+
+
+@traced("sql_agent")
 def sql_agent_node(state: StoryState):
     sql = run_sql_agent(state["validator"])
-    print("From SQL Agent Node:")
+
+    return {**state, "sql_query": sql}
+
+
+@traced("sql_agent")
+async def asql_agent_node(state: StoryState):
+    sql = await arun_sql_agent(state["validator"])
 
     return {**state, "sql_query": sql}
 
@@ -52,7 +139,7 @@ def non_analytics_node(state: StoryState):
         f"Reason: {validator.get('analysis_goal') or validator.get('reason','')}"
     )
 
-    print(msg)
+    logger.info(msg)
 
     return {**state, "response": msg}
 
@@ -69,21 +156,73 @@ def route_after_validation(state: StoryState):
     return "sql_agent"
 
 
+def route_entry(state: StoryState):
+    # Trusted callers (dashboard sub-questions) arrive with a plan already,
+    # so the validator call is skipped
+    if state.get("validator"):
+        return "sql_agent"
+
+    if USE_FUSED_PLANNER:
+        return "fused_planner"
+
+    return "query_validator"
+
+
+def route_after_fused(state: StoryState):
+    if state.get("fused_failed"):
+        return "query_validator"
+
+    route = route_after_validation(state)
+
+    # The fused call already produced the SQL
+    return "done" if route == "sql_agent" else route
+
+
+@traced("dashboard_agent")
 def dashboard_node(state: StoryState):
     questions = run_dashboard_agent(state["question"])
-    print("\nDASHBOARD QUESTIONS GENERATED:\n", questions)
+    logger.debug("Dashboard questions generated: %s", questions)
+
+    return {**state, "dashboard_questions": questions}
+
+
+@traced("dashboard_agent")
+async def adashboard_node(state: StoryState):
+    questions = await arun_dashboard_agent(state["question"])
+    logger.debug("Dashboard questions generated: %s", questions)
 
     return {**state, "dashboard_questions": questions}
 
 
 graph = StateGraph(StoryState)
 
-graph.add_node("query_validator", query_validator_node)
-graph.add_node("sql_agent", sql_agent_node)
+# Each LLM node has a sync and an async body: agents_graph.invoke() uses
+# the first, ainvoke() / astream() the second without blocking the loop
+graph.add_node("query_validator", RunnableLambda(query_validator_node, afunc=aquery_validator_node))
+graph.add_node("sql_agent", RunnableLambda(sql_agent_node, afunc=asql_agent_node))
 graph.add_node("non_analytics", non_analytics_node)
-graph.add_node("dashboard_agent", dashboard_node)
+graph.add_node("dashboard_agent", RunnableLambda(dashboard_node, afunc=adashboard_node))
+graph.add_node("fused_planner", RunnableLambda(fused_planner_node, afunc=afused_planner_node))
 
-graph.set_entry_point("query_validator")
+graph.set_conditional_entry_point(
+    route_entry,
+    {
+        "query_validator": "query_validator",
+        "sql_agent": "sql_agent",
+        "fused_planner": "fused_planner"
+    }
+)
+
+graph.add_conditional_edges(
+    "fused_planner",
+    route_after_fused,
+    {
+        "query_validator": "query_validator",
+        "non_analytics": "non_analytics",
+        "dashboard_agent": "dashboard_agent",
+        "done": END
+    }
+)
 
 graph.add_conditional_edges(
     "query_validator",
@@ -96,3 +235,61 @@ graph.add_conditional_edges(
 )
 
 agents_graph = graph.compile()
+
+
+def cached_answer(question: str):
+    """KPI template or semantic cache answer for ``question``, or None."""
+    templated = build_kpi_answer(question)
+    if templated:
+        return templated
+
+    if SEMANTIC_CACHE_ENABLED:
+        start = time.perf_counter()
+        hit = semantic_cache.lookup(question)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if hit:
+            logger.info("Semantic cache hit (%.2f, %.2f ms): %s", hit["similarity"], elapsed_ms, hit["question"])
+            return {
+                "question": question,
+                "validator": dict(hit["validator"]),
+                "sql_query": hit["sql"],
+                "cached_from": hit["question"]
+            }
+
+    return None
+
+
+def shortcut_name(result):
+    """Which LLM-free path answered a question, for its trace span."""
+    if not result:
+        return None
+    return "kpi_template" if "kpi_slots" in result else "semantic_cache"
+
+
+def invoke_graph(question: str):
+    """Answer ``question`` through the agent graph, with two LLM-free shortcuts.
+
+    Common KPI questions are answered from SQL templates (the result then
+    also carries a ``visual_spec``), and a near-duplicate of an earlier
+    question reuses its validated plan and SQL. Call remember_answer() once
+    the SQL has run successfully so later questions can hit the cache.
+    """
+    with span("graph", question=question) as active:
+        result = cached_answer(question)
+        active.set(shortcut=shortcut_name(result))
+        return result or agents_graph.invoke({"question": question})
+
+
+async def ainvoke_graph(question: str):
+    """Async invoke_graph(), for serving many requests from one event loop."""
+    with span("graph", question=question) as active:
+        result = cached_answer(question)
+        active.set(shortcut=shortcut_name(result))
+        return result or await agents_graph.ainvoke({"question": question})
+
+
+def remember_answer(question: str, validator: Dict[str, Any], sql: str):
+    """Add a successfully answered single question to the semantic cache."""
+    if SEMANTIC_CACHE_ENABLED and sql and not validator.get("dashboard", False):
+        semantic_cache.remember(question, validator, sql)
@@ -0,0 +1,156 @@
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+from graph.agent_graph import agents_graph
+from tools.data_extractor_tool import run_sql
+from tools.plots_render_tool import render_plotly
+from utils.clean_utils import clean_json
+from agents.visualization_agent import run_visualization_agent
+from utils.llm_async import is_retryable
+from utils.tracing import span
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Sub-questions answered at the same time
+DASHBOARD_MAX_WORKERS = int(os.getenv("DASHBOARD_MAX_WORKERS", "4"))
+# Upper bound on sub-question starts per minute, to stay under the LLM quota
+DASHBOARD_REQUESTS_PER_MINUTE = int(os.getenv("DASHBOARD_REQUESTS_PER_MINUTE", "30"))
+DASHBOARD_MAX_RETRIES = int(os.getenv("DASHBOARD_MAX_RETRIES", "3"))
+
+# Kaleido image export is not safe to run concurrently
+_render_lock = threading.Lock()
+
+
+class RateLimiter:
+    """Spaces out calls so no more than ``per_minute`` start each minute."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def answer_dashboard_question(question: str, plan=None, dashboard_mode=False):
+    """Run one dashboard sub-question through SQL, visualization and render.
+
+    With a ``plan`` (see agents.dashboard_agent.build_trusted_plan) the graph
+    skips the validator and goes straight to the SQL agent.
+    """
+    state = {"question": question}
+    if plan:
+        state["validator"] = plan
+
+    sub_result = agents_graph.invoke(state)
+    validator = sub_result["validator"]
+    sql = sub_result.get("sql_query")
+
+    outcome = {
+        "question": question,
+        "validator": validator,
+        "sql": sql,
+        "sql_result": None,
+        "path": None,
+        "fig": None,
+        "error": None,
+    }
+
+    if not sql:
+        outcome["error"] = "no SQL generated"
+        return outcome
+
+    sql_result = run_sql(question, sql)
+    outcome["sql_result"] = sql_result
+
+    if not sql_result["success"]:
+        outcome["error"] = sql_result["error"] or sql_result["reason"]
+        return outcome
+
+    if validator.get("visualization", True):
+        df = sql_result["data"]
+
+        visual_spec = run_visualization_agent(
+            validator["analysis_goal"],
+            df.head(2),
+            df.columns.tolist()
+        )
+
+        with _render_lock:
+            path, fig = render_plotly(df, clean_json(visual_spec), dashboard_mode=dashboard_mode)
+
+        outcome["path"] = path
+        outcome["fig"] = fig
+
+    return outcome
+
+
+def run_dashboard_questions(questions, max_workers=DASHBOARD_MAX_WORKERS,
+                            requests_per_minute=DASHBOARD_REQUESTS_PER_MINUTE,
+                            dashboard_mode=False):
+    """Answer dashboard sub-questions concurrently, in their original order.
+
+    ``questions`` holds plain strings or ``{"question", "plan"}`` items as
+    returned by parse_dashboard_questions.
+
+    At most ``max_workers`` run at once and new ones start no faster than
+    ``requests_per_minute``. Rate limits, server errors and network failures
+    (utils.llm_async.is_retryable, the async agents' policy) are retried with
+    jittered exponential backoff; any other failure is reported in that question's
+    ``error`` instead of aborting the dashboard.
+    """
+    limiter = RateLimiter(requests_per_minute)
+
+    def run_one(item):
+        if isinstance(item, str):
+            item = {"question": item, "plan": None}
+        question = item["question"]
+
+        with span("dashboard_question", question=question) as active:
+            for attempt in range(1, DASHBOARD_MAX_RETRIES + 1):
+                limiter.wait()
+                try:
+                    return answer_dashboard_question(question, item.get("plan"), dashboard_mode)
+                except Exception as e:
+                    if is_retryable(e) and attempt < DASHBOARD_MAX_RETRIES:
+                        delay = (2 ** attempt) + random.uniform(0, 1)
+                        active.add("retries")
+                        logger.warning("Transient error on '%s' (%s) — retrying in %.1fs", question, e, delay)
+                        time.sleep(delay)
+                        continue
+
+                    logger.error("Dashboard question failed: %s: %s", question, e)
+                    active.status = "ERROR"
+                    active.set(error=str(e))
+                    return {
+                        "question": question,
+                        "validator": None,
+                        "sql": None,
+                        "sql_result": None,
+                        "path": None,
+                        "fig": None,
+                        "error": str(e),
+                    }
+
+    if not questions:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(questions)))) as executor:
+        # Worker threads start with an empty context; run each question in
+        # a copy of the caller's so its spans join the request trace
+        contexts = [contextvars.copy_context() for _ in questions]
+        return list(executor.map(lambda ctx, item: ctx.run(run_one, item), contexts, questions))
@@ -1,10 +1,20 @@
 import psycopg2
 from psycopg2 import sql, extras
+from psycopg2.pool import ThreadedConnectionPool
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import lru_cache, partial
 import pandas as pd
+import argparse
+import codecs
+import hashlib
+import io
 import os
 from datetime import datetime
 import sys
+import time
 from dotenv import load_dotenv
+from utils.result_cache import invalidate_tables
+from utils.tracing import configure_logging
 load_dotenv()
 
 PSWD = os.getenv("DB_PASSWORD")
@@ -37,6 +47,62 @@ CSV_FILES = {
     'fact_returns': 'AdventureWorks Returns Data.csv'
 }
 
+SALES_YEARS = ['2020', '2021', '2022']
+
+CALENDAR_COLUMNS = [
+    'date', 'year', 'quarter', 'month', 'month_name', 'day_of_week', 'day_name',
+    'week_of_year', 'quarter_key', 'month_key', 'quarter_start',
+    'fiscal_year', 'fiscal_quarter', 'fiscal_month'
+]
+
+# First month of the fiscal year (1 = fiscal year matches the calendar year)
+FISCAL_YEAR_START_MONTH = int(os.getenv("FISCAL_YEAR_START_MONTH", "1"))
+
+SALES_COLUMNS = [
+    'order_date', 'stock_date', 'order_number', 'product_key',
+    'customer_key', 'territory_key', 'order_line_item', 'order_quantity'
+]
+
+RETURNS_COLUMNS = ['return_date', 'territory_key', 'product_key', 'return_quantity']
+
+# Values priced from dim_products at load time, so revenue and profit
+# queries need no product join
+SALES_VALUE_COLUMNS = ['unit_price', 'unit_cost', 'revenue', 'profit']
+RETURNS_VALUE_COLUMNS = ['return_value']
+
+SALES_TABLE_COLUMNS = SALES_COLUMNS + SALES_VALUE_COLUMNS
+RETURNS_TABLE_COLUMNS = RETURNS_COLUMNS + RETURNS_VALUE_COLUMNS
+
+# Dimension table columns, in lookup CSV order
+DIMENSION_COLUMNS = {
+    'dim_customers': [
+        'customer_key', 'prefix', 'first_name', 'last_name', 'birth_date',
+        'marital_status', 'gender', 'email_address', 'annual_income',
+        'total_children', 'education_level', 'occupation', 'home_owner'
+    ],
+    'dim_product_categories': ['product_category_key', 'category_name'],
+    'dim_product_subcategories': [
+        'product_subcategory_key', 'subcategory_name', 'product_category_key'
+    ],
+    'dim_products': [
+        'product_key', 'product_subcategory_key', 'product_sku', 'product_name',
+        'model_name', 'product_description', 'product_color', 'product_size',
+        'product_style', 'product_cost', 'product_price'
+    ],
+    'dim_territories': ['sales_territory_key', 'region', 'country', 'continent'],
+}
+
+# Rows per CSV chunk streamed through cleaning and COPY
+LOAD_CHUNK_SIZE = int(os.getenv("LOAD_CHUNK_SIZE", "50000"))
+
+# Encodings tried, in order, against the first ENCODING_SNIFF_BYTES of each
+# CSV. latin-1 decodes any byte sequence, so it is the catch-all.
+CSV_ENCODINGS = ['utf-8', 'cp1252', 'latin-1']
+ENCODING_SNIFF_BYTES = 64 * 1024
+
+# Number of tables loaded concurrently (each on its own pooled connection)
+LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", "4"))
+
 
 def get_connection():
     """Create and return a database connection."""
@@ -49,56 +115,76 @@ def get_connection():
         sys.exit(1)
 
 # ============================================================================
-# TABLE CREATION
+# BULK LOAD HELPERS
 # ============================================================================
 
-def create_tables(conn):
-    """Create all dimension and fact tables."""
-    
-    print("\n" + "="*70)
-    print("CREATING TABLES")
-    print("="*70)
-    
-    cursor = conn.cursor()
-    
-    # Drop existing tables (in correct order due to foreign keys)
-    drop_commands = [
-        "DROP TABLE IF EXISTS fact_returns CASCADE;",
-        "DROP TABLE IF EXISTS fact_sales CASCADE;",
-        "DROP TABLE IF EXISTS dim_products CASCADE;",
-        "DROP TABLE IF EXISTS dim_product_subcategories CASCADE;",
-        "DROP TABLE IF EXISTS dim_product_categories CASCADE;",
-        "DROP TABLE IF EXISTS dim_territories CASCADE;",
-        "DROP TABLE IF EXISTS dim_customers CASCADE;",
-        "DROP TABLE IF EXISTS dim_calendar CASCADE;"
+def copy_buffer(df):
+    """Serialize a DataFrame as headerless CSV for COPY FROM STDIN.
+
+    Float columns holding only whole numbers (integer keys that picked up a
+    NaN) are written without the ``.0`` that INTEGER columns would reject.
+    """
+    whole = [
+        col for col in df.columns
+        if df[col].dtype.kind == 'f' and (df[col].dropna() % 1 == 0).all()
     ]
-    
-    print("\n1. Dropping existing tables (if any)...")
-    for cmd in drop_commands:
-        cursor.execute(cmd)
-    conn.commit()
-    print("   ✓ Existing tables dropped")
-    
-    # Create dimension tables
-    create_commands = [
-        # Calendar
-        """
-        CREATE TABLE dim_calendar (
-            date DATE PRIMARY KEY,
+    if whole:
+        df = df.astype({col: 'Int64' for col in whole})
+
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    return buffer
+
+def copy_dataframe(conn, df, table_name, columns):
+    """Stream a DataFrame into a table with COPY FROM STDIN.
+
+    The DataFrame columns are written positionally, so they must be in the
+    same order as ``columns``. Missing values are written as empty fields,
+    which COPY's CSV format loads as NULL.
+    """
+    if len(df.columns) != len(columns):
+        raise ValueError(
+            f"{table_name}: expected {len(columns)} columns, got {len(df.columns)}"
+        )
+
+    buffer = copy_buffer(df)
+
+    copy_sql = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+        sql.Identifier(table_name),
+        sql.SQL(', ').join(sql.Identifier(col) for col in columns)
+    )
+
+    cursor = conn.cursor()
+    cursor.copy_expert(copy_sql.as_string(conn), buffer)
+    cursor.close()
+    return len(df)
+
+# ============================================================================
+# TABLE CREATION
+# ============================================================================
+
+# Column definitions only; keys are added separately (PRIMARY_KEYS, FOREIGN_KEYS)
+# so fast-load mode can create bare tables and add them after the data is in.
+TABLE_DEFINITIONS = {
+    'dim_calendar': """
+            date DATE NOT NULL,
             year INTEGER,
             quarter INTEGER,
             month INTEGER,
             month_name VARCHAR(20),
             day_of_week INTEGER,
             day_name VARCHAR(20),
-            week_of_year INTEGER
-        );
-        """,
-        
-        # Customers
-        """
-        CREATE TABLE dim_customers (
-            customer_key INTEGER PRIMARY KEY,
+            week_of_year INTEGER,
+            quarter_key INTEGER,
+            month_key INTEGER,
+            quarter_start DATE,
+            fiscal_year INTEGER,
+            fiscal_quarter INTEGER,
+            fiscal_month INTEGER
+    """,
+    'dim_customers': """
+            customer_key INTEGER NOT NULL,
             prefix VARCHAR(10),
             first_name VARCHAR(50),
             last_name VARCHAR(50),
@@ -111,32 +197,18 @@ def create_tables(conn):
             education_level VARCHAR(50),
             occupation VARCHAR(50),
             home_owner VARCHAR(10)
-        );
-        """,
-        
-        # Product Categories
-        """
-        CREATE TABLE dim_product_categories (
-            product_category_key INTEGER PRIMARY KEY,
+    """,
+    'dim_product_categories': """
+            product_category_key INTEGER NOT NULL,
             category_name VARCHAR(50) NOT NULL
-        );
-        """,
-        
-        # Product Subcategories
-        """
-        CREATE TABLE dim_product_subcategories (
-            product_subcategory_key INTEGER PRIMARY KEY,
+    """,
+    'dim_product_subcategories': """
+            product_subcategory_key INTEGER NOT NULL,
             subcategory_name VARCHAR(100) NOT NULL,
-            product_category_key INTEGER,
-            FOREIGN KEY (product_category_key) 
-                REFERENCES dim_product_categories(product_category_key)
-        );
-        """,
-        
-        # Products
-        """
-        CREATE TABLE dim_products (
-            product_key INTEGER PRIMARY KEY,
+            product_category_key INTEGER
+    """,
+    'dim_products': """
+            product_key INTEGER NOT NULL,
             product_subcategory_key INTEGER,
             product_sku VARCHAR(50),
             product_name VARCHAR(100),
@@ -146,25 +218,15 @@ def create_tables(conn):
             product_size VARCHAR(10),
             product_style VARCHAR(10),
             product_cost DECIMAL(10,4),
-            product_price DECIMAL(10,4),
-            FOREIGN KEY (product_subcategory_key) 
-                REFERENCES dim_product_subcategories(product_subcategory_key)
-        );
-        """,
-        
-        # Territories
-        """
-        CREATE TABLE dim_territories (
-            sales_territory_key INTEGER PRIMARY KEY,
+            product_price DECIMAL(10,4)
+    """,
+    'dim_territories': """
+            sales_territory_key INTEGER NOT NULL,
             region VARCHAR(50),
             country VARCHAR(50),
             continent VARCHAR(50)
-        );
-        """,
-        
-        # Sales Fact
-        """
-        CREATE TABLE fact_sales (
+    """,
+    'fact_sales': """
             sales_id SERIAL,
             order_date DATE NOT NULL,
             stock_date DATE,
@@ -174,37 +236,216 @@ def create_tables(conn):
             territory_key INTEGER NOT NULL,
             order_line_item INTEGER NOT NULL,
             order_quantity INTEGER NOT NULL,
-            PRIMARY KEY (order_number, order_line_item),
-            FOREIGN KEY (product_key) REFERENCES dim_products(product_key),
-            FOREIGN KEY (customer_key) REFERENCES dim_customers(customer_key),
-            FOREIGN KEY (territory_key) REFERENCES dim_territories(sales_territory_key)
-        );
-        """,
-        
-        # Returns Fact
-        """
-        CREATE TABLE fact_returns (
-            return_id SERIAL PRIMARY KEY,
+            unit_price DECIMAL(10,4),
+            unit_cost DECIMAL(10,4),
+            revenue DECIMAL(14,4),
+            profit DECIMAL(14,4)
+    """,
+    'fact_returns': """
+            return_id SERIAL,
             return_date DATE NOT NULL,
             territory_key INTEGER NOT NULL,
             product_key INTEGER NOT NULL,
             return_quantity INTEGER NOT NULL,
-            FOREIGN KEY (territory_key) REFERENCES dim_territories(sales_territory_key),
-            FOREIGN KEY (product_key) REFERENCES dim_products(product_key)
-        );
-        """
-    ]
+            return_value DECIMAL(14,4)
+    """,
+}
+
+PRIMARY_KEYS = {
+    'dim_calendar': ['date'],
+    'dim_customers': ['customer_key'],
+    'dim_product_categories': ['product_category_key'],
+    'dim_product_subcategories': ['product_subcategory_key'],
+    'dim_products': ['product_key'],
+    'dim_territories': ['sales_territory_key'],
+    # A partitioned table's keys must include its partition column, so
+    # fact_sales' natural key (SALES_NATURAL_KEY) is only enforced per
+    # partition; incremental loads and partition swaps keep it unique across them
+    'fact_sales': ['order_number', 'order_line_item', 'order_date'],
+    'fact_returns': ['return_id', 'return_date'],
+}
+
+SALES_NATURAL_KEY = ['order_number', 'order_line_item']
+
+# Fact tables range-partitioned by calendar year on their date column, one
+# partition per year (fact_sales_2021, ...). Time-bounded queries prune to
+# the years they touch, and a year can be reloaded by swapping its partition.
+PARTITIONED_TABLES = {
+    'fact_sales': 'order_date',
+    'fact_returns': 'return_date',
+}
+
+# table -> [(column, referenced table(column))]
+FOREIGN_KEYS = {
+    'dim_product_subcategories': [
+        ('product_category_key', 'dim_product_categories(product_category_key)'),
+    ],
+    'dim_products': [
+        ('product_subcategory_key', 'dim_product_subcategories(product_subcategory_key)'),
+    ],
+    'fact_sales': [
+        ('product_key', 'dim_products(product_key)'),
+        ('customer_key', 'dim_customers(customer_key)'),
+        ('territory_key', 'dim_territories(sales_territory_key)'),
+    ],
+    'fact_returns': [
+        ('territory_key', 'dim_territories(sales_territory_key)'),
+        ('product_key', 'dim_products(product_key)'),
+    ],
+}
+
+
+def primary_key_command(table_name):
+    """ALTER TABLE statement adding the table's primary key."""
+    return f"ALTER TABLE {table_name} ADD PRIMARY KEY ({', '.join(PRIMARY_KEYS[table_name])});"
+
+def foreign_key_command(table_name):
+    """Single ALTER TABLE statement adding all of the table's foreign keys."""
+    clauses = ",\n    ".join(
+        f"ADD FOREIGN KEY ({column}) REFERENCES {reference}"
+        for column, reference in FOREIGN_KEYS[table_name]
+    )
+    return f"ALTER TABLE {table_name}\n    {clauses};"
+
+def create_table_command(table_name, unlogged=False):
+    """CREATE TABLE statement for one of the TABLE_DEFINITIONS.
+
+    Partitioned parents hold no rows themselves and cannot be unlogged;
+    their partitions are (see ensure_year_partition).
+    """
+    columns = TABLE_DEFINITIONS[table_name]
+    if table_name in PARTITIONED_TABLES:
+        return f"CREATE TABLE {table_name} ({columns}) PARTITION BY RANGE ({PARTITIONED_TABLES[table_name]});"
+    table_kind = "UNLOGGED TABLE" if unlogged else "TABLE"
+    return f"CREATE {table_kind} {table_name} ({columns});"
+
+def partition_name(table_name, year):
+    """Name of ``table_name``'s partition for one calendar year."""
+    return f"{table_name}_{int(year)}"
+
+def partition_bounds(year):
+    """FOR VALUES clause covering one calendar year."""
+    year = int(year)
+    return f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+
+def table_exists(conn, table_name):
+    """True when ``table_name`` exists (committed or in this transaction)."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (table_name,))
+    exists = cursor.fetchone()[0]
+    cursor.close()
+    return exists
+
+def ensure_year_partition(conn, table_name, year, unlogged=False):
+    """Create ``table_name``'s partition for ``year`` unless it exists.
+
+    Concurrent loaders may discover the same new year, so creation is
+    serialised per parent table with an advisory lock. Runs in the caller's
+    transaction; returns the partition name.
+    """
+    partition = partition_name(table_name, year)
+    if table_exists(conn, partition):
+        return partition
     
-    print("\n2. Creating tables...")
-    table_names = [
-        'dim_calendar', 'dim_customers', 'dim_product_categories',
-        'dim_product_subcategories', 'dim_products', 'dim_territories',
-        'fact_sales', 'fact_returns'
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (table_name,))
+    table_kind = "UNLOGGED TABLE" if unlogged else "TABLE"
+    cursor.execute(
+        f"CREATE {table_kind} IF NOT EXISTS {partition} "
+        f"PARTITION OF {table_name} {partition_bounds(year)};"
+    )
+    cursor.close()
+    print(f"   ✓ Created partition {partition}")
+    return partition
+
+def list_partitions(conn, table_name):
+    """Names of the partitions currently attached to ``table_name``."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        ORDER BY c.relname
+    """, (table_name,))
+    partitions = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    return partitions
+
+def require_partitioned_facts(conn):
+    """Fail early when the fact tables predate partitioning.
+
+    The incremental upserts and partition swaps rely on the partitioned
+    layout and its keys; an older unpartitioned database needs one full
+    reload first.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT c.relname FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = ANY(%s)
+    """, (list(PARTITIONED_TABLES),))
+    partitioned = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    missing = sorted(set(PARTITIONED_TABLES) - partitioned)
+    if missing:
+        raise Exception(
+            f"{', '.join(missing)} not partitioned by year — run a full reload first"
+        )
+
+def create_tables(conn, fast_load=False):
+    """Create all dimension and fact tables.
+
+    With ``fast_load`` the tables are created UNLOGGED and without keys;
+    finalize_fast_load adds them once the data is loaded. The fact tables
+    are partitioned by year, with a partition per SALES_YEARS year created
+    up front; later years get theirs when they are first loaded.
+    """
+    
+    print("\n" + "="*70)
+    print("CREATING TABLES" + (" (fast load: unlogged, no keys)" if fast_load else ""))
+    print("="*70)
+    
+    cursor = conn.cursor()
+    
+    # Drop existing tables (in correct order due to foreign keys)
+    drop_commands = [
+        "DROP TABLE IF EXISTS fact_returns CASCADE;",
+        "DROP TABLE IF EXISTS fact_sales CASCADE;",
+        "DROP TABLE IF EXISTS dim_products CASCADE;",
+        "DROP TABLE IF EXISTS dim_product_subcategories CASCADE;",
+        "DROP TABLE IF EXISTS dim_product_categories CASCADE;",
+        "DROP TABLE IF EXISTS dim_territories CASCADE;",
+        "DROP TABLE IF EXISTS dim_customers CASCADE;",
+        "DROP TABLE IF EXISTS dim_calendar CASCADE;"
     ]
     
-    for idx, cmd in enumerate(create_commands):
+    print("\n1. Dropping existing tables (if any)...")
+    for cmd in drop_commands:
         cursor.execute(cmd)
-        print(f"   ✓ Created {table_names[idx]}")
+    conn.commit()
+    print("   ✓ Existing tables dropped")
+    
+    print("\n2. Creating tables...")
+    for table_name in TABLE_DEFINITIONS:
+        cursor.execute(create_table_command(table_name, unlogged=fast_load))
+        print(f"   ✓ Created {table_name}")
+    
+    for table_name in PARTITIONED_TABLES:
+        for year in SALES_YEARS:
+            ensure_year_partition(conn, table_name, year, unlogged=fast_load)
+    
+    if not fast_load:
+        print("\n3. Adding keys...")
+        for table_name in PRIMARY_KEYS:
+            cursor.execute(primary_key_command(table_name))
+        for table_name in FOREIGN_KEYS:
+            cursor.execute(foreign_key_command(table_name))
+        print("   ✓ Primary and foreign keys added")
+    
+    # A full reload starts every source from scratch
+    create_watermark_table(conn)
+    cursor.execute("DELETE FROM etl_load_watermarks;")
+    print("   ✓ Reset load watermarks")
     
     conn.commit()
     print("\n✓ All tables created successfully!")
@@ -214,316 +455,326 @@ def create_tables(conn):
 # DATA LOADING FUNCTIONS
 # ============================================================================
 
-def load_calendar_data(conn):
-    """Load calendar dimension data."""
-    print("\n" + "-"*70)
-    print("Loading dim_calendar...")
-    
-    csv_path = os.path.join(DATASET_PATH, CSV_FILES['dim_calendar'])
-    df = pd.read_csv(csv_path)
+@lru_cache(maxsize=None)
+def _sniff_csv(csv_path, size, mtime_ns):
+    """Detect a file's encoding from its first bytes and read its header.
+
+    Cached per (path, size, mtime), so each file is sniffed once per process
+    however many loaders read it.
+    """
+    with open(csv_path, 'rb') as f:
+        prefix = f.read(ENCODING_SNIFF_BYTES)
+    
+    encoding = CSV_ENCODINGS[-1]
+    for candidate in CSV_ENCODINGS:
+        # Incremental decoding tolerates a multi-byte character cut off at the
+        # end of the prefix
+        decoder = codecs.getincrementaldecoder(candidate)()
+        try:
+            decoder.decode(prefix, final=len(prefix) < ENCODING_SNIFF_BYTES)
+        except UnicodeDecodeError:
+            continue
+        encoding = candidate
+        break
     
-    # Convert to datetime and extract components
-    df['Date'] = pd.to_datetime(df['Date'])
-    df['year'] = df['Date'].dt.year
-    df['quarter'] = df['Date'].dt.quarter
-    df['month'] = df['Date'].dt.month
-    df['month_name'] = df['Date'].dt.strftime('%B')
-    df['day_of_week'] = df['Date'].dt.dayofweek
-    df['day_name'] = df['Date'].dt.strftime('%A')
-    df['week_of_year'] = df['Date'].dt.isocalendar().week
+    header = pd.read_csv(csv_path, encoding=encoding, encoding_errors='replace', nrows=0)
+    columns = list(header.columns.str.lower().str.replace(' ', '_'))
+    return encoding, columns
+
+def sniff_csv(csv_path):
+    """Return (encoding, normalised column names) for a CSV file."""
+    stat = os.stat(csv_path)
+    return _sniff_csv(csv_path, stat.st_size, stat.st_mtime_ns)
+
+def iter_csv_chunks(csv_path, chunksize=LOAD_CHUNK_SIZE):
+    """Yield a CSV file as DataFrame chunks of at most ``chunksize`` rows.
+
+    The file is parsed once with the sniffed encoding; a stray undecodable
+    byte past the sniffed prefix is replaced rather than forcing a re-read.
+    Column names come back already normalised to the database style.
+    """
+    encoding, columns = sniff_csv(csv_path)
+    print(f"   Reading {os.path.basename(csv_path)} ({encoding})")
+    
+    yield from pd.read_csv(
+        csv_path,
+        encoding=encoding,
+        encoding_errors='replace',
+        header=0,
+        names=columns,
+        chunksize=chunksize
+    )
+
+def iter_source_chunks(csv_key, chunksize=LOAD_CHUNK_SIZE):
+    """Yield the chunks of one of the CSV_FILES sources."""
+    return iter_csv_chunks(os.path.join(DATASET_PATH, CSV_FILES[csv_key]), chunksize)
+
+def clean_strings(chunk):
+    """Strip text columns and turn blank or 'nan' strings into NULLs, in place."""
+    for col in chunk.select_dtypes(include=['object']).columns:
+        stripped = chunk[col].str.strip()
+        chunk[col] = stripped.mask(stripped.isin(['', 'nan', 'NaN']))
+    return chunk
+
+def track_max(chunks, column, maxima):
+    """Pass chunks through, appending each chunk's max ``column`` to ``maxima``."""
+    for chunk in chunks:
+        if not chunk.empty:
+            maxima.append(chunk[column].max())
+        yield chunk
+
+def chunk_years(chunk, column):
+    """Calendar year of each row's ``column`` date."""
+    return pd.to_datetime(chunk[column]).dt.year
+
+def split_year(chunks, column, year, strays):
+    """Yield each chunk's rows dated in ``year``; other rows go to ``strays``."""
+    for chunk in chunks:
+        in_year = chunk_years(chunk, column) == int(year)
+        if not in_year.all():
+            strays.append(chunk[~in_year])
+        yield chunk[in_year]
+
+def with_partitions(conn, chunks, table_name):
+    """Pass chunks through, first creating any yearly partition they need."""
+    column = PARTITIONED_TABLES[table_name]
+    seen = set()
+    for chunk in chunks:
+        if not chunk.empty:
+            for year in set(chunk_years(chunk, column).unique()) - seen:
+                ensure_year_partition(conn, table_name, year)
+                seen.add(year)
+        yield chunk
+
+def stream_copy(conn, chunks, table_name, columns):
+    """COPY each chunk into ``table_name`` and report the throughput.
+
+    Only one chunk is held in memory at a time, so peak memory depends on
+    LOAD_CHUNK_SIZE rather than on the size of the source file.
+    """
+    start = time.perf_counter()
+    total_rows = 0
+    
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        total_rows += copy_dataframe(conn, chunk, table_name, columns)
     
-    # Rename for database
-    df.columns = df.columns.str.lower()
+    elapsed = time.perf_counter() - start
+    rate = total_rows / elapsed if elapsed > 0 else 0
+    print(f"   {table_name}: {total_rows:,} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+    return total_rows
+
+def build_calendar_frame(dates):
+    """Build dim_calendar rows for a sequence of dates, fully vectorized.
+
+    Besides the calendar attributes this adds period keys the SQL agent can
+    filter on with plain equality: ``quarter_key``/``month_key`` number
+    quarters and months consecutively (so "last quarter" is
+    ``MAX(quarter_key) - 1``), and the fiscal columns follow
+    FISCAL_YEAR_START_MONTH, with the fiscal year named after the calendar
+    year it ends in.
+    """
+    dates = pd.DatetimeIndex(pd.to_datetime(dates)).normalize()
+    year = dates.year.to_numpy()
+    quarter = dates.quarter.to_numpy()
+    month = dates.month.to_numpy()
+    
+    fiscal_month = (month - FISCAL_YEAR_START_MONTH) % 12 + 1
+    fiscal_year = year + ((FISCAL_YEAR_START_MONTH > 1) & (month >= FISCAL_YEAR_START_MONTH))
+    
+    return pd.DataFrame({
+        'date': dates.date,
+        'year': year,
+        'quarter': quarter,
+        'month': month,
+        'month_name': dates.month_name(),
+        'day_of_week': dates.dayofweek,
+        'day_name': dates.day_name(),
+        'week_of_year': dates.isocalendar().week.to_numpy(),
+        'quarter_key': year * 4 + quarter - 1,
+        'month_key': year * 12 + month - 1,
+        'quarter_start': dates.to_period('Q').start_time.date,
+        'fiscal_year': fiscal_year,
+        'fiscal_quarter': (fiscal_month - 1) // 3 + 1,
+        'fiscal_month': fiscal_month,
+    })
+
+def load_calendar_data(conn, start_date=None, end_date=None):
+    """Load calendar dimension data.
+
+    When ``start_date`` and ``end_date`` are given the calendar is generated
+    for that range instead of being read from the lookup CSV.
+    """
+    print("\n" + "-"*70)
+    print("Loading dim_calendar...")
     
-    cursor = conn.cursor()
+    if start_date and end_date:
+        print(f"   Generating calendar {start_date} → {end_date}")
+        dates = pd.date_range(start_date, end_date, freq='D')
+    else:
+        dates = pd.concat(chunk['date'] for chunk in iter_source_chunks('dim_calendar'))
     
-    for _, row in df.iterrows():
-        cursor.execute("""
-            INSERT INTO dim_calendar (date, year, quarter, month, month_name, 
-                                     day_of_week, day_name, week_of_year)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (row['date'], row['year'], row['quarter'], row['month'], 
-              row['month_name'], row['day_of_week'], row['day_name'], row['week_of_year']))
+    df = build_calendar_frame(dates)
+    rows = copy_dataframe(conn, df, 'dim_calendar', CALENDAR_COLUMNS)
     
     conn.commit()
-    cursor.close()
-    print(f"✓ Loaded {len(df)} records into dim_calendar")
+    print(f"✓ Loaded {rows} records into dim_calendar")
 
 def load_customers_data(conn):
     """Load customer dimension data."""
     print("\n" + "-"*70)
     print("Loading dim_customers...")
     
-    csv_path = os.path.join(DATASET_PATH, CSV_FILES['dim_customers'])
-    
-    # Try different encodings
-    encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-    df = None
-    
-    for encoding in encodings:
-        try:
-            print(f"   Trying encoding: {encoding}...")
-            df = pd.read_csv(csv_path, encoding=encoding)
-            print(f"   ✓ Successfully read with {encoding} encoding")
-            break
-        except UnicodeDecodeError:
-            continue
-    
-    if df is None:
-        raise Exception("Could not read CSV file with any common encoding")
-    
-    # Rename columns to match database schema
-    df.columns = df.columns.str.lower().str.replace(' ', '_')
-    
-    # Clean data: strip whitespace from all string columns
-    string_columns = df.select_dtypes(include=['object']).columns
-    for col in string_columns:
-        df[col] = df[col].astype(str).str.strip()
-    
-    # Replace 'nan' string with None for proper NULL handling
-    df = df.replace('nan', None)
-    df = df.replace('NaN', None)
-    df = df.replace('', None)
-    
-    cursor = conn.cursor()
-    
-    print(f"   Inserting {len(df)} records...")
-    for idx, row in df.iterrows():
-        try:
-            cursor.execute("""
-                INSERT INTO dim_customers (
-                    customer_key, prefix, first_name, last_name, birth_date,
-                    marital_status, gender, email_address, annual_income,
-                    total_children, education_level, occupation, home_owner
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, tuple(row))
-        except Exception as e:
-            print(f"   ✗ Error at row {idx}: {e}")
-            print(f"   Row data: {row.to_dict()}")
-            raise
+    chunks = (clean_strings(chunk) for chunk in iter_source_chunks('dim_customers'))
+    rows = stream_copy(conn, chunks, 'dim_customers', DIMENSION_COLUMNS['dim_customers'])
     
     conn.commit()
-    cursor.close()
-    print(f"✓ Loaded {len(df)} records into dim_customers")
+    print(f"✓ Loaded {rows} records into dim_customers")
 
 def load_product_categories_data(conn):
     """Load product categories dimension data."""
     print("\n" + "-"*70)
     print("Loading dim_product_categories...")
     
-    csv_path = os.path.join(DATASET_PATH, CSV_FILES['dim_product_categories'])
-    
-    # Try different encodings
-    encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-    df = None
-    
-    for encoding in encodings:
-        try:
-            df = pd.read_csv(csv_path, encoding=encoding)
-            break
-        except UnicodeDecodeError:
-            continue
-    
-    if df is None:
-        raise Exception("Could not read CSV file with any common encoding")
-    
-    df.columns = df.columns.str.lower().str.replace(' ', '_')
-    
-    # Clean data
-    string_columns = df.select_dtypes(include=['object']).columns
-    for col in string_columns:
-        df[col] = df[col].astype(str).str.strip()
-    
-    cursor = conn.cursor()
-    
-    for _, row in df.iterrows():
-        cursor.execute("""
-            INSERT INTO dim_product_categories (product_category_key, category_name)
-            VALUES (%s, %s)
-        """, tuple(row))
+    chunks = (clean_strings(chunk) for chunk in iter_source_chunks('dim_product_categories'))
+    rows = stream_copy(conn, chunks, 'dim_product_categories', DIMENSION_COLUMNS['dim_product_categories'])
     
     conn.commit()
-    cursor.close()
-    print(f"✓ Loaded {len(df)} records into dim_product_categories")
+    print(f"✓ Loaded {rows} records into dim_product_categories")
 
 def load_product_subcategories_data(conn):
     """Load product subcategories dimension data."""
     print("\n" + "-"*70)
     print("Loading dim_product_subcategories...")
     
-    csv_path = os.path.join(DATASET_PATH, CSV_FILES['dim_product_subcategories'])
-    
-    # Try different encodings
-    encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-    df = None
-    
-    for encoding in encodings:
-        try:
-            df = pd.read_csv(csv_path, encoding=encoding)
-            break
-        except UnicodeDecodeError:
-            continue
-    
-    if df is None:
-        raise Exception("Could not read CSV file with any common encoding")
-    
-    df.columns = df.columns.str.lower().str.replace(' ', '_')
-    
-    # Clean data
-    string_columns = df.select_dtypes(include=['object']).columns
-    for col in string_columns:
-        df[col] = df[col].astype(str).str.strip()
-    
-    cursor = conn.cursor()
-    
-    for _, row in df.iterrows():
-        cursor.execute("""
-            INSERT INTO dim_product_subcategories (
-                product_subcategory_key, subcategory_name, product_category_key
-            ) VALUES (%s, %s, %s)
-        """, tuple(row))
+    chunks = (clean_strings(chunk) for chunk in iter_source_chunks('dim_product_subcategories'))
+    rows = stream_copy(conn, chunks, 'dim_product_subcategories', DIMENSION_COLUMNS['dim_product_subcategories'])
     
     conn.commit()
-    cursor.close()
-    print(f"✓ Loaded {len(df)} records into dim_product_subcategories")
+    print(f"✓ Loaded {rows} records into dim_product_subcategories")
 
 def load_products_data(conn):
     """Load products dimension data."""
     print("\n" + "-"*70)
     print("Loading dim_products...")
     
-    csv_path = os.path.join(DATASET_PATH, CSV_FILES['dim_products'])
-    
-    # Try different encodings
-    encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-    df = None
-    
-    for encoding in encodings:
-        try:
-            df = pd.read_csv(csv_path, encoding=encoding)
-            break
-        except UnicodeDecodeError:
-            continue
-    
-    if df is None:
-        raise Exception("Could not read CSV file with any common encoding")
-    
-    df.columns = df.columns.str.lower().str.replace(' ', '_')
-    
-    # Clean data
-    string_columns = df.select_dtypes(include=['object']).columns
-    for col in string_columns:
-        df[col] = df[col].astype(str).str.strip()
-    
-    # Replace 'nan' with None
-    df = df.replace('nan', None)
-    df = df.replace('NaN', None)
-    
-    cursor = conn.cursor()
-    
-    print(f"   Inserting {len(df)} records...")
-    for idx, row in df.iterrows():
-        try:
-            cursor.execute("""
-                INSERT INTO dim_products (
-                    product_key, product_subcategory_key, product_sku, product_name,
-                    model_name, product_description, product_color, product_size,
-                    product_style, product_cost, product_price
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, tuple(row))
-        except Exception as e:
-            print(f"   ✗ Error at row {idx}: {e}")
-            print(f"   Row data: {row.to_dict()}")
-            raise
+    chunks = (clean_strings(chunk) for chunk in iter_source_chunks('dim_products'))
+    rows = stream_copy(conn, chunks, 'dim_products', DIMENSION_COLUMNS['dim_products'])
     
     conn.commit()
-    cursor.close()
-    print(f"✓ Loaded {len(df)} records into dim_products")
+    print(f"✓ Loaded {rows} records into dim_products")
 
 def load_territories_data(conn):
     """Load territories dimension data."""
     print("\n" + "-"*70)
     print("Loading dim_territories...")
     
-    csv_path = os.path.join(DATASET_PATH, CSV_FILES['dim_territories'])
-    
-    # Try different encodings
-    encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-    df = None
-    
-    for encoding in encodings:
-        try:
-            df = pd.read_csv(csv_path, encoding=encoding)
-            break
-        except UnicodeDecodeError:
-            continue
-    
-    if df is None:
-        raise Exception("Could not read CSV file with any common encoding")
-    
-    df.columns = df.columns.str.lower().str.replace(' ', '_')
-    
-    # Clean data
-    string_columns = df.select_dtypes(include=['object']).columns
-    for col in string_columns:
-        df[col] = df[col].astype(str).str.strip()
+    chunks = (clean_strings(chunk) for chunk in iter_source_chunks('dim_territories'))
+    rows = stream_copy(conn, chunks, 'dim_territories', DIMENSION_COLUMNS['dim_territories'])
     
+    conn.commit()
+    print(f"✓ Loaded {rows} records into dim_territories")
+
+def prepare_sales_chunk(chunk):
+    """Name the columns after the table and parse the order date.
+
+    The CSV headers (OrderDate, ...) do not match the table columns, so they
+    are mapped positionally; the parsed date is compared against watermarks.
+    """
+    chunk.columns = SALES_COLUMNS
+    chunk['order_date'] = pd.to_datetime(chunk['order_date']).dt.date
+    return chunk
+
+def prepare_returns_chunk(chunk):
+    """Name the columns after the table and parse the return date."""
+    chunk.columns = RETURNS_COLUMNS
+    chunk['return_date'] = pd.to_datetime(chunk['return_date']).dt.date
+    return chunk
+
+def price_map(products):
+    """Index product prices and costs by product_key for the fact loaders."""
+    prices = pd.DataFrame(products, columns=['product_key', 'product_price', 'product_cost'])
+    return prices.set_index('product_key').astype(float)
+
+def load_price_map(conn):
+    """Price map of the dim_products rows already in the database."""
     cursor = conn.cursor()
+    cursor.execute("SELECT product_key, product_price, product_cost FROM dim_products;")
+    rows = cursor.fetchall()
+    cursor.close()
+    return price_map(rows)
+
+def add_sales_values(chunk, prices):
+    """Add unit_price, unit_cost, revenue and profit to a sales chunk.
+
+    Looked up and multiplied column-wise; products missing from ``prices``
+    get NULL values, like the old join-time formula.
+    """
+    matched = prices.reindex(chunk['product_key'])
+    quantity = chunk['order_quantity'].to_numpy()
+    chunk['unit_price'] = matched['product_price'].to_numpy()
+    chunk['unit_cost'] = matched['product_cost'].to_numpy()
+    chunk['revenue'] = (quantity * chunk['unit_price']).round(4)
+    chunk['profit'] = (quantity * (chunk['unit_price'] - chunk['unit_cost'])).round(4)
+    return chunk
+
+def add_returns_values(chunk, prices):
+    """Add return_value (units returned at the product price) to a returns chunk."""
+    unit_price = prices['product_price'].reindex(chunk['product_key']).to_numpy()
+    chunk['return_value'] = (chunk['return_quantity'] * unit_price).round(4)
+    return chunk
+
+def iter_sales_year_chunks(year, prices=None):
+    """Yield the prepared chunks of one yearly sales CSV.
+
+    With a ``prices`` map (see price_map) the chunks also carry the
+    SALES_VALUE_COLUMNS.
+    """
+    chunks = (prepare_sales_chunk(chunk) for chunk in iter_source_chunks(f'fact_sales_{year}'))
+    if prices is None:
+        return chunks
+    return (add_sales_values(chunk, prices) for chunk in chunks)
+
+def iter_returns_chunks(prices=None):
+    """Yield the prepared chunks of the returns CSV, valued when ``prices`` is given."""
+    chunks = (prepare_returns_chunk(chunk) for chunk in iter_source_chunks('fact_returns'))
+    if prices is None:
+        return chunks
+    return (add_returns_values(chunk, prices) for chunk in chunks)
+
+def load_sales_year_data(conn, year):
+    """Load one yearly sales fact file straight into its fact_sales partition.
+
+    Copying into the partition skips row routing and only locks that year,
+    so the yearly files load in parallel. Rows dated outside ``year`` (none
+    in the shipped files) are routed through the parent table afterwards.
+    """
+    print("\n" + "-"*70)
+    print(f"Loading fact_sales ({year})...")
+    
+    csv_key = f'fact_sales_{year}'
+    partition = ensure_year_partition(conn, 'fact_sales', year)
+    maxima = []
+    strays = []
+    chunks = track_max(iter_sales_year_chunks(year, load_price_map(conn)), 'order_date', maxima)
     
-    for _, row in df.iterrows():
-        cursor.execute("""
-            INSERT INTO dim_territories (
-                sales_territory_key, region, country, continent
-            ) VALUES (%s, %s, %s, %s)
-        """, tuple(row))
+    rows = stream_copy(conn, split_year(chunks, 'order_date', year, strays), partition, SALES_TABLE_COLUMNS)
+    if strays:
+        rows += stream_copy(conn, with_partitions(conn, strays, 'fact_sales'), 'fact_sales', SALES_TABLE_COLUMNS)
+    set_watermark(conn, csv_key, 'fact_sales', max(maxima, default=None))
     
     conn.commit()
-    cursor.close()
-    print(f"✓ Loaded {len(df)} records into dim_territories")
+    print(f"✓ Loaded {rows} records for {year} into fact_sales")
+    return rows
 
 def load_sales_data(conn):
     """Load all sales fact data (2020, 2021, 2022)."""
-    print("\n" + "-"*70)
-    print("Loading fact_sales...")
-    
-    cursor = conn.cursor()
     total_records = 0
     
-    encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-    
-    for year in ['2020', '2021', '2022']:
-        csv_key = f'fact_sales_{year}'
-        csv_path = os.path.join(DATASET_PATH, CSV_FILES[csv_key])
-        
-        # Try different encodings
-        df = None
-        for encoding in encodings:
-            try:
-                df = pd.read_csv(csv_path, encoding=encoding)
-                break
-            except UnicodeDecodeError:
-                continue
-        
-        if df is None:
-            raise Exception(f"Could not read {year} sales CSV file with any common encoding")
-        
-        df.columns = df.columns.str.lower().str.replace(' ', '_')
-        
-        print(f"   Loading sales data for {year}...")
-        
-        for _, row in df.iterrows():
-            cursor.execute("""
-                INSERT INTO fact_sales (
-                    order_date, stock_date, order_number, product_key,
-                    customer_key, territory_key, order_line_item, order_quantity
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, tuple(row))
-        
-        conn.commit()
-        print(f"   ✓ Loaded {len(df)} records for {year}")
-        total_records += len(df)
+    for year in SALES_YEARS:
+        total_records += load_sales_year_data(conn, year)
     
-    cursor.close()
     print(f"✓ Total sales records loaded: {total_records}")
 
 def load_returns_data(conn):
@@ -531,41 +782,416 @@ def load_returns_data(conn):
     print("\n" + "-"*70)
     print("Loading fact_returns...")
     
-    csv_path = os.path.join(DATASET_PATH, CSV_FILES['fact_returns'])
+    maxima = []
+    chunks = track_max(iter_returns_chunks(load_price_map(conn)), 'return_date', maxima)
     
-    # Try different encodings
-    encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-    df = None
+    # One file spanning every year, so the parent routes rows to partitions
+    rows = stream_copy(conn, with_partitions(conn, chunks, 'fact_returns'), 'fact_returns', RETURNS_TABLE_COLUMNS)
+    set_watermark(conn, 'fact_returns', 'fact_returns', max(maxima, default=None))
     
-    for encoding in encodings:
-        try:
-            df = pd.read_csv(csv_path, encoding=encoding)
-            break
-        except UnicodeDecodeError:
-            continue
+    conn.commit()
+    print(f"✓ Loaded {rows} records into fact_returns")
+
+# ============================================================================
+# INCREMENTAL LOADING
+# ============================================================================
+
+def file_checksum(csv_path):
+    """Return the SHA-256 of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(csv_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def create_watermark_table(conn):
+    """Create the load watermark table if it does not exist yet."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS etl_load_watermarks (
+            source_key VARCHAR(50) PRIMARY KEY,
+            table_name VARCHAR(50) NOT NULL,
+            file_checksum CHAR(64),
+            max_date DATE,
+            loaded_at TIMESTAMP NOT NULL DEFAULT NOW()
+        );
+    """)
+    cursor.close()
+
+def get_watermark(conn, source_key):
+    """Return (file_checksum, max_date) for a source file, or (None, None)."""
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT file_checksum, max_date FROM etl_load_watermarks WHERE source_key = %s",
+        (source_key,)
+    )
+    row = cursor.fetchone()
+    cursor.close()
+    return row if row else (None, None)
+
+def set_watermark(conn, source_key, table_name, max_date):
+    """Record the checksum and high-water date of a loaded source file.
+
+    Runs in the caller's transaction, so the watermark only moves when the
+    rows it describes are committed.
+    """
+    checksum = file_checksum(os.path.join(DATASET_PATH, CSV_FILES[source_key]))
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO etl_load_watermarks (source_key, table_name, file_checksum, max_date, loaded_at)
+        VALUES (%s, %s, %s, %s, NOW())
+        ON CONFLICT (source_key) DO UPDATE SET
+            table_name = EXCLUDED.table_name,
+            file_checksum = EXCLUDED.file_checksum,
+            max_date = GREATEST(etl_load_watermarks.max_date, EXCLUDED.max_date),
+            loaded_at = EXCLUDED.loaded_at
+    """, (source_key, table_name, checksum, max_date))
+    cursor.close()
+
+def source_unchanged(conn, source_key):
+    """True when the source file matches the checksum of its last load."""
+    checksum, _ = get_watermark(conn, source_key)
+    current = file_checksum(os.path.join(DATASET_PATH, CSV_FILES[source_key]))
+    return checksum == current
+
+def upsert_chunks(conn, chunks, table_name, columns, conflict_columns, natural_key=None):
+    """COPY chunks into a staging table and upsert them into ``table_name``.
+
+    Rows whose ``conflict_columns`` already exist are updated in place, the
+    rest are inserted. With a ``natural_key`` narrower than the conflict
+    columns (a partitioned table's key includes its partition column),
+    existing rows that match a staged row on the natural key but not on
+    the conflict columns are deleted first, so a row whose partition
+    column was corrected moves instead of being duplicated. Everything
+    happens in the caller's transaction, so readers keep seeing the
+    previous rows until it commits.
+    """
+    stage_name = f"stage_{table_name}"
+    cursor = conn.cursor()
+    cursor.execute(sql.SQL(
+        "CREATE TEMP TABLE {} ON COMMIT DROP AS SELECT {} FROM {} WITH NO DATA"
+    ).format(
+        sql.Identifier(stage_name),
+        sql.SQL(', ').join(sql.Identifier(col) for col in columns),
+        sql.Identifier(table_name)
+    ))
+
+    staged = stream_copy(conn, chunks, stage_name, columns)
+    if not staged:
+        cursor.close()
+        return 0
+
+    if natural_key:
+        cursor.execute(sql.SQL("""
+            DELETE FROM {table} t USING {stage} s
+            WHERE {matches} AND ({t_keys}) IS DISTINCT FROM ({s_keys})
+        """).format(
+            table=sql.Identifier(table_name),
+            stage=sql.Identifier(stage_name),
+            matches=sql.SQL(' AND ').join(
+                sql.SQL("t.{col} = s.{col}").format(col=sql.Identifier(col))
+                for col in natural_key
+            ),
+            t_keys=sql.SQL(', ').join(sql.SQL("t.{}").format(sql.Identifier(col)) for col in conflict_columns),
+            s_keys=sql.SQL(', ').join(sql.SQL("s.{}").format(sql.Identifier(col)) for col in conflict_columns)
+        ))
+        if cursor.rowcount:
+            print(f"   ✓ Moved {cursor.rowcount} {table_name} rows whose {', '.join(conflict_columns)} changed")
+
+    update_columns = [col for col in columns if col not in conflict_columns]
+    cursor.execute(sql.SQL("""
+        INSERT INTO {table} ({cols})
+        SELECT DISTINCT ON ({distinct}) {cols} FROM {stage}
+        ON CONFLICT ({keys}) DO UPDATE SET {updates}
+    """).format(
+        table=sql.Identifier(table_name),
+        stage=sql.Identifier(stage_name),
+        cols=sql.SQL(', ').join(sql.Identifier(col) for col in columns),
+        distinct=sql.SQL(', ').join(sql.Identifier(col) for col in natural_key or conflict_columns),
+        keys=sql.SQL(', ').join(sql.Identifier(col) for col in conflict_columns),
+        updates=sql.SQL(', ').join(
+            sql.SQL("{col} = EXCLUDED.{col}").format(col=sql.Identifier(col))
+            for col in update_columns
+        )
+    ))
+    affected = cursor.rowcount
+    cursor.close()
+    return affected
+
+def load_sales_year_incremental(conn, year):
+    """Upsert the rows of one yearly sales file newer than its watermark.
+
+    Rows on the watermark day itself are re-sent so late lines for a
+    partially loaded day are picked up; the upsert on the fact_sales
+    primary key (order_number, order_line_item, order_date) keeps that
+    idempotent. A re-delivered line with a corrected order_date replaces
+    the old row, wherever its partition, rather than adding a second one.
+    """
+    csv_key = f'fact_sales_{year}'
+    print("\n" + "-"*70)
+    print(f"Incremental load of fact_sales ({year})...")
+    
+    if source_unchanged(conn, csv_key):
+        print(f"   ✓ {CSV_FILES[csv_key]} unchanged since last load — skipped")
+        return 0
+    
+    _, watermark = get_watermark(conn, csv_key)
+    chunks = iter_sales_year_chunks(year, load_price_map(conn))
+    if watermark is not None:
+        chunks = (chunk[chunk['order_date'] >= watermark] for chunk in chunks)
+    
+    maxima = []
+    affected = upsert_chunks(
+        conn, with_partitions(conn, track_max(chunks, 'order_date', maxima), 'fact_sales'),
+        'fact_sales', SALES_TABLE_COLUMNS, PRIMARY_KEYS['fact_sales'],
+        natural_key=SALES_NATURAL_KEY
+    )
+    set_watermark(conn, csv_key, 'fact_sales', max(maxima, default=watermark))
     
-    if df is None:
-        raise Exception("Could not read CSV file with any common encoding")
+    conn.commit()
+    print(f"✓ Upserted {affected} records for {year} into fact_sales (watermark was {watermark})")
+    return affected
+
+def load_returns_incremental(conn):
+    """Reload fact_returns from its watermark day onwards.
+
+    fact_returns has no natural key to upsert on, so the rows dated on or
+    after the watermark are deleted and re-inserted in one transaction.
+    """
+    print("\n" + "-"*70)
+    print("Incremental load of fact_returns...")
+    
+    if source_unchanged(conn, 'fact_returns'):
+        print(f"   ✓ {CSV_FILES['fact_returns']} unchanged since last load — skipped")
+        return 0
     
-    df.columns = df.columns.str.lower().str.replace(' ', '_')
+    _, watermark = get_watermark(conn, 'fact_returns')
+    chunks = iter_returns_chunks(load_price_map(conn))
     
     cursor = conn.cursor()
+    if watermark is not None:
+        chunks = (chunk[chunk['return_date'] >= watermark] for chunk in chunks)
+        cursor.execute("DELETE FROM fact_returns WHERE return_date >= %s", (watermark,))
+    else:
+        cursor.execute("DELETE FROM fact_returns")
+    cursor.close()
     
-    for _, row in df.iterrows():
-        cursor.execute("""
-            INSERT INTO fact_returns (
-                return_date, territory_key, product_key, return_quantity
-            ) VALUES (%s, %s, %s, %s)
-        """, tuple(row))
+    maxima = []
+    chunks = with_partitions(conn, track_max(chunks, 'return_date', maxima), 'fact_returns')
+    rows = stream_copy(conn, chunks, 'fact_returns', RETURNS_TABLE_COLUMNS)
+    set_watermark(conn, 'fact_returns', 'fact_returns', max(maxima, default=watermark))
     
     conn.commit()
+    print(f"✓ Reloaded {rows} records into fact_returns (watermark was {watermark})")
+    return rows
+
+def natural_key_conflicts(conn, table_name, staging, partition, natural_key, limit=5):
+    """Natural keys in ``staging`` that are duplicated within it or already
+    exist in another partition of ``table_name`` than ``partition``."""
+    keys = ', '.join(natural_key)
+    join_on = ' AND '.join(f"t.{col} = s.{col}" for col in natural_key)
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT {keys}, 'duplicated in the new file' FROM {staging}
+        GROUP BY {keys} HAVING COUNT(*) > 1
+        UNION ALL
+        (SELECT {', '.join(f's.{col}' for col in natural_key)}, 'already in ' || t.tableoid::regclass::text
+         FROM {staging} s JOIN {table_name} t ON {join_on}
+         WHERE t.tableoid::regclass::text <> %s)
+        LIMIT {int(limit)};
+    """, (partition,))
+    conflicts = cursor.fetchall()
+    cursor.close()
+    return conflicts
+
+def swap_year_partition(conn, table_name, year, chunks, columns, natural_key=None):
+    """Replace one year of ``table_name`` with ``chunks`` by swapping partitions.
+
+    The rows are copied into a standalone table shaped like the parent
+    (with its indexes, and a CHECK on the year so ATTACH can skip its
+    validation scan) while the old partition keeps serving queries. The old
+    partition is then detached and dropped and the new table attached in
+    its place, all in the caller's transaction.
+
+    The primary key includes the partition column, so it cannot stop a line
+    whose date moved into this year from also staying in another year's
+    partition. With a ``natural_key`` the staged rows are checked against
+    the other partitions first, and the swap is refused (ValueError) on any
+    conflict rather than attaching duplicates.
+    """
+    partition = partition_name(table_name, year)
+    staging = f"{partition}_swap"
+    column = PARTITIONED_TABLES[table_name]
+    year = int(year)
+    
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {staging};")
+    cursor.execute(
+        f"CREATE TABLE {staging} "
+        f"(LIKE {table_name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING INDEXES);"
+    )
+    cursor.execute(
+        f"ALTER TABLE {staging} ADD CONSTRAINT {staging}_year "
+        f"CHECK ({column} >= '{year}-01-01' AND {column} < '{year + 1}-01-01');"
+    )
+    rows = stream_copy(conn, chunks, staging, columns)
+    
+    if natural_key:
+        conflicts = natural_key_conflicts(conn, table_name, staging, partition, natural_key)
+        if conflicts:
+            examples = "; ".join(f"{tuple(row[:-1])} {row[-1]}" for row in conflicts)
+            raise ValueError(
+                f"{partition}: {', '.join(natural_key)} must be unique across partitions; "
+                f"not swapping. Conflicts: {examples}"
+            )
+    
+    if table_exists(conn, partition):
+        cursor.execute(f"ALTER TABLE {table_name} DETACH PARTITION {partition};")
+        cursor.execute(f"DROP TABLE {partition};")
+    cursor.execute(f"ALTER TABLE {staging} RENAME TO {partition};")
+    cursor.execute(f"ALTER TABLE {table_name} ATTACH PARTITION {partition} {partition_bounds(year)};")
+    cursor.execute(f"ALTER TABLE {partition} DROP CONSTRAINT {staging}_year;")
+    cursor.execute(f"ANALYZE {partition};")
     cursor.close()
-    print(f"✓ Loaded {len(df)} records into fact_returns")
+    print(f"   ✓ Swapped in {partition}")
+    return rows
+
+def reload_sales_year(conn, year):
+    """Fully reload one yearly sales file as a partition swap."""
+    csv_key = f'fact_sales_{year}'
+    print("\n" + "-"*70)
+    print(f"Reloading fact_sales ({year}) by partition swap...")
+    
+    maxima = []
+    chunks = track_max(iter_sales_year_chunks(year, load_price_map(conn)), 'order_date', maxima)
+    rows = swap_year_partition(conn, 'fact_sales', year, chunks, SALES_TABLE_COLUMNS,
+                               natural_key=SALES_NATURAL_KEY)
+    set_watermark(conn, csv_key, 'fact_sales', max(maxima, default=None))
+    
+    conn.commit()
+    print(f"✓ Reloaded {rows} records for {year} into fact_sales")
+    return rows
+
+# ============================================================================
+# LOAD SCHEDULING
+# ============================================================================
+
+# Load tasks and the tasks they depend on. Mirrors the foreign keys declared
+# in create_tables: a table is only loaded once every table it references is.
+LOAD_TASKS = {
+    'dim_calendar': (load_calendar_data, []),
+    'dim_customers': (load_customers_data, []),
+    'dim_product_categories': (load_product_categories_data, []),
+    'dim_territories': (load_territories_data, []),
+    'dim_product_subcategories': (load_product_subcategories_data, ['dim_product_categories']),
+    'dim_products': (load_products_data, ['dim_product_subcategories']),
+    **{
+        f'fact_sales_{year}': (
+            partial(load_sales_year_data, year=year),
+            ['dim_products', 'dim_customers', 'dim_territories']
+        )
+        for year in SALES_YEARS
+    },
+    'fact_returns': (load_returns_data, ['dim_products', 'dim_territories']),
+}
+
+# Incremental mode only touches the facts; the dimensions are left as loaded.
+INCREMENTAL_TASKS = {
+    **{
+        f'fact_sales_{year}': (partial(load_sales_year_incremental, year=year), [])
+        for year in SALES_YEARS
+    },
+    'fact_returns': (load_returns_incremental, []),
+}
+
+
+def get_connection_pool(max_workers=LOAD_WORKERS):
+    """Create a thread-safe connection pool sized for the load workers."""
+    return ThreadedConnectionPool(1, max_workers, **DB_CONFIG)
+
+
+def run_load_task(conn_pool, name, load_fn):
+    """Run one load task on a connection borrowed from the pool."""
+    conn = conn_pool.getconn()
+    try:
+        load_fn(conn)
+    except Exception:
+        conn.rollback()
+        print(f"   ✗ Failed loading {name}")
+        raise
+    finally:
+        conn_pool.putconn(conn)
+    return name
+
+
+def run_load_plan(conn_pool, tasks=LOAD_TASKS, max_workers=LOAD_WORKERS):
+    """Load every task as soon as its dependencies are done.
+
+    Independent tables (and the yearly sales files) run concurrently, up to
+    ``max_workers`` at a time. The first failure is re-raised once the tasks
+    already in flight have finished.
+    """
+    pending = dict(tasks)
+    done = set()
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            ready = [
+                name for name, (_, deps) in pending.items()
+                if all(dep in done for dep in deps)
+            ]
+            for name in ready:
+                load_fn, _ = pending.pop(name)
+                future = executor.submit(run_load_task, conn_pool, name, load_fn)
+                running[future] = name
+
+            if not running:
+                raise Exception(f"Unresolvable load dependencies: {sorted(pending)}")
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                running.pop(future)
+                done.add(future.result())
+
+    return done
 
 # ============================================================================
 # INDEXES AND OPTIMIZATIONS
 # ============================================================================
 
+INDEX_COMMANDS = [
+    # Sales fact indexes
+    "CREATE INDEX idx_sales_order_date ON fact_sales(order_date);",
+    "CREATE INDEX idx_sales_customer ON fact_sales(customer_key);",
+    "CREATE INDEX idx_sales_product ON fact_sales(product_key);",
+    "CREATE INDEX idx_sales_territory ON fact_sales(territory_key);",
+    "CREATE INDEX idx_sales_order_number ON fact_sales(order_number);",
+    
+    # Returns fact indexes
+    "CREATE INDEX idx_returns_date ON fact_returns(return_date);",
+    "CREATE INDEX idx_returns_product ON fact_returns(product_key);",
+    "CREATE INDEX idx_returns_territory ON fact_returns(territory_key);",
+    
+    # Customer indexes
+    "CREATE INDEX idx_customer_income ON dim_customers(annual_income);",
+    "CREATE INDEX idx_customer_occupation ON dim_customers(occupation);",
+    
+    # Product indexes
+    "CREATE INDEX idx_product_subcategory ON dim_products(product_subcategory_key);",
+    "CREATE INDEX idx_product_price ON dim_products(product_price);",
+    
+    # Calendar indexes
+    "CREATE INDEX idx_calendar_year ON dim_calendar(year);",
+    "CREATE INDEX idx_calendar_month ON dim_calendar(month);",
+    "CREATE INDEX idx_calendar_quarter_key ON dim_calendar(quarter_key);",
+    "CREATE INDEX idx_calendar_month_key ON dim_calendar(month_key);"
+]
+
+def index_name(idx_cmd):
+    """Extract the index name from a CREATE INDEX statement."""
+    return idx_cmd.split("INDEX ")[1].split(" ON")[0]
+
 def create_indexes(conn):
     """Create indexes for query performance."""
     print("\n" + "="*70)
@@ -574,40 +1200,223 @@ def create_indexes(conn):
     
     cursor = conn.cursor()
     
-    index_commands = [
-        # Sales fact indexes
-        "CREATE INDEX idx_sales_order_date ON fact_sales(order_date);",
-        "CREATE INDEX idx_sales_customer ON fact_sales(customer_key);",
-        "CREATE INDEX idx_sales_product ON fact_sales(product_key);",
-        "CREATE INDEX idx_sales_territory ON fact_sales(territory_key);",
-        "CREATE INDEX idx_sales_order_number ON fact_sales(order_number);",
-        
-        # Returns fact indexes
-        "CREATE INDEX idx_returns_date ON fact_returns(return_date);",
-        "CREATE INDEX idx_returns_product ON fact_returns(product_key);",
-        "CREATE INDEX idx_returns_territory ON fact_returns(territory_key);",
-        
-        # Customer indexes
-        "CREATE INDEX idx_customer_income ON dim_customers(annual_income);",
-        "CREATE INDEX idx_customer_occupation ON dim_customers(occupation);",
-        
-        # Product indexes
-        "CREATE INDEX idx_product_subcategory ON dim_products(product_subcategory_key);",
-        "CREATE INDEX idx_product_price ON dim_products(product_price);",
-        
-        # Calendar indexes
-        "CREATE INDEX idx_calendar_year ON dim_calendar(year);",
-        "CREATE INDEX idx_calendar_month ON dim_calendar(month);"
+    for idx_cmd in INDEX_COMMANDS:
+        cursor.execute(idx_cmd)
+        print(f"   ✓ Created {index_name(idx_cmd)}")
+    
+    conn.commit()
+    cursor.close()
+    print("\n✓ All indexes created successfully!")
+
+def run_ddl(conn, command):
+    """Execute and commit a single DDL statement."""
+    cursor = conn.cursor()
+    cursor.execute(command)
+    conn.commit()
+    cursor.close()
+
+def run_parallel_ddl(conn_pool, commands, max_workers=LOAD_WORKERS):
+    """Run independent DDL statements concurrently on pooled connections."""
+    tasks = {
+        command: (partial(run_ddl, command=command), [])
+        for command in commands
+    }
+    run_load_plan(conn_pool, tasks, max_workers)
+
+def finalize_fast_load(conn_pool):
+    """Turn the bare, unlogged fast-load tables into the normal schema.
+
+    Tables are switched back to LOGGED, then primary keys, foreign keys
+    (one statement per table) and finally the regular indexes are built
+    against the already loaded data. Only tables holding rows can be
+    LOGGED, so the partitioned facts switch partition by partition.
+
+    Every phase but the foreign keys runs its statements in parallel.
+    ADD FOREIGN KEY locks both the table and the one it references, and
+    fact_sales, fact_returns and dim_products share referenced tables, so
+    those statements run one at a time to avoid lock-order deadlocks.
+    """
+    print("\n" + "="*70)
+    print("FINALIZING FAST LOAD")
+    print("="*70)
+    
+    conn = conn_pool.getconn()
+    try:
+        storage_tables = [
+            table_name for table_name in TABLE_DEFINITIONS
+            if table_name not in PARTITIONED_TABLES
+        ]
+        for table_name in PARTITIONED_TABLES:
+            storage_tables.extend(list_partitions(conn, table_name))
+    finally:
+        conn_pool.putconn(conn)
+    
+    # (label, statements, concurrent workers)
+    phases = [
+        ("Switching tables to LOGGED",
+         [f"ALTER TABLE {table_name} SET LOGGED;" for table_name in storage_tables], LOAD_WORKERS),
+        ("Adding primary keys",
+         [primary_key_command(table_name) for table_name in PRIMARY_KEYS], LOAD_WORKERS),
+        ("Adding foreign keys",
+         [foreign_key_command(table_name) for table_name in FOREIGN_KEYS], 1),
+        ("Creating indexes", INDEX_COMMANDS, LOAD_WORKERS),
     ]
     
-    for idx_cmd in index_commands:
+    for label, commands, max_workers in phases:
+        start = time.perf_counter()
+        run_parallel_ddl(conn_pool, commands, max_workers)
+        print(f"   ✓ {label} ({len(commands)} statements, {time.perf_counter() - start:.2f}s)")
+    
+    print("\n✓ Fast load finalized!")
+
+def analyze_tables(conn):
+    """Refresh planner statistics for every loaded table."""
+    print("\nAnalyzing tables...")
+    cursor = conn.cursor()
+    for table_name in TABLE_DEFINITIONS:
+        cursor.execute(f"ANALYZE {table_name};")
+    conn.commit()
+    cursor.close()
+    print("   ✓ Planner statistics updated")
+
+# ============================================================================
+# AGGREGATE LAYER
+# ============================================================================
+
+# Pre-joined rollups the SQL agent and KPI templates read instead of the
+# facts. Each level is built from the one before it, so the order matters.
+# The queries stay portable (benchmarks/build_sqlite_db.py reuses them).
+AGGREGATE_MEASURES = """
+    SUM(order_quantity) AS order_quantity,
+    SUM(revenue) AS revenue,
+    SUM(cost) AS cost,
+    SUM(profit) AS profit,
+    SUM(return_quantity) AS return_quantity"""
+
+AGGREGATE_VIEWS = {
+    # date x product x territory; sales and returns side by side
+    'agg_sales_daily': """
+        WITH activity AS (
+            SELECT order_date AS date, product_key, territory_key,
+                   order_quantity, revenue, profit, 0 AS return_quantity
+            FROM fact_sales
+            UNION ALL
+            SELECT return_date, product_key, territory_key,
+                   0, 0, 0, return_quantity
+            FROM fact_returns
+        )
+        SELECT
+            a.date, c.year, c.quarter, c.quarter_key, c.month_key,
+            a.product_key, p.product_subcategory_key, sc.product_category_key,
+            a.territory_key,
+            SUM(a.order_quantity) AS order_quantity,
+            SUM(a.revenue) AS revenue,
+            SUM(a.revenue - a.profit) AS cost,
+            SUM(a.profit) AS profit,
+            SUM(a.return_quantity) AS return_quantity
+        FROM activity a
+        JOIN dim_products p ON a.product_key = p.product_key
+        LEFT JOIN dim_product_subcategories sc ON p.product_subcategory_key = sc.product_subcategory_key
+        LEFT JOIN dim_calendar c ON a.date = c.date
+        GROUP BY a.date, c.year, c.quarter, c.quarter_key, c.month_key,
+                 a.product_key, p.product_subcategory_key, sc.product_category_key,
+                 a.territory_key
+    """,
+    # month x product x territory
+    'agg_sales_monthly': f"""
+        SELECT
+            m.month_start, d.year, d.quarter, d.quarter_key, d.month_key,
+            d.product_key, d.product_subcategory_key, d.product_category_key,
+            d.territory_key,{AGGREGATE_MEASURES}
+        FROM agg_sales_daily d
+        LEFT JOIN (
+            SELECT month_key, MIN(date) AS month_start FROM dim_calendar GROUP BY month_key
+        ) m ON d.month_key = m.month_key
+        GROUP BY m.month_start, d.year, d.quarter, d.quarter_key, d.month_key,
+                 d.product_key, d.product_subcategory_key, d.product_category_key,
+                 d.territory_key
+    """,
+    # month x subcategory (and its category) x territory: a few thousand rows
+    'agg_subcategory_monthly': f"""
+        SELECT
+            month_start, year, quarter, quarter_key, month_key,
+            product_subcategory_key, product_category_key,
+            territory_key,{AGGREGATE_MEASURES}
+        FROM agg_sales_monthly
+        GROUP BY month_start, year, quarter, quarter_key, month_key,
+                 product_subcategory_key, product_category_key, territory_key
+    """,
+}
+
+# One row per grain; REFRESH ... CONCURRENTLY needs a unique index
+AGGREGATE_INDEXES = [
+    "CREATE UNIQUE INDEX idx_agg_sales_daily_grain ON agg_sales_daily(date, product_key, territory_key);",
+    "CREATE INDEX idx_agg_sales_daily_month ON agg_sales_daily(month_key);",
+    "CREATE UNIQUE INDEX idx_agg_sales_monthly_grain ON agg_sales_monthly(month_key, product_key, territory_key);",
+    "CREATE UNIQUE INDEX idx_agg_subcategory_monthly_grain "
+    "ON agg_subcategory_monthly(month_key, product_subcategory_key, territory_key);",
+]
+
+def existing_aggregates(conn):
+    """Names of the aggregate materialized views already in the database."""
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT matviewname FROM pg_matviews WHERE matviewname = ANY(%s);",
+        (list(AGGREGATE_VIEWS),)
+    )
+    names = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    return names
+
+def create_aggregates(conn):
+    """(Re)build the aggregate materialized views and their indexes."""
+    print("\n" + "="*70)
+    print("BUILDING AGGREGATES")
+    print("="*70)
+    
+    cursor = conn.cursor()
+    
+    # Dependents first; a full reload has already dropped them with the facts
+    for view_name in reversed(list(AGGREGATE_VIEWS)):
+        cursor.execute(f"DROP MATERIALIZED VIEW IF EXISTS {view_name} CASCADE;")
+    
+    for view_name, query in AGGREGATE_VIEWS.items():
+        start = time.perf_counter()
+        cursor.execute(f"CREATE MATERIALIZED VIEW {view_name} AS {query};")
+        cursor.execute(f"SELECT COUNT(*) FROM {view_name};")
+        rows = cursor.fetchone()[0]
+        print(f"   ✓ Created {view_name}: {rows:,} rows ({time.perf_counter() - start:.2f}s)")
+    
+    for idx_cmd in AGGREGATE_INDEXES:
         cursor.execute(idx_cmd)
-        index_name = idx_cmd.split("INDEX ")[1].split(" ON")[0]
-        print(f"   ✓ Created {index_name}")
+        print(f"   ✓ Created {index_name(idx_cmd)}")
+    
+    for view_name in AGGREGATE_VIEWS:
+        cursor.execute(f"ANALYZE {view_name};")
     
     conn.commit()
     cursor.close()
-    print("\n✓ All indexes created successfully!")
+    print("\n✓ Aggregates built!")
+
+def refresh_aggregates(conn):
+    """Refresh the aggregates after an incremental load.
+
+    REFRESH ... CONCURRENTLY keeps the views readable while they are
+    rebuilt; views that do not exist yet are created instead.
+    """
+    if existing_aggregates(conn) != set(AGGREGATE_VIEWS):
+        create_aggregates(conn)
+        return
+    
+    print("\nRefreshing aggregates...")
+    cursor = conn.cursor()
+    for view_name in AGGREGATE_VIEWS:
+        start = time.perf_counter()
+        cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view_name};")
+        cursor.execute(f"ANALYZE {view_name};")
+        conn.commit()
+        print(f"   ✓ Refreshed {view_name} ({time.perf_counter() - start:.2f}s)")
+    cursor.close()
 
 # ============================================================================
 # DATA VALIDATION
@@ -630,6 +1439,7 @@ def validate_data(conn):
         ("dim_territories", "SELECT COUNT(*) FROM dim_territories"),
         ("fact_sales", "SELECT COUNT(*) FROM fact_sales"),
         ("fact_returns", "SELECT COUNT(*) FROM fact_returns"),
+        *[(view_name, f"SELECT COUNT(*) FROM {view_name}") for view_name in AGGREGATE_VIEWS],
     ]
     
     print("\nRecord Counts:")
@@ -640,6 +1450,14 @@ def validate_data(conn):
         count = cursor.fetchone()[0]
         print(f"   {table_name:<30} {count:>10,} records")
     
+    print("\nFact Partitions:")
+    print("-" * 50)
+    
+    for table_name in PARTITIONED_TABLES:
+        for partition in list_partitions(conn, table_name):
+            cursor.execute(f"SELECT COUNT(*) FROM {partition}")
+            print(f"   {partition:<30} {cursor.fetchone()[0]:>10,} records")
+    
     # Additional validation
     print("\n\nData Quality Checks:")
     print("-" * 50)
@@ -661,20 +1479,40 @@ def validate_data(conn):
     orphaned_customers = cursor.fetchone()[0]
     print(f"   Orphaned sales (missing customers): {orphaned_customers}")
     
+    # The primary key includes order_date, so check the line key across partitions
+    cursor.execute("""
+        SELECT COUNT(*) FROM (
+            SELECT 1 FROM fact_sales
+            GROUP BY order_number, order_line_item
+            HAVING COUNT(*) > 1
+        ) duplicated
+    """)
+    duplicate_lines = cursor.fetchone()[0]
+    print(f"   Duplicate order lines (across partitions): {duplicate_lines}")
+    
+    cursor.execute("SELECT COUNT(*) FROM fact_sales WHERE revenue IS NULL")
+    unpriced_sales = cursor.fetchone()[0]
+    print(f"   Unpriced sales (no revenue value): {unpriced_sales}")
+    
     # Calculate revenue
     cursor.execute("""
         SELECT 
-            SUM(s.order_quantity * p.product_price) as total_revenue,
+            SUM(s.revenue) as total_revenue,
             COUNT(DISTINCT s.order_number) as total_orders,
             COUNT(DISTINCT s.customer_key) as unique_customers
         FROM fact_sales s
-        JOIN dim_products p ON s.product_key = p.product_key
     """)
     revenue_data = cursor.fetchone()
     print(f"\n   Total Revenue: ${revenue_data[0]:,.2f}" if revenue_data[0] else "   Total Revenue: $0.00")
     print(f"   Total Orders: {revenue_data[1]:,}")
     print(f"   Unique Customers: {revenue_data[2]:,}")
     
+    # The coarsest rollup must add up to the facts
+    cursor.execute("SELECT SUM(revenue) FROM agg_subcategory_monthly")
+    aggregate_revenue = cursor.fetchone()[0] or 0
+    status = "✓" if abs((revenue_data[0] or 0) - aggregate_revenue) < 0.01 else "✗"
+    print(f"   {status} Aggregate revenue: ${aggregate_revenue:,.2f}")
+    
     cursor.close()
     print("\n✓ Validation complete!")
 
@@ -682,13 +1520,57 @@ def validate_data(conn):
 # MAIN EXECUTION
 # ============================================================================
 
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Load the AdventureWorks CSVs into PostgreSQL.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Upsert only new fact rows past each file's watermark instead of rebuilding every table."
+    )
+    mode.add_argument(
+        "--fast-load",
+        action="store_true",
+        help="Rebuild into unlogged tables without keys, then add keys and indexes in parallel."
+    )
+    mode.add_argument(
+        "--reload-year",
+        choices=SALES_YEARS,
+        help="Reload one yearly sales file by swapping its fact_sales partition."
+    )
+    parser.add_argument(
+        "--calendar-start",
+        help="Generate dim_calendar from this date (YYYY-MM-DD) instead of reading the lookup CSV."
+    )
+    parser.add_argument(
+        "--calendar-end",
+        help="Last date (YYYY-MM-DD) of the generated dim_calendar."
+    )
+    args = parser.parse_args()
+    if bool(args.calendar_start) != bool(args.calendar_end):
+        parser.error("--calendar-start and --calendar-end must be given together")
+    return args
+
 def main():
     """Main execution function."""
+    args = parse_args()
+    configure_logging()
+    
     print("\n" + "="*70)
     print("ADVENTUREWORKS DATA LOADER")
     print("="*70)
     print(f"Database: {DB_CONFIG['database']}")
     print(f"Dataset Path: {DATASET_PATH}")
+    if args.incremental:
+        mode = 'incremental'
+    elif args.fast_load:
+        mode = 'fast full reload'
+    elif args.reload_year:
+        mode = f'partition swap of fact_sales {args.reload_year}'
+    else:
+        mode = 'full reload'
+    print(f"Mode: {mode}")
     print(f"Start Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("="*70)
     
@@ -720,25 +1602,69 @@ def main():
         # Connect to database
         conn = get_connection()
         
-        # Create tables
-        create_tables(conn)
+        # Incremental and partition-swap runs leave the schema in place
+        partial_load = args.incremental or args.reload_year
+        
+        if args.incremental:
+            # Tables, indexes and dimensions stay in place; only the fact
+            # deltas are upserted, so the database stays online throughout
+            create_watermark_table(conn)
+            require_partitioned_facts(conn)
+            conn.commit()
+            tasks = INCREMENTAL_TASKS
+        elif args.reload_year:
+            create_watermark_table(conn)
+            require_partitioned_facts(conn)
+            conn.commit()
+            tasks = {
+                f'fact_sales_{args.reload_year}': (partial(reload_sales_year, year=args.reload_year), [])
+            }
+        else:
+            # Create tables
+            create_tables(conn, fast_load=args.fast_load)
+            tasks = dict(LOAD_TASKS)
+            if args.calendar_start:
+                tasks['dim_calendar'] = (
+                    partial(load_calendar_data,
+                            start_date=args.calendar_start,
+                            end_date=args.calendar_end),
+                    []
+                )
         
-        # Load data in correct order (dimensions first, then facts)
+        # Load data in dependency order (dimensions first, then facts),
+        # running independent tables in parallel
         print("\n" + "="*70)
-        print("LOADING DATA")
+        print(f"LOADING DATA ({LOAD_WORKERS} workers)")
         print("="*70)
         
-        load_calendar_data(conn)
-        load_customers_data(conn)
-        load_product_categories_data(conn)
-        load_product_subcategories_data(conn)
-        load_products_data(conn)
-        load_territories_data(conn)
-        load_sales_data(conn)
-        load_returns_data(conn)
+        conn_pool = get_connection_pool()
+        try:
+            run_load_plan(conn_pool, tasks)
+            
+            if args.fast_load:
+                # Keys and indexes, built in parallel over the loaded data
+                finalize_fast_load(conn_pool)
+        finally:
+            conn_pool.closeall()
+        
+        if not partial_load and not args.fast_load:
+            # Create indexes
+            create_indexes(conn)
+        
+        # Give the planner statistics before the first agent query
+        analyze_tables(conn)
+        
+        # Rollups over the new (analyzed) data, for the agents' aggregate queries
+        if partial_load:
+            refresh_aggregates(conn)
+        else:
+            create_aggregates(conn)
         
-        # Create indexes
-        create_indexes(conn)
+        # Cached agent query results over the reloaded tables are now stale
+        invalidate_tables(
+            (['fact_sales', 'fact_returns'] if partial_load else list(TABLE_DEFINITIONS))
+            + list(AGGREGATE_VIEWS)
+        )
         
         # Validate data
         validate_data(conn)
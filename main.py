@@ -1,14 +1,20 @@
-import json
-from graph.agent_graph import agents_graph
+from utils.tracing import configure_logging
+
+# Before the imports below, so their start-up messages are logged
+configure_logging()
+
+from graph.agent_graph import invoke_graph, remember_answer
 from save_results import append_result_to_csv
 from tools.data_extractor_tool import run_sql
 from tools.plots_render_tool import render_plotly
-from tools.dashboard_builder_tool import build_dashboard
+from tools.dashboard_builder_tool import build_dashboard_from_paths
+from graph.dashboard_executor import run_dashboard_questions
 from utils.clean_utils import clean_json
+from utils.tracing import span
 
 from agents.sql_feedback_agent import run_sql_feedback_agent
 from agents.visualization_agent import run_visualization_agent
-from agents.dashboard_agent import run_dashboard_agent
+from agents.dashboard_agent import run_dashboard_agent, parse_dashboard_questions
 
 if __name__ == "__main__":
     print("Hello from main.py")
@@ -21,106 +27,98 @@ if __name__ == "__main__":
     ]
 
     for question in questions:
+        # One trace per question: graph nodes, SQL and render are its spans
+        with span("request", question=question):
+            print("\n\nQuestion:", question)
+            result = invoke_graph(question)
 
-        print("\n\nQuestion:", question)
-        result = agents_graph.invoke({"question": question})
-
-        print("\nFinal Result:")
-        print(result)
-
-        validator = result["validator"]
-
-        if validator.get("dashboard", False):
-            print("\n📊 DASHBOARD MODE TRIGGERED")
+            print("\nFinal Result:")
+            print(result)
 
-            raw_dashboard = run_dashboard_agent(question)
-            dashboard_questions = json.loads(clean_json(raw_dashboard))
-            print(dashboard_questions)
-            print(dashboard_questions['questions'])
-            dashboard_questions = dashboard_questions['questions']
-            print("\nGenerated Dashboard Questions:")
-            for q in dashboard_questions:
-                print(" -", q)
+            validator = result["validator"]
 
-            # Run each dashboard question through full pipeline
-            paths = []
-            for dq in dashboard_questions:
+            if validator.get("dashboard", False):
+                print("\n📊 DASHBOARD MODE TRIGGERED")
 
-                print("\n➡ Dashboard Question:", dq)
-
-                sub_result = agents_graph.invoke({"question": dq})
-
-                sql = sub_result["sql_query"]
-                sql_result = run_sql(dq, sql)
-
-                if not sql_result["success"]:
-                    print("Skipping failed dashboard SQL…")
+                # The graph's dashboard node already asked for the questions
+                raw_dashboard = result.get("dashboard_questions") or run_dashboard_agent(question)
+                try:
+                    dashboard_questions = parse_dashboard_questions(raw_dashboard)
+                except ValueError as e:
+                    print("❌ The dashboard plan could not be read:", e)
                     continue
+                print("\nGenerated Dashboard Questions:")
+                for q in dashboard_questions:
+                    print(" -", q["question"])
 
-                append_result_to_csv(dq, sql, sql_result["data"], dashboard_mode=True)
+                # Run the dashboard questions through the full pipeline in
+                # parallel; results come back in question order
+                paths = []
+                for outcome in run_dashboard_questions(dashboard_questions):
+                    dq = outcome["question"]
 
-                if sub_result["validator"].get("visualization", True):
+                    print("\n➡ Dashboard Question:", dq)
 
-                    visual_spec = run_visualization_agent(
-                        sub_result["validator"]["analysis_goal"],
-                        sql_result["data"].head(2),
-                        sql_result["data"].columns.tolist()
-                    )
+                    if outcome["error"]:
+                        print("Skipping failed dashboard SQL…", outcome["error"])
+                        continue
 
-                    visual_json = clean_json(visual_spec)
+                    append_result_to_csv(dq, outcome["sql"], outcome["sql_result"]["data"], dashboard_mode=True)
 
-                    path, fig = render_plotly(sql_result["data"], visual_json)
+                    if outcome["path"]:
+                        print("Saved dashboard chart:", outcome["path"])
+                        paths.append(outcome["path"])
 
-                    print("Saved dashboard chart:", path)
-                    paths.append(path)
-                    build_dashboard(paths)
+                build_dashboard_from_paths(paths)
 
+                print("\n✅ Dashboard complete")
 
-            print("\n✅ Dashboard complete")
+                print("--------------------------------------------------")
+                continue
 
-            print("--------------------------------------------------")
-            continue
+            sql = result["sql_query"]
+            print("\nExecuting SQL query...")
+            sql_result = run_sql(question, sql)
 
-        sql = result["sql_query"]
-        print("\nExecuting SQL query...")
-        sql_result = run_sql(question, sql)
+            # Feedback loop on failure
+            if not sql_result["success"]:
+                print("Running feedback loop...")
 
-        # Feedback loop on failure
-        if not sql_result["success"]:
-            print("Running feedback loop...")
+                fixed_sql = run_sql_feedback_agent(
+                    question=sql_result["question"],
+                    sql=sql_result["sql"],
+                    error=sql_result["error"] or sql_result["reason"]
+                )
 
-            fixed_sql = run_sql_feedback_agent(
-                question=sql_result["question"],
-                sql=sql_result["sql"],
-                error=sql_result["error"] or sql_result["reason"]
-            )
+                sql_result = run_sql(question, fixed_sql)
 
-            sql_result = run_sql(question, fixed_sql)
+                if not sql_result["success"]:
+                    print("\n SQL failed twice — skipping visualization.")
+                    append_result_to_csv(question, sql, None)
+                    print("--------------------------------------------------")
+                    continue
 
-            if not sql_result["success"]:
-                print("\n SQL failed twice — skipping visualization.")
-                append_result_to_csv(question, sql, None)
-                print("--------------------------------------------------")
-                continue
+            remember_answer(question, validator, sql_result["sql"])
 
-        # Save results
-        append_result_to_csv(question, sql, sql_result["data"])
+            # Save results
+            append_result_to_csv(question, sql, sql_result["data"])
 
-        visual_flag = validator.get("visualization", False)
+            visual_flag = validator.get("visualization", False)
 
-        if visual_flag and sql_result["success"]:
-            visual_agent = run_visualization_agent(
-                validator["analysis_goal"],
-                sql_result["data"].head(2),
-                sql_result["data"].columns.tolist()
-            )
+            if visual_flag and sql_result["success"]:
+                # KPI templates come with their chart spec
+                visual_agent = result.get("visual_spec") or run_visualization_agent(
+                    validator["analysis_goal"],
+                    sql_result["data"].head(2),
+                    sql_result["data"].columns.tolist()
+                )
 
-            visual_json = clean_json(visual_agent)
+                visual_json = clean_json(visual_agent)
 
-            path, fig = render_plotly(sql_result["data"], visual_json)
+                path, fig = render_plotly(sql_result["data"], visual_json)
 
-            print("Rendered plot:", path)
-        else:
-            print("Visualization skipped.")
+                print("Rendered plot:", path)
+            else:
+                print("Visualization skipped.")
 
-        print("--------------------------------------------------")
+            print("--------------------------------------------------")
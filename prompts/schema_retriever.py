@@ -0,0 +1,277 @@
+import logging
+import os
+import re
+from functools import lru_cache
+
+from prompts.schema_prompt import (
+    SQL_SCHEMA_PROMPT,
+    SQL_PROMPT_HEADER,
+    LAST_QUARTER_RULE,
+    AGGREGATE_LAST_QUARTER_RULE,
+    HARD_RULES,
+    USE_AGGREGATES,
+)
+from sample_tests.database_schema import (
+    DATABASE_SCHEMA,
+    get_table_info,
+    get_all_table_names,
+    get_aggregate_tables,
+)
+
+logger = logging.getLogger(__name__)
+
+# Send only the schema pieces an analysis goal needs instead of the full prompt
+SCHEMA_PRUNING = os.getenv("SCHEMA_PRUNING", "true").lower() == "true"
+
+# Aliases used by the join patterns and metric definitions
+TABLE_ALIASES = {
+    "fact_sales": "s",
+    "fact_returns": "r",
+    "dim_products": "p",
+    "dim_product_subcategories": "sc",
+    "dim_product_categories": "pc",
+    "dim_customers": "cu",
+    "dim_territories": "t",
+    "dim_calendar": "c",
+    "agg_sales_daily": "ad",
+    "agg_sales_monthly": "am",
+    "agg_subcategory_monthly": "asm",
+}
+
+# Business words that point at a table even when no column name is used.
+# Keywords match whole words (a trailing "s"/"es" plural is allowed), so
+# "age" does not match "average" nor "day" match "today".
+TABLE_KEYWORDS = {
+    "fact_sales": ["sale", "sold", "selling", "seller", "order", "revenue", "profit", "margin",
+                   "quantity", "quantities", "unit"],
+    "fact_returns": ["return", "returned", "refund", "refunded"],
+    "dim_products": ["product", "item", "price", "sku", "model", "color", "colour", "size"],
+    "dim_product_subcategories": ["subcategory", "subcategories", "mountain", "road", "touring", "helmet", "jersey"],
+    "dim_product_categories": ["category", "categories", "bike", "component", "clothing",
+                               "accessory", "accessories"],
+    "dim_customers": ["customer", "client", "buyer", "income", "gender", "age", "occupation", "education",
+                      "marital", "children", "homeowner", "home owner", "demographic", "segment"],
+    "dim_territories": ["territory", "territories", "region", "country", "countries", "continent",
+                        "geography", "geographic", "geographical", "market", "location"],
+    "dim_calendar": ["year", "yearly", "annual", "quarter", "quarterly", "month", "monthly", "week", "weekly",
+                     "day", "daily", "date", "trend", "season", "seasonal", "period", "time",
+                     "growth", "over time", "fiscal", "ytd", "last", "previous"],
+}
+
+# Metric definitions, keyed by the metric names in DATABASE_SCHEMA
+METRIC_KEYWORDS = {
+    "revenue": ["revenue", "sales", "selling", "turnover", "income from"],
+    "cost": ["cost"],
+    "profit": ["profit"],
+    "profit_margin": ["margin"],
+    "return_rate": ["return rate", "returns rate", "return %", "return percentage"],
+    "customer_lifetime_value": ["lifetime", "clv", "ltv"],
+    "average_order_value": ["average order", "aov", "order value", "basket"],
+}
+
+# Ratios are defined in terms of other metrics
+METRIC_DEPENDENCIES = {
+    "profit_margin": ["revenue", "profit"],
+    "customer_lifetime_value": ["revenue"],
+    "average_order_value": ["revenue"],
+}
+
+# Goals the rollups cannot answer (no customer or order columns there)
+FACT_ONLY_KEYWORDS = ["order", "basket", "aov", "line item", "stock", "ship"]
+FACT_ONLY_METRICS = {"customer_lifetime_value", "average_order_value"}
+DAILY_PATTERN = re.compile(r"\b(day|days|daily|week|weeks|weekly|weekday|weekend|date|dates)\b")
+# Product-level words; "product category" is still a subcategory rollup
+PRODUCT_LEVEL_PATTERN = re.compile(
+    r"\b(products?|items?|skus?|models?|colou?rs?|sizes?|prices?)\b(?!\s*(sub)?categor)"
+)
+
+LAST_QUARTER_PATTERN = re.compile(r"\b(last|previous|prior)\s+quarter\b")
+YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+VALUE_HINT = re.compile(r"\(([^)]*)\)")
+
+
+@lru_cache(maxsize=None)
+def _keyword_pattern(keywords):
+    alternatives = "|".join(re.escape(keyword) for keyword in keywords)
+    return re.compile(rf"(?<!\w)(?:{alternatives})(?:s|es)?(?!\w)")
+
+
+def _mentions(text, keywords):
+    """True when ``text`` contains any of ``keywords`` as a whole word or phrase."""
+    return _keyword_pattern(tuple(keywords)).search(text) is not None
+
+
+def _column_names(table):
+    return get_table_info(table)["columns"].keys()
+
+
+def select_tables(goal: str):
+    """Tables an analysis goal touches, plus the ones needed to join them."""
+    text = goal.lower()
+    tables = set()
+
+    for table in get_all_table_names():
+        # Rollups are chosen by select_aggregate, not by column names
+        if table in get_aggregate_tables():
+            continue
+        if table in text or _mentions(text, TABLE_KEYWORDS.get(table, [])):
+            tables.add(table)
+        elif any(_mentions(text, (column.replace("_", " "), column))
+                 for column in _column_names(table) if not column.endswith("_key")):
+            tables.add(table)
+
+    if YEAR_PATTERN.search(text):
+        tables.add("dim_calendar")
+
+    for metric in select_metrics(goal):
+        tables.update(DATABASE_SCHEMA["calculated_metrics"][metric]["tables_required"])
+
+    aggregate = select_aggregate(goal, tables)
+    if aggregate:
+        # The rollup replaces the facts and carries the hierarchy keys
+        tables -= {"fact_sales", "fact_returns"}
+        if aggregate == "agg_subcategory_monthly" or not PRODUCT_LEVEL_PATTERN.search(text):
+            tables.discard("dim_products")
+        tables.add(aggregate)
+        return [table for table in get_all_table_names() if table in tables]
+
+    # Every dimension is reached through a fact table
+    if not tables & {"fact_sales", "fact_returns"}:
+        tables.add("fact_sales")
+
+    # Walk the product hierarchy back to the facts
+    if "dim_product_categories" in tables:
+        tables.add("dim_product_subcategories")
+    if "dim_product_subcategories" in tables:
+        tables.add("dim_products")
+
+    return [table for table in get_all_table_names() if table in tables]
+
+
+def select_aggregate(goal: str, tables):
+    """Smallest agg_* rollup that can answer ``goal``, or None for the facts."""
+    if not USE_AGGREGATES:
+        return None
+
+    text = goal.lower()
+    if not tables & {"fact_sales", "fact_returns"}:
+        return None
+    if "dim_customers" in tables or _mentions(text, FACT_ONLY_KEYWORDS):
+        return None
+    if FACT_ONLY_METRICS & set(select_metrics(goal)):
+        return None
+
+    if DAILY_PATTERN.search(text):
+        return "agg_sales_daily"
+    if PRODUCT_LEVEL_PATTERN.search(text):
+        return "agg_sales_monthly"
+    return "agg_subcategory_monthly"
+
+
+def select_metrics(goal: str):
+    text = goal.lower()
+    metrics = {metric for metric, keywords in METRIC_KEYWORDS.items() if _mentions(text, keywords)}
+    for metric in list(metrics):
+        metrics.update(METRIC_DEPENDENCIES.get(metric, []))
+    return [metric for metric in METRIC_KEYWORDS if metric in metrics]
+
+
+def _with_aliases(expression):
+    for table, alias in TABLE_ALIASES.items():
+        expression = expression.replace(f"{table}.", f"{alias}.")
+    return expression
+
+
+def render_tables(tables, compact=False):
+    lines = ["", "# DATABASE CONTEXT (AdventureWorks – Star Schema)", ""]
+    for table in tables:
+        columns = []
+        for column, info in get_table_info(table)["columns"].items():
+            # Surrogate ids are never needed in analytics queries
+            if info["type"] == "SERIAL":
+                continue
+            # Keep value hints such as "(M/F)" or "(Bikes, Components, ...)"
+            hint = VALUE_HINT.search(info["description"])
+            columns.append(f"{column} ({hint.group(1)})" if hint else column)
+
+        if compact:
+            lines.append(f"{table}: {', '.join(columns)}")
+            continue
+
+        grain = get_table_info(table).get("grain")
+        if grain:
+            lines.append(f"{table} {TABLE_ALIASES[table]}   (one row per {' x '.join(grain)}; "
+                         "prefer it over fact_sales)")
+        else:
+            lines.append(f"{table} {TABLE_ALIASES[table]}")
+        lines.extend(f"- {column}" for column in columns)
+        lines.append("")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def render_joins(tables):
+    lines = ["", "# JOIN PATTERNS", ""]
+    for relationship in DATABASE_SCHEMA["relationships"].values():
+        left_table, left_column = relationship["from"].split(".")
+        right_table, right_column = relationship["to"].split(".")
+        if left_table in tables and right_table in tables:
+            left, right = TABLE_ALIASES[left_table], TABLE_ALIASES[right_table]
+            lines.append(f"JOIN {right_table} {right} ON {left}.{left_column} = {right}.{right_column}")
+    lines.append("")
+    return "\n".join(lines) if len(lines) > 4 else ""
+
+
+def render_metrics(metrics, aggregate=None):
+    if not metrics:
+        return ""
+
+    lines = ["", "# METRIC DEFINITIONS (MANDATORY)", ""]
+    for metric in metrics:
+        definition = DATABASE_SCHEMA["calculated_metrics"][metric]
+        if aggregate and "aggregate_formula" in definition:
+            formula = definition["aggregate_formula"].replace("agg.", f"{TABLE_ALIASES[aggregate]}.")
+        else:
+            formula = _with_aliases(definition["formula"])
+        lines.append(f"{metric} = {formula}")
+
+    if aggregate:
+        lines.extend(["", f"Revenue, cost and profit are precomputed on {aggregate}.", ""])
+    else:
+        lines.extend(["", "Revenue and profit are stored on fact_sales; join dim_products only for product attributes.", ""])
+    return "\n".join(lines)
+
+
+def build_schema_prompt(goal: str, all_tables: bool = False) -> str:
+    """Assemble the SQL agent prompt from only the pieces ``goal`` needs.
+
+    Tables, join patterns and metric definitions come from DATABASE_SCHEMA;
+    the last-quarter example is only included when the goal asks for it.
+    With ``all_tables`` every table is listed on one line each (dashboard
+    planning), and the rest is still pruned. Returns the full prompt when SCHEMA_PRUNING is off.
+    """
+    if not SCHEMA_PRUNING or not goal:
+        return SQL_SCHEMA_PROMPT
+
+    tables = get_all_table_names() if all_tables else select_tables(goal)
+    metrics = select_metrics(goal)
+    aggregate = None if all_tables else next(
+        (table for table in tables if table in get_aggregate_tables()), None
+    )
+
+    parts = [
+        SQL_PROMPT_HEADER,
+        render_tables(tables, compact=all_tables),
+        render_joins(tables),
+        render_metrics(metrics, aggregate),
+    ]
+    if LAST_QUARTER_PATTERN.search(goal.lower()):
+        parts.append(AGGREGATE_LAST_QUARTER_RULE if aggregate else LAST_QUARTER_RULE)
+    parts.append(HARD_RULES)
+
+    prompt = "".join(parts)
+    logger.debug(
+        "Schema prompt: %d chars (full: %d), tables: %s",
+        len(prompt), len(SQL_SCHEMA_PROMPT), ", ".join(tables)
+    )
+    return prompt
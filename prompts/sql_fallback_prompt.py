@@ -5,7 +5,8 @@ You receive:
 - the user's question
 - the SQL query that failed
 - the database schema
-- the error message OR empty result signal
+- the error message, empty result signal, timeout signal OR
+  cost rejection (with the rejected plan's summary)
 
 Your job: produce a BETTER SQL query.
 
@@ -13,5 +14,8 @@ Rules:
 - Return ONLY JSON: { "sql": "..." }
 - Never reuse invalid columns.
 - Use only schema fields.
+- If the query timed out or its plan was rejected as too
+  expensive, make it cheaper: filter dates, aggregate before
+  joining, join only on keys, never join tables without a key.
 - Explain nothing.
 """
@@ -59,12 +59,30 @@ DATABASE_SCHEMA = {
                     "type": "INTEGER",
                     "description": "Quantity of items ordered",
                     "analysis_potential": "volume_analysis"
+                },
+                "unit_price": {
+                    "type": "DECIMAL(10,4)",
+                    "description": "Product price when the row was loaded"
+                },
+                "unit_cost": {
+                    "type": "DECIMAL(10,4)",
+                    "description": "Product cost when the row was loaded"
+                },
+                "revenue": {
+                    "type": "DECIMAL(14,4)",
+                    "description": "Line revenue (order_quantity * unit_price)",
+                    "analysis_potential": "revenue_analysis"
+                },
+                "profit": {
+                    "type": "DECIMAL(14,4)",
+                    "description": "Line profit (revenue - order_quantity * unit_cost)",
+                    "analysis_potential": "profitability_analysis"
                 }
             },
             "business_purpose": "Track all sales transactions for revenue and performance analysis",
             "key_metrics": [
-                "revenue (calculated as order_quantity * product_price)",
-                "profit (calculated as order_quantity * (product_price - product_cost))",
+                "revenue (stored per line: order_quantity * unit_price)",
+                "profit (stored per line: order_quantity * (unit_price - unit_cost))",
                 "units_sold",
                 "average_order_value"
             ]
@@ -97,6 +115,10 @@ DATABASE_SCHEMA = {
                 "return_quantity": {
                     "type": "INTEGER",
                     "description": "Number of items returned"
+                },
+                "return_value": {
+                    "type": "DECIMAL(14,4)",
+                    "description": "Value of the returned items (return_quantity * product price)"
                 }
             },
             "business_purpose": "Track product returns for quality analysis and customer satisfaction",
@@ -342,10 +364,235 @@ DATABASE_SCHEMA = {
                     "type": "INTEGER",
                     "description": "Week number (1-52)",
                     "analysis_potential": "weekly_trends"
+                },
+                "quarter_key": {
+                    "type": "INTEGER",
+                    "description": "Consecutive quarter number (previous quarter = quarter_key - 1)",
+                    "analysis_potential": "last_quarter, quarter_over_quarter"
+                },
+                "month_key": {
+                    "type": "INTEGER",
+                    "description": "Consecutive month number (previous month = month_key - 1)",
+                    "analysis_potential": "last_month, month_over_month"
+                },
+                "quarter_start": {
+                    "type": "DATE",
+                    "description": "First date of the quarter"
+                },
+                "fiscal_year": {
+                    "type": "INTEGER",
+                    "description": "Fiscal year (named after the calendar year it ends in)",
+                    "analysis_potential": "fiscal_reporting"
+                },
+                "fiscal_quarter": {
+                    "type": "INTEGER",
+                    "description": "Fiscal quarter (1-4)",
+                    "analysis_potential": "fiscal_reporting"
+                },
+                "fiscal_month": {
+                    "type": "INTEGER",
+                    "description": "Month number within the fiscal year (1-12)"
                 }
             },
             "business_purpose": "Time dimension for temporal analysis and trend detection",
             "time_periods": ["2020", "2021", "2022"]
+        },
+        
+        # Materialized rollups built by load_data.py; revenue, cost and
+        # profit are precomputed, so no product join is needed for them.
+        # Row counts as built from the shipped Dataset (2020-01 to 2022-06)
+        "agg_sales_daily": {
+            "type": "aggregate",
+            "description": "Sales and returns per day, product and territory",
+            "row_count": "42,658",
+            "columns": {
+                "date": {
+                    "type": "DATE",
+                    "description": "Order or return date"
+                },
+                "year": {
+                    "type": "INTEGER",
+                    "description": "Year (2020-2022)"
+                },
+                "quarter": {
+                    "type": "INTEGER",
+                    "description": "Quarter (1-4)"
+                },
+                "quarter_key": {
+                    "type": "INTEGER",
+                    "description": "Consecutive quarter number, as in dim_calendar"
+                },
+                "month_key": {
+                    "type": "INTEGER",
+                    "description": "Consecutive month number, as in dim_calendar"
+                },
+                "product_key": {
+                    "type": "INTEGER",
+                    "description": "Foreign key to dim_products"
+                },
+                "product_subcategory_key": {
+                    "type": "INTEGER",
+                    "description": "Foreign key to dim_product_subcategories"
+                },
+                "product_category_key": {
+                    "type": "INTEGER",
+                    "description": "Foreign key to dim_product_categories"
+                },
+                "territory_key": {
+                    "type": "INTEGER",
+                    "description": "Foreign key to dim_territories"
+                },
+                "order_quantity": {
+                    "type": "INTEGER",
+                    "description": "Units sold"
+                },
+                "revenue": {
+                    "type": "DECIMAL",
+                    "description": "SUM(order_quantity * product_price)"
+                },
+                "cost": {
+                    "type": "DECIMAL",
+                    "description": "SUM(order_quantity * product_cost)"
+                },
+                "profit": {
+                    "type": "DECIMAL",
+                    "description": "revenue - cost"
+                },
+                "return_quantity": {
+                    "type": "INTEGER",
+                    "description": "Units returned"
+                }
+            },
+            "business_purpose": "Daily and weekly trends without scanning fact_sales",
+            "grain": ["date", "product_key", "territory_key"]
+        },
+        
+        "agg_sales_monthly": {
+            "type": "aggregate",
+            "description": "Sales and returns per month, product and territory",
+            "row_count": "8,682",
+            "columns": {
+                "month_start": {
+                    "type": "DATE",
+                    "description": "First date of the month"
+                },
+                "year": {
+                    "type": "INTEGER",
+                    "description": "Year (2020-2022)"
+                },
+                "quarter": {
+                    "type": "INTEGER",
+                    "description": "Quarter (1-4)"
+                },
+                "quarter_key": {
+                    "type": "INTEGER",
+                    "description": "Consecutive quarter number, as in dim_calendar"
+                },
+                "month_key": {
+                    "type": "INTEGER",
+                    "description": "Consecutive month number, as in dim_calendar"
+                },
+                "product_key": {
+                    "type": "INTEGER",
+                    "description": "Foreign key to dim_products"
+                },
+                "product_subcategory_key": {
+                    "type": "INTEGER",
+                    "description": "Foreign key to dim_product_subcategories"
+                },
+                "product_category_key": {
+                    "type": "INTEGER",
+                    "description": "Foreign key to dim_product_categories"
+                },
+                "territory_key": {
+                    "type": "INTEGER",
+                    "description": "Foreign key to dim_territories"
+                },
+                "order_quantity": {
+                    "type": "INTEGER",
+                    "description": "Units sold"
+                },
+                "revenue": {
+                    "type": "DECIMAL",
+                    "description": "SUM(order_quantity * product_price)"
+                },
+                "cost": {
+                    "type": "DECIMAL",
+                    "description": "SUM(order_quantity * product_cost)"
+                },
+                "profit": {
+                    "type": "DECIMAL",
+                    "description": "revenue - cost"
+                },
+                "return_quantity": {
+                    "type": "INTEGER",
+                    "description": "Units returned"
+                }
+            },
+            "business_purpose": "Product-level monthly, quarterly and yearly analysis",
+            "grain": ["month_key", "product_key", "territory_key"]
+        },
+        
+        "agg_subcategory_monthly": {
+            "type": "aggregate",
+            "description": "Sales and returns per month, product subcategory and territory",
+            "row_count": "1,700",
+            "columns": {
+                "month_start": {
+                    "type": "DATE",
+                    "description": "First date of the month"
+                },
+                "year": {
+                    "type": "INTEGER",
+                    "description": "Year (2020-2022)"
+                },
+                "quarter": {
+                    "type": "INTEGER",
+                    "description": "Quarter (1-4)"
+                },
+                "quarter_key": {
+                    "type": "INTEGER",
+                    "description": "Consecutive quarter number, as in dim_calendar"
+                },
+                "month_key": {
+                    "type": "INTEGER",
+                    "description": "Consecutive month number, as in dim_calendar"
+                },
+                "product_subcategory_key": {
+                    "type": "INTEGER",
+                    "description": "Foreign key to dim_product_subcategories"
+                },
+                "product_category_key": {
+                    "type": "INTEGER",
+                    "description": "Foreign key to dim_product_categories"
+                },
+                "territory_key": {
+                    "type": "INTEGER",
+                    "description": "Foreign key to dim_territories"
+                },
+                "order_quantity": {
+                    "type": "INTEGER",
+                    "description": "Units sold"
+                },
+                "revenue": {
+                    "type": "DECIMAL",
+                    "description": "SUM(order_quantity * product_price)"
+                },
+                "cost": {
+                    "type": "DECIMAL",
+                    "description": "SUM(order_quantity * product_cost)"
+                },
+                "profit": {
+                    "type": "DECIMAL",
+                    "description": "revenue - cost"
+                },
+                "return_quantity": {
+                    "type": "INTEGER",
+                    "description": "Units returned"
+                }
+            },
+            "business_purpose": "Category, subcategory, territory and period KPIs for dashboards",
+            "grain": ["month_key", "product_subcategory_key", "territory_key"]
         }
     },
     
@@ -397,44 +644,133 @@ DATABASE_SCHEMA = {
             "to": "dim_territories.sales_territory_key",
             "type": "many_to_one",
             "enables": "Regional return rate analysis"
+        },
+        "sales_daily_to_products": {
+            "from": "agg_sales_daily.product_key",
+            "to": "dim_products.product_key",
+            "type": "many_to_one",
+            "enables": "Product-level rollups"
+        },
+        "sales_daily_to_subcategories": {
+            "from": "agg_sales_daily.product_subcategory_key",
+            "to": "dim_product_subcategories.product_subcategory_key",
+            "type": "many_to_one",
+            "enables": "Subcategory rollups"
+        },
+        "sales_daily_to_categories": {
+            "from": "agg_sales_daily.product_category_key",
+            "to": "dim_product_categories.product_category_key",
+            "type": "many_to_one",
+            "enables": "Category rollups without the product hierarchy"
+        },
+        "sales_daily_to_territories": {
+            "from": "agg_sales_daily.territory_key",
+            "to": "dim_territories.sales_territory_key",
+            "type": "many_to_one",
+            "enables": "Regional rollups"
+        },
+        "sales_monthly_to_products": {
+            "from": "agg_sales_monthly.product_key",
+            "to": "dim_products.product_key",
+            "type": "many_to_one",
+            "enables": "Product-level rollups"
+        },
+        "sales_monthly_to_subcategories": {
+            "from": "agg_sales_monthly.product_subcategory_key",
+            "to": "dim_product_subcategories.product_subcategory_key",
+            "type": "many_to_one",
+            "enables": "Subcategory rollups"
+        },
+        "sales_monthly_to_categories": {
+            "from": "agg_sales_monthly.product_category_key",
+            "to": "dim_product_categories.product_category_key",
+            "type": "many_to_one",
+            "enables": "Category rollups without the product hierarchy"
+        },
+        "sales_monthly_to_territories": {
+            "from": "agg_sales_monthly.territory_key",
+            "to": "dim_territories.sales_territory_key",
+            "type": "many_to_one",
+            "enables": "Regional rollups"
+        },
+        "subcategory_monthly_to_subcategories": {
+            "from": "agg_subcategory_monthly.product_subcategory_key",
+            "to": "dim_product_subcategories.product_subcategory_key",
+            "type": "many_to_one",
+            "enables": "Subcategory rollups"
+        },
+        "subcategory_monthly_to_categories": {
+            "from": "agg_subcategory_monthly.product_category_key",
+            "to": "dim_product_categories.product_category_key",
+            "type": "many_to_one",
+            "enables": "Category rollups without the product hierarchy"
+        },
+        "subcategory_monthly_to_territories": {
+            "from": "agg_subcategory_monthly.territory_key",
+            "to": "dim_territories.sales_territory_key",
+            "type": "many_to_one",
+            "enables": "Regional rollups"
+        },
+        "sales_monthly_to_calendar": {
+            "from": "agg_sales_monthly.month_start",
+            "to": "dim_calendar.date",
+            "type": "many_to_one",
+            "enables": "Month names and fiscal periods"
+        },
+        "subcategory_monthly_to_calendar": {
+            "from": "agg_subcategory_monthly.month_start",
+            "to": "dim_calendar.date",
+            "type": "many_to_one",
+            "enables": "Month names and fiscal periods"
+        },
+        "sales_daily_to_calendar": {
+            "from": "agg_sales_daily.date",
+            "to": "dim_calendar.date",
+            "type": "many_to_one",
+            "enables": "Day-level calendar attributes"
         }
     },
     
     "calculated_metrics": {
         "revenue": {
-            "formula": "SUM(fact_sales.order_quantity * dim_products.product_price)",
+            "formula": "SUM(fact_sales.revenue)",
             "description": "Total sales revenue",
-            "tables_required": ["fact_sales", "dim_products"]
+            "aggregate_formula": "SUM(agg.revenue)",
+            "tables_required": ["fact_sales"]
         },
         "cost": {
-            "formula": "SUM(fact_sales.order_quantity * dim_products.product_cost)",
+            "formula": "SUM(fact_sales.order_quantity * fact_sales.unit_cost)",
             "description": "Total cost of goods sold",
-            "tables_required": ["fact_sales", "dim_products"]
+            "aggregate_formula": "SUM(agg.cost)",
+            "tables_required": ["fact_sales"]
         },
         "profit": {
-            "formula": "SUM(fact_sales.order_quantity * (dim_products.product_price - dim_products.product_cost))",
+            "formula": "SUM(fact_sales.profit)",
             "description": "Total profit (revenue - cost)",
-            "tables_required": ["fact_sales", "dim_products"]
+            "aggregate_formula": "SUM(agg.profit)",
+            "tables_required": ["fact_sales"]
         },
         "profit_margin": {
             "formula": "(profit / revenue) * 100",
             "description": "Profit margin percentage",
-            "tables_required": ["fact_sales", "dim_products"]
+            "aggregate_formula": "100.0 * SUM(agg.profit) / NULLIF(SUM(agg.revenue), 0)",
+            "tables_required": ["fact_sales"]
         },
         "return_rate": {
-            "formula": "(SUM(fact_returns.return_quantity) / SUM(fact_sales.order_quantity)) * 100",
+            "formula": "100.0 * SUM(fact_returns.return_quantity) / NULLIF(SUM(fact_sales.order_quantity), 0)",
             "description": "Percentage of products returned",
+            "aggregate_formula": "100.0 * SUM(agg.return_quantity) / NULLIF(SUM(agg.order_quantity), 0)",
             "tables_required": ["fact_sales", "fact_returns"]
         },
         "customer_lifetime_value": {
             "formula": "SUM(revenue) per customer",
             "description": "Total revenue generated by each customer",
-            "tables_required": ["fact_sales", "dim_customers", "dim_products"]
+            "tables_required": ["fact_sales", "dim_customers"]
         },
         "average_order_value": {
             "formula": "SUM(revenue) / COUNT(DISTINCT order_number)",
             "description": "Average value per order",
-            "tables_required": ["fact_sales", "dim_products"]
+            "tables_required": ["fact_sales"]
         }
     },
     
@@ -501,6 +837,7 @@ def get_schema_summary():
         "total_tables": len(DATABASE_SCHEMA["tables"]),
         "fact_tables": len([t for t in DATABASE_SCHEMA["tables"].values() if t["type"] == "fact"]),
         "dimension_tables": len([t for t in DATABASE_SCHEMA["tables"].values() if t["type"] == "dimension"]),
+        "aggregate_tables": len([t for t in DATABASE_SCHEMA["tables"].values() if t["type"] == "aggregate"]),
         "total_relationships": len(DATABASE_SCHEMA["relationships"]),
         "calculated_metrics": len(DATABASE_SCHEMA["calculated_metrics"]),
         "business_dimensions": len(DATABASE_SCHEMA["business_dimensions"])
@@ -518,6 +855,10 @@ def get_fact_tables():
     """Get list of fact table names."""
     return [name for name, info in DATABASE_SCHEMA["tables"].items() if info["type"] == "fact"]
 
+def get_aggregate_tables():
+    """Get list of aggregate (rollup) table names."""
+    return [name for name, info in DATABASE_SCHEMA["tables"].items() if info["type"] == "aggregate"]
+
 def get_dimension_tables():
     """Get list of dimension table names."""
     return [name for name, info in DATABASE_SCHEMA["tables"].items() if info["type"] == "dimension"]
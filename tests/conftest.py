@@ -0,0 +1,11 @@
+import os
+import tempfile
+
+# Offline settings, applied before any app module reads them on import
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("TRACING_ENABLED", "false")
+# The SQL tool builds its engine on import; tests never connect to it
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'datagenie-tests.sqlite')}"
+)
@@ -0,0 +1,150 @@
+import asyncio
+import json
+
+import pytest
+
+import graph.agent_graph as agent_graph
+import prompts.schema_retriever as schema_retriever
+from agents.dashboard_agent import build_trusted_plan
+from agents.planner_sql_agent import build_planner_sql_prompt
+from graph.agent_graph import agents_graph, apply_fused_output, route_entry, validate_fused_output
+from prompts.schema_prompt import SQL_SCHEMA_PROMPT
+
+PLAN = {
+    "is_valid": True,
+    "is_analytics": True,
+    "analysis_goal": "revenue by region",
+    "require_sql": True,
+    "visualization": True,
+    "dashboard": False,
+}
+SQL = "SELECT t.region, SUM(s.revenue) AS revenue FROM fact_sales s GROUP BY t.region"
+
+
+def fused(**overrides):
+    return {**PLAN, "sql": SQL, **overrides}
+
+
+def test_valid_fused_answer_is_split_into_plan_and_sql():
+    assert validate_fused_output(fused()) == (PLAN, SQL)
+
+
+def test_non_analytics_and_dashboard_answers_need_no_sql():
+    plan, sql = validate_fused_output(fused(is_analytics=False, sql=None))
+    assert sql is None and plan["is_analytics"] is False
+    assert validate_fused_output(fused(dashboard=True, sql=None))[1] is None
+
+
+@pytest.mark.parametrize("data", [
+    [fused()],
+    {key: value for key, value in fused().items() if key != "visualization"},
+    fused(dashboard="false"),
+    fused(analysis_goal=None),
+    fused(sql=None),
+    fused(sql=""),
+    fused(sql="DELETE FROM fact_sales"),
+    fused(sql="I am unable to answer this question"),
+    fused(sql="SELECT 'unable to determine'"),
+])
+def test_partial_or_malformed_fused_answers_are_rejected(data):
+    assert validate_fused_output(data) is None
+
+
+@pytest.mark.parametrize("raw", ["", "not json", '{"is_valid": true', "```json\n[]\n```"])
+def test_unparseable_fused_output_falls_back(raw):
+    assert apply_fused_output({"question": "q"}, raw) == {"question": "q", "fused_failed": True}
+
+
+def test_fenced_fused_output_is_accepted():
+    state = apply_fused_output({"question": "q"}, f"```json\n{json.dumps(fused())}\n```")
+    assert state["validator"] == PLAN
+    assert state["sql_query"] == SQL
+    assert state["fused_failed"] is False
+
+
+def test_entry_route(monkeypatch):
+    monkeypatch.setattr(agent_graph, "USE_FUSED_PLANNER", False)
+    assert route_entry({"question": "q"}) == "query_validator"
+
+    monkeypatch.setattr(agent_graph, "USE_FUSED_PLANNER", True)
+    assert route_entry({"question": "q"}) == "fused_planner"
+    assert route_entry({"question": "q", "validator": PLAN}) == "sql_agent"
+
+
+@pytest.fixture
+def agents(monkeypatch):
+    """Stand-in agents that record which LLM calls the graph made."""
+    calls = []
+    replies = {"fused": json.dumps(fused())}
+
+    def agent(name, reply):
+        def run(arg):
+            calls.append(name)
+            return reply()
+
+        async def arun(arg):
+            return run(arg)
+
+        return run, arun
+
+    for name, attr, reply in [
+        ("fused", "planner_sql_agent", lambda: replies["fused"]),
+        ("validator", "validator_agent", lambda: json.dumps(PLAN)),
+        ("sql", "sql_agent", lambda: SQL),
+    ]:
+        run, arun = agent(name, reply)
+        monkeypatch.setattr(agent_graph, f"run_{attr}", run)
+        monkeypatch.setattr(agent_graph, f"arun_{attr}", arun)
+
+    monkeypatch.setattr(agent_graph, "USE_FUSED_PLANNER", True)
+    return calls, replies
+
+
+@pytest.mark.parametrize("fused_planner", [True, False])
+def test_trusted_plan_skips_the_validator(agents, monkeypatch, fused_planner):
+    calls, _ = agents
+    monkeypatch.setattr(agent_graph, "USE_FUSED_PLANNER", fused_planner)
+    plan = build_trusted_plan("Revenue by month", "monthly revenue trend")
+
+    result = agents_graph.invoke({"question": "Revenue by month", "validator": plan})
+
+    assert calls == ["sql"]
+    assert result["validator"] == plan
+    assert result["sql_query"] == SQL
+
+
+def test_fused_answer_skips_the_two_step_path(agents):
+    calls, _ = agents
+    result = agents_graph.invoke({"question": "revenue by region"})
+    assert calls == ["fused"]
+    assert result["sql_query"] == SQL
+
+
+@pytest.mark.parametrize("reply", ["not json", json.dumps(fused(sql=None)), json.dumps(fused(is_valid="yes"))])
+def test_bad_fused_answer_falls_back_to_validator_and_sql_agent(agents, reply):
+    calls, replies = agents
+    replies["fused"] = reply
+
+    result = agents_graph.invoke({"question": "revenue by region"})
+
+    assert calls == ["fused", "validator", "sql"]
+    assert result["validator"] == PLAN
+    assert result["sql_query"] == SQL
+
+
+def test_async_fallback(agents):
+    calls, replies = agents
+    replies["fused"] = "not json"
+
+    result = asyncio.run(agents_graph.ainvoke({"question": "revenue by region"}))
+
+    assert calls == ["fused", "validator", "sql"]
+    assert result["sql_query"] == SQL
+
+
+def test_fused_prompt_carries_only_the_schema_the_question_needs(monkeypatch):
+    monkeypatch.setattr(schema_retriever, "SCHEMA_PRUNING", True)
+    content = build_planner_sql_prompt("total revenue by product category")[1]["content"]
+
+    assert "dim_customers" not in content
+    assert len(content) < len(SQL_SCHEMA_PROMPT)
@@ -0,0 +1,45 @@
+import sqlite3
+
+from benchmarks.run_benchmark import missing_tables, summarize
+
+
+def run(total, error=None, **stages):
+    return {"question": "q", "error": error, "total": total, **stages}
+
+
+def test_failed_runs_are_left_out_of_latency_and_throughput():
+    runs = [run(1.0, plan=0.5, sql=0.5), run(3.0, plan=2.0, sql=1.0), run(0.01, error="sql: db_error", plan=0.01)]
+
+    summary = summarize(runs, wall_seconds=4.0)
+
+    assert (summary["questions"], summary["succeeded"], summary["errors"]) == (3, 2, 1)
+    assert summary["throughput_qps"] == 0.5
+    assert summary["stages"]["plan"]["count"] == 2
+    assert summary["stages"]["total"]["p50_ms"] == 2000.0
+
+
+def test_all_failed_runs_have_no_timings():
+    summary = summarize([run(0.01, error="sql: db_error")], wall_seconds=0.01)
+    assert summary["succeeded"] == 0
+    assert summary["throughput_qps"] == 0
+    assert summary["stages"]["total"]["count"] == 0
+
+
+def test_schema_prompt_sizes_are_reported_against_the_full_prompt():
+    runs = [run(1.0, schema_prompt_chars=1000), run(1.0, schema_prompt_chars=3000), run(0.1, error="no SQL")]
+
+    prompt = summarize(runs, wall_seconds=2.0, full_prompt_chars=4000)["schema_prompt"]
+
+    assert prompt == {"full_chars": 4000, "mean_chars": 2000.0, "max_chars": 3000, "reduction_pct": 50.0}
+
+
+def test_missing_tables(tmp_path):
+    path = tmp_path / "partial.sqlite"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE fact_sales (order_date TEXT)")
+        conn.execute("CREATE VIEW dim_calendar AS SELECT '2021-01-01' AS date")
+
+    missing = missing_tables(f"sqlite:///{path}")
+
+    assert "fact_sales" not in missing and "dim_calendar" not in missing
+    assert "agg_subcategory_monthly" in missing
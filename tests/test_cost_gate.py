@@ -0,0 +1,88 @@
+import pytest
+
+import tools.data_extractor_tool as data_extractor_tool
+from tools.data_extractor_tool import plan_violations, summarize_plan
+
+
+@pytest.fixture(autouse=True)
+def budgets(monkeypatch):
+    monkeypatch.setattr(data_extractor_tool, "SQL_MAX_PLAN_COST", 1_000_000)
+    monkeypatch.setattr(data_extractor_tool, "SQL_MAX_PLAN_ROWS", 10_000_000)
+    monkeypatch.setattr(data_extractor_tool, "SQL_MAX_NESTED_LOOP_ROWS", 1_000_000)
+
+
+def node(node_type, cost, rows, *children, **extra):
+    plan = {"Node Type": node_type, "Total Cost": cost, "Plan Rows": rows, **extra}
+    if children:
+        plan["Plans"] = list(children)
+    return plan
+
+
+def scan(table, rows, **extra):
+    return node("Seq Scan", rows / 10, rows, **{"Relation Name": table, **extra})
+
+
+def test_cheap_hash_join_passes():
+    plan = node("Hash Join", 5_000, 56_000,
+                scan("fact_sales", 56_000),
+                node("Hash", 30, 293, scan("dim_products", 293)),
+                **{"Hash Cond": "(s.product_key = p.product_key)"})
+    assert plan_violations(plan) == []
+
+
+def test_cost_over_budget():
+    violations = plan_violations(node("Seq Scan", 2_500_000, 100))
+    assert violations == ["estimated cost 2,500,000 exceeds the budget of 1,000,000"]
+
+
+def test_row_estimate_of_any_step_over_budget():
+    plan = node("Aggregate", 900_000, 10, node("Seq Scan", 800_000, 20_000_000))
+    assert plan_violations(plan) == [
+        "a plan step produces an estimated 20,000,000 rows (budget 10,000,000)"
+    ]
+
+
+def test_cartesian_join():
+    plan = node("Nested Loop", 50_000, 900_000, scan("fact_sales", 56_000), scan("fact_returns", 1_800))
+    assert plan_violations(plan) == ["cartesian join (no join condition) over 56,000 x 1,800 rows"]
+
+
+def test_nested_loop_with_only_a_join_filter():
+    plan = node("Nested Loop", 50_000, 900_000, scan("fact_sales", 56_000), scan("fact_returns", 1_800),
+                **{"Join Filter": "(s.order_date < r.return_date)"})
+    assert plan_violations(plan) == [
+        "unbounded nested loop over 56,000 x 1,800 rows on (s.order_date < r.return_date)"
+    ]
+
+
+def test_nested_loop_over_an_index_lookup_passes():
+    inner = node("Index Scan", 0.3, 1, **{"Relation Name": "dim_products",
+                                          "Index Cond": "(product_key = s.product_key)"})
+    plan = node("Nested Loop", 20_000, 56_000, scan("fact_sales", 56_000), inner)
+    assert plan_violations(plan) == []
+
+
+def test_small_nested_loop_passes():
+    plan = node("Nested Loop", 300, 1_200, scan("dim_territories", 10), scan("dim_product_categories", 4))
+    assert plan_violations(plan) == []
+
+
+def test_summary_outline():
+    plan = node("Hash Join", 5_000, 56_000,
+                scan("fact_sales", 56_000),
+                node("Hash", 30, 293, scan("dim_products", 293)),
+                **{"Hash Cond": "(s.product_key = p.product_key)"})
+    assert summarize_plan(plan).splitlines() == [
+        "Hash Join (s.product_key = p.product_key) (cost=5,000 rows=56,000)",
+        "  Seq Scan on fact_sales (cost=5,600 rows=56,000)",
+        "  Hash (cost=30 rows=293)",
+        "    Seq Scan on dim_products (cost=29 rows=293)",
+    ]
+
+
+def test_summary_is_truncated():
+    plan = scan("fact_sales", 10)
+    for _ in range(5):
+        plan = node("Subquery Scan", 1, 10, plan)
+    assert summarize_plan(plan, limit=3).splitlines()[-1] == "  ..."
+    assert len(summarize_plan(plan, limit=3).splitlines()) == 4
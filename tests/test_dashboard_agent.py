@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from agents.dashboard_agent import build_trusted_plan, parse_dashboard_questions
+
+
+def test_objects_become_trusted_plans():
+    raw = json.dumps({"questions": [
+        {"question": "Revenue by month", "analysis_goal": "monthly revenue trend", "visualization": True},
+        {"question": "Total profit", "visualization": False},
+    ]})
+
+    parsed = parse_dashboard_questions(f"```json\n{raw}\n```")
+
+    assert [item["question"] for item in parsed] == ["Revenue by month", "Total profit"]
+    assert parsed[0]["plan"] == build_trusted_plan("Revenue by month", "monthly revenue trend", True)
+    assert parsed[1]["plan"]["analysis_goal"] == "Total profit"
+    assert parsed[1]["plan"]["visualization"] is False
+
+
+def test_plain_strings_go_through_the_validator():
+    parsed = parse_dashboard_questions(json.dumps({"questions": ["Revenue by month"]}))
+    assert parsed == [{"question": "Revenue by month", "plan": None}]
+
+
+@pytest.mark.parametrize("raw", [
+    "",
+    "not json",
+    json.dumps(["Revenue by month"]),
+    json.dumps({"questions": []}),
+    json.dumps({"questions": "Revenue by month"}),
+    json.dumps({"items": [{"question": "Revenue by month"}]}),
+    json.dumps({"questions": [{"analysis_goal": "monthly revenue"}]}),
+    json.dumps({"questions": [{"question": "  "}]}),
+    json.dumps({"questions": [{"question": "Revenue by month", "visualization": "false"}]}),
+    json.dumps({"questions": [{"question": "Revenue by month", "analysis_goal": ["revenue"]}]}),
+    json.dumps({"questions": ["Revenue by month", 42]}),
+])
+def test_malformed_dashboard_list_is_rejected(raw):
+    with pytest.raises(ValueError):
+        parse_dashboard_questions(raw)
@@ -0,0 +1,77 @@
+import httpx
+import pytest
+from google.genai.errors import APIError
+
+import graph.dashboard_executor as dashboard_executor
+from graph.dashboard_executor import run_dashboard_questions
+
+
+@pytest.fixture
+def attempts(monkeypatch):
+    """Replace the per-question pipeline with one that raises queued errors."""
+    errors = {}
+    calls = []
+
+    def answer(question, plan=None, dashboard_mode=False):
+        calls.append(question)
+        queued = errors.get(question, [])
+        if queued:
+            raise queued.pop(0)
+        return {"question": question, "error": None}
+
+    monkeypatch.setattr(dashboard_executor, "answer_dashboard_question", answer)
+    monkeypatch.setattr(dashboard_executor.time, "sleep", lambda seconds: None)
+    return errors, calls
+
+
+def api_error(code, message="boom"):
+    return APIError(code, {"error": {"message": message}})
+
+
+@pytest.mark.parametrize("error", [
+    api_error(429),
+    api_error(503),
+    httpx.ConnectTimeout("timed out"),
+])
+def test_transient_errors_are_retried(attempts, error):
+    errors, calls = attempts
+    errors["revenue by region"] = [error]
+
+    [outcome] = run_dashboard_questions(["revenue by region"], requests_per_minute=0)
+
+    assert outcome["error"] is None
+    assert calls == ["revenue by region"] * 2
+
+
+def test_client_errors_are_not_retried_even_when_they_quote_429(attempts):
+    errors, calls = attempts
+    errors["revenue by region"] = [api_error(400, "max_output_tokens must be below 4290")]
+
+    [outcome] = run_dashboard_questions(["revenue by region"], requests_per_minute=0)
+
+    assert "4290" in outcome["error"]
+    assert calls == ["revenue by region"]
+
+
+def test_retries_stop_after_the_limit(attempts, monkeypatch):
+    monkeypatch.setattr(dashboard_executor, "DASHBOARD_MAX_RETRIES", 3)
+    errors, calls = attempts
+    errors["revenue by region"] = [api_error(429) for _ in range(5)]
+
+    [outcome] = run_dashboard_questions(["revenue by region"], requests_per_minute=0)
+
+    assert outcome["error"] is not None
+    assert len(calls) == 3
+
+
+def test_one_failure_does_not_abort_the_dashboard(attempts):
+    errors, _ = attempts
+    errors["profit by region"] = [ValueError("bad SQL")]
+
+    outcomes = run_dashboard_questions(
+        ["revenue by region", {"question": "profit by region", "plan": None}, "units by region"],
+        requests_per_minute=0,
+    )
+
+    assert [outcome["question"] for outcome in outcomes] == ["revenue by region", "profit by region", "units by region"]
+    assert [outcome["error"] for outcome in outcomes] == [None, "bad SQL", None]
@@ -0,0 +1,26 @@
+from tools.index_advisor import with_partition_rows
+
+
+def test_partitioned_tables_count_their_partitions_rows():
+    row_counts = {
+        "fact_sales": 0,
+        "fact_sales_2020": 2_630,
+        "fact_sales_2021": 23_935,
+        "fact_sales_2022": 29_481,
+        "fact_returns": 1_809,
+        "fact_returns_2021": 1_809,
+        "dim_products": 293,
+    }
+    parents = {
+        "fact_sales_2020": "fact_sales",
+        "fact_sales_2021": "fact_sales",
+        "fact_sales_2022": "fact_sales",
+        "fact_returns_2021": "fact_returns",
+    }
+
+    rows = with_partition_rows(row_counts, parents)
+
+    assert rows["fact_sales"] == 56_046
+    assert rows["fact_sales_2021"] == 23_935
+    assert rows["fact_returns"] == 1_809
+    assert rows["dim_products"] == 293
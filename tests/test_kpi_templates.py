@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+import tools.kpi_templates as kpi_templates
+from tools.kpi_templates import build_kpi_answer, match_kpi_question
+
+
+@pytest.fixture
+def aggregates(monkeypatch):
+    monkeypatch.setattr(kpi_templates, "USE_AGGREGATES", True)
+
+
+@pytest.fixture
+def no_aggregates(monkeypatch):
+    monkeypatch.setattr(kpi_templates, "USE_AGGREGATES", False)
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("top 5 products by revenue",
+     {"metric": "revenue", "dimension": "product", "top_n": 5, "ascending": False}),
+    ("What were our lowest 3 regions by profit?",
+     {"metric": "profit", "dimension": "region", "top_n": 3, "ascending": True}),
+    ("best selling products",
+     {"metric": "units", "dimension": "product", "top_n": 10}),
+    ("profit margin by region in 2016",
+     {"metric": "profit_margin", "dimension": "region", "year": 2016}),
+    ("monthly revenue", {"metric": "revenue", "grain": "month"}),
+    ("revenue last quarter", {"metric": "revenue", "last_quarter": True}),
+    ("return rate by category", {"metric": "return_rate", "dimension": "category"}),
+    ("sales by subcategory", {"metric": "revenue", "dimension": "subcategory"}),
+])
+def test_slots(question, expected):
+    slots = match_kpi_question(question)
+    assert slots is not None
+    assert {key: slots[key] for key in expected} == expected
+
+
+@pytest.mark.parametrize("question", [
+    "why did revenue drop",
+    "revenue by customer gender",
+    "revenue for bikes",
+    "top products by revenue growth",
+    "how are you",
+])
+def test_questions_beyond_the_templates_do_not_match(question):
+    assert match_kpi_question(question) is None
+    assert build_kpi_answer(question) is None
+
+
+def test_dimension_and_grain_together_are_left_to_the_agent(aggregates):
+    assert match_kpi_question("revenue by category per month") is not None
+    assert build_kpi_answer("revenue by category per month") is None
+
+
+def test_top_n_answer(aggregates):
+    answer = build_kpi_answer("top 5 products by revenue")
+    sql = answer["sql_query"]
+
+    assert "FROM agg_sales_monthly am" in sql
+    assert "ORDER BY revenue DESC" in sql
+    assert sql.endswith("LIMIT 5")
+    assert answer["validator"]["analysis_goal"] == "top 5 products by revenue"
+    assert answer["validator"]["visualization"] is True
+    assert json.loads(answer["visual_spec"]) == {
+        "chart_type": "bar", "x": "product_name", "y": "revenue", "title": "Top 5 products by revenue",
+    }
+
+
+def test_totals_have_no_chart(aggregates):
+    answer = build_kpi_answer("total revenue")
+    assert answer["visual_spec"] is None
+    assert answer["validator"]["visualization"] is False
+
+
+def test_periods_group_by_consecutive_keys(aggregates):
+    answer = build_kpi_answer("revenue by quarter")
+    assert "GROUP BY asm.quarter_key" in answer["sql_query"]
+    assert json.loads(answer["visual_spec"])["chart_type"] == "line"
+
+
+@pytest.mark.parametrize("question", [
+    "revenue by category",
+    "units sold by region",
+    "profit margin by country in 2016",
+    "return rate by category",
+    "revenue last quarter",
+])
+def test_rollup_questions_read_the_subcategory_aggregate(aggregates, question):
+    sql = build_kpi_answer(question)["sql_query"]
+    assert "FROM agg_subcategory_monthly asm" in sql
+    assert "fact_" not in sql
+
+
+@pytest.mark.parametrize("question", [
+    "number of orders per month",
+    "revenue by customer",
+    "top 5 customers by profit",
+])
+def test_orders_and_customers_need_the_fact_table(aggregates, question):
+    sql = build_kpi_answer(question)["sql_query"]
+    assert "FROM fact_sales s" in sql
+    assert "agg_" not in sql
+
+
+@pytest.mark.parametrize("question", [
+    "revenue by category",
+    "return rate by category",
+    "revenue last quarter",
+])
+def test_fact_templates_when_aggregates_are_disabled(no_aggregates, question):
+    sql = build_kpi_answer(question)["sql_query"]
+    assert "FROM fact_sales s" in sql
+    assert "agg_" not in sql
+
+
+def test_year_filter_bounds_the_fact_date_for_partition_pruning(no_aggregates):
+    sql = build_kpi_answer("revenue by region in 2016")["sql_query"]
+    assert "c.year = 2016" in sql
+    assert "s.order_date >= '2016-01-01' AND s.order_date < '2017-01-01'" in sql
+
+
+def test_return_rate_filters_returns_on_their_own_date(no_aggregates):
+    sql = build_kpi_answer("return rate by region in 2016")["sql_query"]
+    assert "r.return_date >= '2016-01-01' AND r.return_date < '2017-01-01'" in sql
+    assert "JOIN dim_calendar c ON r.return_date = c.date" in sql
+
+
+def test_disabled(monkeypatch):
+    monkeypatch.setattr(kpi_templates, "KPI_TEMPLATES_ENABLED", False)
+    assert build_kpi_answer("total revenue") is None
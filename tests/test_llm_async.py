@@ -0,0 +1,33 @@
+import pytest
+from google.genai.errors import APIError
+
+from utils.llm_async import is_retryable
+
+
+class WrappedError(Exception):
+    """Stands in for LangChain's ChatGoogleGenerativeAIError."""
+
+
+def wrapped(error):
+    try:
+        raise WrappedError(str(error)) from error
+    except WrappedError as e:
+        return e
+
+
+@pytest.mark.parametrize("code, retryable", [(429, True), (500, True), (503, True), (400, False), (404, False)])
+def test_status_codes(code, retryable):
+    error = APIError(code, {"error": {"message": "boom"}})
+    assert is_retryable(error) is retryable
+    assert is_retryable(wrapped(error)) is retryable
+
+
+def test_message_text_is_not_a_status():
+    error = APIError(400, {"error": {"message": "max_tokens=500 is above the internal limit"}})
+    assert not is_retryable(wrapped(error))
+    assert not is_retryable(ValueError("internal error 500"))
+
+
+def test_network_failures_are_retried():
+    assert is_retryable(TimeoutError())
+    assert is_retryable(wrapped(ConnectionResetError()))
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from utils.llm_cache import CachedLLM
+
+
+class CountingModel:
+    """Chat model stand-in that answers with a running call count."""
+
+    def __init__(self, model="gemini-2.0-flash", temperature=0.0):
+        self.model = model
+        self.temperature = temperature
+        self.calls = 0
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        return AIMessage(content=f"answer {self.calls}")
+
+    async def ainvoke(self, prompt, **kwargs):
+        return self.invoke(prompt, **kwargs)
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "llm.sqlite")
+
+
+PROMPT = [SystemMessage(content="You write SQL."), HumanMessage(content="total revenue")]
+
+
+def test_repeated_prompt_is_served_from_the_cache(cache_path):
+    model = CountingModel()
+    llm = CachedLLM(model, path=cache_path)
+
+    assert llm.invoke(PROMPT).content == "answer 1"
+    assert llm.invoke(list(PROMPT)).content == "answer 1"
+    assert asyncio.run(llm.ainvoke(PROMPT)).content == "answer 1"
+    assert model.calls == 1
+
+
+def test_cache_survives_a_restart(cache_path):
+    CachedLLM(CountingModel(), path=cache_path).invoke(PROMPT)
+
+    model = CountingModel()
+    assert CachedLLM(model, path=cache_path).invoke(PROMPT).content == "answer 1"
+    assert model.calls == 0
+
+
+def test_key_covers_prompt_model_and_parameters(cache_path):
+    key = CachedLLM(CountingModel(), path=cache_path).key_for(PROMPT)
+
+    assert key == CachedLLM(CountingModel(), path=cache_path).key_for(
+        [{"role": "system", "content": "You write SQL."}, {"role": "human", "content": "total revenue"}]
+    )
+    assert key != CachedLLM(CountingModel(), path=cache_path).key_for(
+        [SystemMessage(content="You write SQL."), HumanMessage(content="total profit")]
+    )
+    assert key != CachedLLM(CountingModel(), path=cache_path).key_for(PROMPT[1:])
+    assert key != CachedLLM(CountingModel(model="gemini-1.5-pro"), path=cache_path).key_for(PROMPT)
+    assert key != CachedLLM(CountingModel(temperature=0.7), path=cache_path).key_for(PROMPT)
+    assert key != CachedLLM(CountingModel(), path=cache_path).key_for(PROMPT, stop=[";"])
+
+
+def test_expired_responses_are_refetched(cache_path):
+    model = CountingModel()
+    llm = CachedLLM(model, path=cache_path, ttl_seconds=-1)
+
+    llm.invoke(PROMPT)
+    assert llm.invoke(PROMPT).content == "answer 2"
+
+
+def test_least_recently_used_responses_are_evicted(cache_path):
+    llm = CachedLLM(CountingModel(), path=cache_path, max_bytes=len("answer 1") * 2)
+
+    llm.put("a", "answer 1")
+    llm.put("b", "answer 2")
+    llm.get("a")
+    llm.put("c", "answer 3")
+
+    assert llm.get("a") == "answer 1"
+    assert llm.get("b") is None
+    assert llm.get("c") == "answer 3"
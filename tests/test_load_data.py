@@ -0,0 +1,157 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import load_data
+from load_data import (
+    add_returns_values, add_sales_values, build_calendar_frame, copy_buffer, partition_bounds,
+    partition_name, price_map, split_year, swap_year_partition, with_partitions,
+)
+
+
+def copy_lines(df):
+    return copy_buffer(df).getvalue().splitlines()
+
+
+def test_copy_writes_missing_values_as_empty_fields():
+    df = pd.DataFrame({
+        "name": ["Bike", None],
+        "price": [3.5, np.nan],
+        "sold_on": [date(2021, 3, 1), None],
+    })
+    assert copy_lines(df) == ["Bike,3.5,2021-03-01", ",,"]
+
+
+def test_copy_quotes_delimiters_and_quotes():
+    df = pd.DataFrame({"name": ['Road-150, "Red"'], "size": ["L"]})
+    assert copy_lines(df) == ['"Road-150, ""Red""",L']
+
+
+def test_copy_writes_integer_keys_with_gaps_as_integers():
+    df = pd.DataFrame({"subcategory_key": [1.0, np.nan, 37.0], "price": [2.5, 3.0, 1.0]})
+    assert copy_lines(df) == ["1,2.5", ",3.0", "37,1.0"]
+
+
+def test_period_keys_are_consecutive_across_years():
+    calendar = build_calendar_frame(pd.date_range("2021-11-15", "2022-02-15", freq="D"))
+    months = calendar.drop_duplicates("month_key")
+    quarters = calendar.drop_duplicates("quarter_key")
+
+    assert list(months["month_key"].diff().dropna()) == [1, 1, 1]
+    assert list(quarters["quarter_key"].diff().dropna()) == [1]
+    assert list(quarters["quarter_start"]) == [date(2021, 10, 1), date(2022, 1, 1)]
+
+
+def test_calendar_attributes():
+    row = build_calendar_frame(["2022-01-02"]).iloc[0]
+    assert (row["year"], row["quarter"], row["month"]) == (2022, 1, 1)
+    assert (row["day_name"], row["day_of_week"], row["week_of_year"]) == ("Sunday", 6, 52)
+
+
+def test_fiscal_year_is_named_after_the_year_it_ends_in(monkeypatch):
+    monkeypatch.setattr(load_data, "FISCAL_YEAR_START_MONTH", 7)
+    calendar = build_calendar_frame(["2021-06-30", "2021-07-01", "2022-03-15"])
+    assert list(calendar["fiscal_year"]) == [2021, 2022, 2022]
+    assert list(calendar["fiscal_month"]) == [12, 1, 9]
+    assert list(calendar["fiscal_quarter"]) == [4, 1, 3]
+
+
+def test_fiscal_year_starting_in_january_is_the_calendar_year(monkeypatch):
+    monkeypatch.setattr(load_data, "FISCAL_YEAR_START_MONTH", 1)
+    calendar = build_calendar_frame(["2021-01-01", "2021-12-31"])
+    assert list(calendar["fiscal_year"]) == list(calendar["year"])
+    assert list(calendar["fiscal_month"]) == list(calendar["month"])
+
+
+PRICES = price_map([(1, "3.3900", "1.2000"), (2, "699.0982", "413.1463")])
+
+
+def test_sales_values_are_priced_per_line():
+    chunk = pd.DataFrame({"product_key": [2, 1, 99], "order_quantity": [2, 3, 1]})
+    valued = add_sales_values(chunk, PRICES)
+
+    assert list(valued["unit_price"][:2]) == [699.0982, 3.39]
+    assert list(valued["revenue"][:2]) == [1398.1964, 10.17]
+    assert list(valued["profit"][:2]) == [571.9038, 6.57]
+    assert valued.iloc[2][["unit_price", "unit_cost", "revenue", "profit"]].isna().all()
+
+
+def test_returns_are_valued_at_the_product_price():
+    chunk = pd.DataFrame({"product_key": [1, 99], "return_quantity": [4, 1]})
+    valued = add_returns_values(chunk, PRICES)
+    assert valued["return_value"][0] == 13.56
+    assert pd.isna(valued["return_value"][1])
+
+
+def sales_chunk(*days):
+    return pd.DataFrame({"order_date": [date.fromisoformat(day) for day in days], "order_quantity": 1})
+
+
+def test_split_year_routes_other_years_to_strays():
+    strays = []
+    chunks = [sales_chunk("2021-01-01", "2020-12-31"), sales_chunk("2021-12-31"), sales_chunk("2022-01-01")]
+
+    kept = pd.concat(split_year(iter(chunks), "order_date", "2021", strays))
+
+    assert list(kept["order_date"]) == [date(2021, 1, 1), date(2021, 12, 31)]
+    assert [list(chunk["order_date"]) for chunk in strays] == [[date(2020, 12, 31)], [date(2022, 1, 1)]]
+
+
+def test_with_partitions_creates_each_year_once(monkeypatch):
+    created = []
+    monkeypatch.setattr(load_data, "ensure_year_partition",
+                        lambda conn, table_name, year: created.append((table_name, int(year))))
+    chunks = [sales_chunk("2020-05-01", "2023-01-01"), sales_chunk(), sales_chunk("2023-06-30")]
+
+    assert list(with_partitions(None, iter(chunks), "fact_sales")) == chunks
+    assert sorted(created) == [("fact_sales", 2020), ("fact_sales", 2023)]
+
+
+def test_partition_covers_one_calendar_year():
+    assert partition_name("fact_returns", "2021") == "fact_returns_2021"
+    assert partition_bounds(2021) == "FOR VALUES FROM ('2021-01-01') TO ('2022-01-01')"
+
+
+class RecordingConnection:
+    """Records the statements a loader runs, without a database."""
+
+    def __init__(self):
+        self.statements = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, statement, params=None):
+        self.statements.append(" ".join(statement.split()))
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def swap(monkeypatch):
+    conn = RecordingConnection()
+    monkeypatch.setattr(load_data, "stream_copy", lambda conn, chunks, table_name, columns: 3)
+    monkeypatch.setattr(load_data, "table_exists", lambda conn, table_name: True)
+    return conn
+
+
+def test_swap_is_refused_when_order_lines_exist_in_another_year(swap, monkeypatch):
+    monkeypatch.setattr(load_data, "natural_key_conflicts",
+                        lambda *args: [("SO45080", 1, "already in fact_sales_2020")])
+
+    with pytest.raises(ValueError, match="SO45080"):
+        swap_year_partition(swap, "fact_sales", 2021, [], [], natural_key=load_data.SALES_NATURAL_KEY)
+
+    assert not any("DETACH" in statement or "ATTACH" in statement for statement in swap.statements)
+
+
+def test_swap_replaces_the_partition_when_keys_are_unique(swap, monkeypatch):
+    monkeypatch.setattr(load_data, "natural_key_conflicts", lambda *args: [])
+
+    assert swap_year_partition(swap, "fact_sales", 2021, [], [], natural_key=load_data.SALES_NATURAL_KEY) == 3
+    assert "ALTER TABLE fact_sales DETACH PARTITION fact_sales_2021;" in swap.statements
+    assert ("ALTER TABLE fact_sales ATTACH PARTITION fact_sales_2021 "
+            "FOR VALUES FROM ('2021-01-01') TO ('2022-01-01');") in swap.statements
@@ -0,0 +1,151 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+import utils.result_cache as result_cache
+from utils.result_cache import ResultCache, invalidate_tables, normalize_sql, referenced_tables
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "RESULT_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def cache(cache_dir):
+    return ResultCache(ttl_seconds=60, max_bytes=1024 * 1024, cache_dir=str(cache_dir), persist=False)
+
+
+def frame(rows=3):
+    return pd.DataFrame({"region": [f"r{i}" for i in range(rows)], "revenue": range(rows)})
+
+
+def test_normalize_collapses_whitespace_and_case():
+    assert normalize_sql("SELECT  region,\n\tSUM(revenue)\nFROM fact_sales;") == \
+        "select region, sum(revenue) from fact_sales"
+
+
+def test_normalize_keeps_string_literals():
+    assert normalize_sql("SELECT * FROM dim_products WHERE color = 'Red  Bike'") == \
+        "select * from dim_products where color = 'Red  Bike'"
+    assert normalize_sql("SELECT 'It''s'  AS  x") == "select 'It''s' as x"
+
+
+def test_literals_are_part_of_the_key():
+    assert ResultCache.key_for("SELECT * FROM t WHERE c = 'Red'") != \
+        ResultCache.key_for("SELECT * FROM t WHERE c = 'red'")
+    assert ResultCache.key_for("select *  from t") == ResultCache.key_for("SELECT * FROM t;")
+
+
+def test_referenced_tables():
+    sql = """
+        SELECT p.product_name, SUM(s.revenue)
+        FROM fact_sales s
+        JOIN dim_products p ON s.product_key = p.product_key
+        LEFT JOIN Dim_Territories t ON s.territory_key = t.sales_territory_key
+        WHERE p.color = 'from red join blue'
+        GROUP BY p.product_name
+    """
+    assert referenced_tables(sql) == ["dim_products", "dim_territories", "fact_sales"]
+
+
+def test_referenced_tables_include_comma_joins():
+    sql = "SELECT * FROM fact_sales s, dim_products AS p, dim_calendar WHERE s.product_key = p.product_key"
+    assert referenced_tables(sql) == ["dim_calendar", "dim_products", "fact_sales"]
+
+
+def test_referenced_tables_drop_the_schema():
+    sql = "SELECT * FROM public.fact_sales s JOIN public.dim_products p ON s.product_key = p.product_key"
+    assert referenced_tables(sql) == ["dim_products", "fact_sales"]
+
+
+def test_schema_qualified_results_are_invalidated(cache):
+    cache.put("SELECT * FROM public.fact_sales", frame(), created_at=time.time() - 10)
+    invalidate_tables(["fact_sales"])
+    assert cache.get("SELECT * FROM public.fact_sales") is None
+
+
+def test_get_returns_what_was_put(cache):
+    df = frame()
+    cache.put("SELECT * FROM fact_sales", df)
+    assert cache.get("select *\nfrom fact_sales;") is df
+    assert cache.get("SELECT * FROM fact_returns") is None
+
+
+def test_expired_entries_are_dropped(cache):
+    cache.put("SELECT * FROM fact_sales", frame(), created_at=time.time() - 120)
+    assert cache.get("SELECT * FROM fact_sales") is None
+
+
+def test_reloading_a_table_invalidates_results_that_read_it(cache):
+    created_at = time.time() - 10
+    cache.put("SELECT * FROM fact_sales s JOIN dim_products p ON s.product_key = p.product_key",
+              frame(), created_at=created_at)
+    cache.put("SELECT * FROM dim_territories", frame(), created_at=created_at)
+
+    invalidate_tables(["dim_products"])
+
+    assert cache.get("SELECT * FROM fact_sales s JOIN dim_products p ON s.product_key = p.product_key") is None
+    assert cache.get("SELECT * FROM dim_territories") is not None
+
+
+def test_invalidation_is_shared_through_the_stamp_file(cache_dir):
+    invalidate_tables(["fact_sales"])
+    invalidate_tables(["fact_returns"])
+
+    stamped = ResultCache(cache_dir=str(cache_dir))._table_versions()
+    assert set(stamped) == {"fact_sales", "fact_returns"}
+
+
+def test_least_recently_used_entries_are_evicted_first(cache_dir):
+    size = int(frame().memory_usage(deep=True).sum())
+    cache = ResultCache(ttl_seconds=60, max_bytes=2 * size, cache_dir=str(cache_dir), persist=False)
+
+    cache.put("SELECT 1 FROM a", frame())
+    cache.put("SELECT 1 FROM b", frame())
+    cache.get("SELECT 1 FROM a")
+    cache.put("SELECT 1 FROM c", frame())
+
+    assert cache.get("SELECT 1 FROM a") is not None
+    assert cache.get("SELECT 1 FROM b") is None
+    assert cache.get("SELECT 1 FROM c") is not None
+
+
+def test_results_larger_than_the_cache_are_not_kept(cache_dir):
+    cache = ResultCache(ttl_seconds=60, max_bytes=10, cache_dir=str(cache_dir), persist=False)
+    cache.put("SELECT * FROM fact_sales", frame())
+    assert cache.get("SELECT * FROM fact_sales") is None
+
+
+def write_entry(cache_dir, key, size, used_at):
+    for suffix, payload in ((".parquet", b"x" * size), (".json", b"{}")):
+        path = cache_dir / f"{key}{suffix}"
+        path.write_bytes(payload)
+        os.utime(path, (used_at, used_at))
+
+
+def test_disk_tier_drops_least_recently_used_files_over_its_budget(cache_dir):
+    cache = ResultCache(cache_dir=str(cache_dir), persist=True, disk_max_bytes=250)
+    now = time.time()
+    write_entry(cache_dir, "old", 100, now - 30)
+    write_entry(cache_dir, "recent", 100, now - 10)
+    write_entry(cache_dir, "new", 100, now)
+    invalidate_tables(["fact_sales"])
+
+    cache._trim_disk()
+
+    assert sorted(path.name for path in cache_dir.iterdir()) == [
+        "_table_versions.json", "new.json", "new.parquet", "recent.json", "recent.parquet",
+    ]
+
+
+def test_disk_round_trip_within_budget(cache_dir):
+    pytest.importorskip("pyarrow")
+    cache = ResultCache(cache_dir=str(cache_dir), persist=True, disk_max_bytes=10 * 1024 * 1024)
+    cache.put("SELECT * FROM fact_sales", frame())
+
+    restarted = ResultCache(cache_dir=str(cache_dir), persist=True)
+    assert restarted.get("SELECT * FROM fact_sales").equals(frame())
@@ -0,0 +1,62 @@
+import pytest
+
+import prompts.schema_retriever as schema_retriever
+from prompts.schema_retriever import select_aggregate, select_metrics, select_tables
+
+
+@pytest.fixture(autouse=True)
+def aggregates_enabled(monkeypatch):
+    monkeypatch.setattr(schema_retriever, "USE_AGGREGATES", True)
+
+
+@pytest.mark.parametrize("goal", [
+    "average monthly revenue by category",
+    "percentage of revenue by region",
+    "revenue today",
+    "sales on monday",
+])
+def test_short_keywords_match_whole_words_only(goal):
+    assert "dim_customers" not in select_tables(goal)
+
+
+@pytest.mark.parametrize("goal, aggregate", [
+    ("revenue by category", "agg_subcategory_monthly"),
+    ("average monthly revenue by category", "agg_subcategory_monthly"),
+    ("return rate by region", "agg_subcategory_monthly"),
+    ("top 10 products by revenue", "agg_sales_monthly"),
+    ("revenue by product category", "agg_subcategory_monthly"),
+    ("daily sales last week", "agg_sales_daily"),
+])
+def test_rollup_goals_use_the_smallest_aggregate(goal, aggregate):
+    tables = select_tables(goal)
+    assert aggregate in tables
+    assert "fact_sales" not in tables
+    assert "fact_returns" not in tables
+
+
+@pytest.mark.parametrize("goal", [
+    "revenue by customer gender",
+    "customer age distribution",
+    "number of orders per month",
+    "average order value by country",
+])
+def test_customer_and_order_goals_use_the_facts(goal):
+    tables = select_tables(goal)
+    assert "fact_sales" in tables
+    assert not any(table.startswith("agg_") for table in tables)
+
+
+def test_aggregates_disabled(monkeypatch):
+    monkeypatch.setattr(schema_retriever, "USE_AGGREGATES", False)
+    assert select_aggregate("revenue by category", {"fact_sales"}) is None
+    assert "fact_sales" in select_tables("revenue by category")
+
+
+def test_category_goal_walks_product_hierarchy_to_facts(monkeypatch):
+    monkeypatch.setattr(schema_retriever, "USE_AGGREGATES", False)
+    tables = select_tables("revenue by category")
+    assert {"fact_sales", "dim_products", "dim_product_subcategories", "dim_product_categories"} <= set(tables)
+
+
+def test_ratio_metrics_pull_their_dependencies():
+    assert select_metrics("profit margin by region") == ["revenue", "profit", "profit_margin"]
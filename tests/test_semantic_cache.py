@@ -0,0 +1,67 @@
+import pytest
+
+from utils.semantic_cache import SemanticCache, guard_terms, scope_terms, value_terms
+
+
+def cache_with(question, sql="SELECT 1", threshold=0.9):
+    cache = SemanticCache(threshold=threshold)
+    cache.remember(question, {"analysis_goal": question}, sql)
+    return cache
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("What are our best-selling products?", "What are the best sellers products?"),
+    ("Which products have the highest profit margin?", "Which products have the highest profit margins?"),
+    ("revenue by country", "Show me revenue by country"),
+])
+def test_rephrased_question_hits(cached, asked):
+    hit = cache_with(cached).lookup(asked)
+    assert hit is not None
+    assert hit["question"] == cached
+
+
+# Near misses that share most of their wording but not their meaning; a
+# low threshold makes sure the exact-match key rejects them, not the score
+@pytest.mark.parametrize("cached, asked", [
+    ("total revenue by product category", "total revenue by product subcategory"),
+    ("profit margin by product category", "profit margin by product subcategory"),
+    ("return rate by product category", "return rate by product subcategory"),
+    ("average annual income of customers", "average annual income of customers by gender"),
+    ("revenue by region", "profit by region"),
+    ("top 5 products by revenue", "top 10 products by revenue"),
+    ("highest revenue products", "lowest revenue products"),
+    ("revenue last month", "revenue last quarter"),
+    ("What is the total revenue from customers living in the Southwest region?",
+     "What is the total revenue from customers living in the Northwest region?"),
+    ("revenue from Mountain-200 Black, 38", "revenue from Mountain-200 Silver, 38"),
+    ("revenue by subcategory in Germany", "revenue by subcategory in France"),
+])
+def test_near_miss_does_not_hit(cached, asked):
+    assert cache_with(cached, threshold=0.5).lookup(asked) is None
+
+
+def test_scope_separates_category_from_subcategory():
+    assert "category" in scope_terms("revenue by category")
+    assert "category" not in scope_terms("revenue by subcategory")
+    assert "subcategory" in scope_terms("revenue by sub-category")
+
+
+def test_value_terms_keep_what_a_question_filters_on():
+    assert value_terms("Total revenue from customers living in the Northwest region?") == \
+        ["from", "living", "northwest"]
+    assert value_terms("What are our best-selling products?") == []
+
+
+def test_guard_terms_keep_numbers_and_direction():
+    assert guard_terms("top 5 products") == ["5", "best"]
+
+
+def test_remember_replaces_same_question():
+    cache = cache_with("revenue by country", sql="SELECT 1")
+    cache.remember("Revenue by country?", {}, "SELECT 2")
+    assert len(cache) == 1
+    assert cache.lookup("revenue by country")["sql"] == "SELECT 2"
+
+
+def test_empty_cache_misses():
+    assert SemanticCache().lookup("revenue by country") is None
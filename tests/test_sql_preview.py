@@ -0,0 +1,108 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+import tools.data_extractor_tool as data_extractor_tool
+from tools.data_extractor_tool import close_pages, collect_pages, run_sql_preview
+
+ROWS = 25
+NUMBERS = "SELECT n FROM numbers ORDER BY n"
+FAILS = "SELECT abs(-9223372036854775808) AS n FROM numbers"
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'numbers.sqlite'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE numbers (n INTEGER)"))
+        conn.execute(text("INSERT INTO numbers VALUES (:n)"), [{"n": n} for n in range(1, ROWS + 1)])
+
+    monkeypatch.setattr(data_extractor_tool, "engine", engine)
+    monkeypatch.setattr(data_extractor_tool, "RESULT_CACHE_ENABLED", False)
+    yield engine
+    engine.dispose()
+
+
+def checked_out(engine):
+    return engine.pool.checkedout()
+
+
+def test_preview_fetches_only_the_first_page(engine):
+    result = run_sql_preview("q", NUMBERS, page_size=10)
+
+    assert result["success"] and not result["complete"]
+    assert list(result["data"]["n"]) == list(range(1, 11))
+    assert checked_out(engine) == 1
+
+    full = collect_pages(result)
+    assert full["complete"] and not full["truncated"]
+    assert list(full["data"]["n"]) == list(range(1, ROWS + 1))
+    assert checked_out(engine) == 0
+
+
+def test_result_smaller_than_a_page_is_complete_and_released(engine):
+    result = run_sql_preview("q", NUMBERS, page_size=ROWS + 1)
+
+    assert result["complete"]
+    assert result["rows"] == ROWS
+    assert checked_out(engine) == 0
+    assert collect_pages(result)["data"] is result["data"]
+
+
+def test_result_of_exactly_one_page(engine):
+    result = run_sql_preview("q", NUMBERS, page_size=ROWS)
+
+    assert not result["complete"]
+    assert collect_pages(result)["rows"] == ROWS
+    assert checked_out(engine) == 0
+
+
+def test_row_cap_across_pages(engine):
+    full = collect_pages(run_sql_preview("q", NUMBERS, page_size=10, max_rows=20))
+
+    assert full["truncated"]
+    assert list(full["data"]["n"]) == list(range(1, 21))
+    assert checked_out(engine) == 0
+
+
+def test_row_cap_within_the_first_page(engine):
+    result = run_sql_preview("q", NUMBERS, page_size=10, max_rows=5)
+
+    assert result["complete"] and result["truncated"]
+    assert result["rows"] == 5
+    assert checked_out(engine) == 0
+
+
+def test_close_pages_releases_the_connection(engine):
+    result = run_sql_preview("q", NUMBERS, page_size=10)
+    assert checked_out(engine) == 1
+
+    close_pages(result)
+    assert checked_out(engine) == 0
+
+
+def test_error_while_collecting_releases_the_connection(engine, monkeypatch):
+    read_sql = data_extractor_tool.pd.read_sql
+
+    def first_page_then_fail(*args, **kwargs):
+        pages = read_sql(*args, **kwargs)
+        yield next(pages)
+        raise ConnectionError("server closed the connection unexpectedly")
+
+    monkeypatch.setattr(data_extractor_tool.pd, "read_sql", first_page_then_fail)
+    result = run_sql_preview("q", NUMBERS, page_size=10)
+    assert result["success"]
+
+    full = collect_pages(result)
+
+    assert not full["success"]
+    assert full["reason"] == "db_error"
+    assert "server closed" in full["error"]
+    assert checked_out(engine) == 0
+
+
+def test_error_in_the_first_page_releases_the_connection(engine):
+    result = run_sql_preview("q", FAILS, page_size=10)
+
+    assert not result["success"]
+    assert result["reason"] == "db_error"
+    assert checked_out(engine) == 0
@@ -1,61 +1,417 @@
+import json
+import logging
 import os
 import pandas as pd
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from utils.result_cache import result_cache, RESULT_CACHE_ENABLED
+from utils.tracing import current_span, traced
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
 DB_NAME = os.getenv("DB_NAME")
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 
-engine = create_engine(
+# Connection pool sizing, shared by every Streamlit session in the process
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# Per-query guards, enforced by the database rather than in Python
+SQL_STATEMENT_TIMEOUT_MS = int(os.getenv("SQL_STATEMENT_TIMEOUT_MS", "30000"))
+SQL_MAX_ROWS = int(os.getenv("SQL_MAX_ROWS", "10000"))
+# Rows per page when results are streamed with run_sql_preview / stream_sql
+SQL_PAGE_SIZE = int(os.getenv("SQL_PAGE_SIZE", "500"))
+
+# Pre-execution EXPLAIN budget for generated SQL (Postgres only): plans
+# above either estimate, or with a nested loop comparing more than
+# SQL_MAX_NESTED_LOOP_ROWS row pairs without an index, are not run
+SQL_COST_GATE_ENABLED = os.getenv("SQL_COST_GATE_ENABLED", "true").lower() == "true"
+SQL_MAX_PLAN_COST = float(os.getenv("SQL_MAX_PLAN_COST", "1000000"))
+SQL_MAX_PLAN_ROWS = float(os.getenv("SQL_MAX_PLAN_ROWS", "10000000"))
+SQL_MAX_NESTED_LOOP_ROWS = float(os.getenv("SQL_MAX_NESTED_LOOP_ROWS", "1000000"))
+# Plan nodes listed in a rejection
+PLAN_SUMMARY_NODES = 12
+
+# Postgres SQLSTATE for "canceling statement due to statement timeout"
+QUERY_CANCELED = "57014"
+
+# Overrides the DB_* settings, e.g. sqlite:///.cache/adventureworks.sqlite
+# for the offline benchmark copy built by benchmarks/build_sqlite_db.py
+DATABASE_URL = os.getenv("DATABASE_URL") or (
     f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
 
-def run_sql(question: str, sql: str):
+engine = create_engine(
+    DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+)
+
+# Postgres-only guards such as statement_timeout are skipped on other databases
+IS_POSTGRES = engine.dialect.name == "postgresql"
+
+
+def set_statement_timeout(conn, timeout_ms: int):
+    """Limit the current transaction's statements to ``timeout_ms`` (Postgres only)."""
+    if IS_POSTGRES:
+        # SET LOCAL only lasts for this transaction, so the pooled
+        # connection goes back to the pool with its defaults
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+def cap_rows(sql: str, max_rows: int) -> str:
+    """Wrap a SELECT so the server stops after ``max_rows + 1`` rows.
+
+    The extra row tells the caller the result was truncated.
+    """
+    body = sql.strip().rstrip(";")
+    return f"SELECT * FROM (\n{body}\n) AS capped_result LIMIT {int(max_rows) + 1}"
+
+
+def is_timeout(error: Exception) -> bool:
+    """True when the database cancelled the statement on statement_timeout."""
+    orig = getattr(error, "orig", None)
+    sqlstate = getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+    return sqlstate == QUERY_CANCELED
+
+
+def walk_plan(node, depth=0):
+    """Yield (depth, node) for an EXPLAIN (FORMAT JSON) plan tree."""
+    yield depth, node
+    for child in node.get("Plans", []):
+        yield from walk_plan(child, depth + 1)
+
+
+def explain_plan(conn, sql: str):
+    """The planner's estimated plan for ``sql``, without running it."""
+    result = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+    return (json.loads(result) if isinstance(result, str) else result)[0]["Plan"]
+
+
+def plan_violations(plan):
+    """Reasons a plan is over budget; empty when it may run.
+
+    A nested loop whose inner side is not an index lookup compares every
+    outer row with every inner row: without a join condition that is a
+    cartesian product, with only a join filter it is an unbounded loop.
+    """
+    violations = []
+
+    if plan["Total Cost"] > SQL_MAX_PLAN_COST:
+        violations.append(
+            f"estimated cost {plan['Total Cost']:,.0f} exceeds the budget of {SQL_MAX_PLAN_COST:,.0f}"
+        )
+
+    max_rows = max(node["Plan Rows"] for _, node in walk_plan(plan))
+    if max_rows > SQL_MAX_PLAN_ROWS:
+        violations.append(
+            f"a plan step produces an estimated {max_rows:,.0f} rows "
+            f"(budget {SQL_MAX_PLAN_ROWS:,.0f})"
+        )
+
+    for _, node in walk_plan(plan):
+        if node["Node Type"] != "Nested Loop" or len(node.get("Plans", [])) != 2:
+            continue
+        outer, inner = node["Plans"]
+        if any("Index Cond" in child for _, child in walk_plan(inner)):
+            continue
+        pairs = outer["Plan Rows"] * inner["Plan Rows"]
+        if pairs <= SQL_MAX_NESTED_LOOP_ROWS:
+            continue
+        kind = "unbounded nested loop" if "Join Filter" in node else "cartesian join (no join condition)"
+        violations.append(
+            f"{kind} over {outer['Plan Rows']:,.0f} x {inner['Plan Rows']:,.0f} rows"
+            + (f" on {node['Join Filter']}" if "Join Filter" in node else "")
+        )
+
+    return violations
+
+
+def summarize_plan(plan, limit=PLAN_SUMMARY_NODES):
+    """Indented one-line-per-node outline of a plan, like EXPLAIN's text format."""
+    lines = []
+    for depth, node in walk_plan(plan):
+        if len(lines) == limit:
+            lines.append("  ...")
+            break
+        target = node.get("Relation Name") or node.get("CTE Name") or ""
+        condition = next(
+            (node[key] for key in ("Hash Cond", "Merge Cond", "Join Filter", "Index Cond") if key in node),
+            ""
+        )
+        lines.append(
+            f"{'  ' * depth}{node['Node Type']}"
+            + (f" on {target}" if target else "")
+            + (f" {condition}" if condition else "")
+            + f" (cost={node['Total Cost']:,.0f} rows={node['Plan Rows']:,.0f})"
+        )
+    return "\n".join(lines)
+
+
+def cost_gate(question, sql, max_rows, timeout_ms):
+    """EXPLAIN ``sql`` as it would run and reject it if over budget.
+
+    Returns a ``cost_rejected`` run_sql result with the plan summary, or
+    None when the query may run (or the gate does not apply).
+    """
+    if not (IS_POSTGRES and SQL_COST_GATE_ENABLED):
+        return None
+
+    with engine.begin() as conn:
+        set_statement_timeout(conn, timeout_ms)
+        plan = explain_plan(conn, cap_rows(sql, max_rows))
+
+    active = current_span()
+    if active is not None:
+        active.set(plan_cost=plan["Total Cost"], plan_rows=plan["Plan Rows"])
+
+    violations = plan_violations(plan)
+    if not violations:
+        return None
+
+    summary = summarize_plan(plan)
+    logger.warning("DB cost gate: query rejected (%s).", "; ".join(violations))
+
+    return build_result(
+        question, sql, False,
+        reason="cost_rejected",
+        error=(
+            "Query not run: its plan is over the cost budget.\n"
+            + "".join(f"- {violation}\n" for violation in violations)
+            + "Rewrite it to scan less data: join every table on its key, "
+            "filter by date and aggregate before joining.\n"
+            f"Plan:\n{summary}"
+        ),
+        plan_summary={
+            "total_cost": plan["Total Cost"],
+            "plan_rows": plan["Plan Rows"],
+            "violations": violations,
+            "plan": summary,
+        }
+    )
+
+
+def build_result(question, sql, success, reason=None, error=None, data=None, **extra):
+    """Assemble the dict every run_sql caller consumes."""
+    data = data if data is not None else pd.DataFrame()
+    return {
+        "success": success,
+        "reason": reason,
+        "error": error,
+        "rows": len(data),
+        "data": data,
+        "sql": sql,
+        "question": question,
+        **extra
+    }
+
+
+def record_sql_result(span, result):
+    """Attach a run_sql result's outcome to its trace span."""
+    span.set(
+        success=result["success"],
+        reason=result["reason"],
+        rows=result["rows"],
+        truncated=result.get("truncated", False),
+        cached=result.get("cached", False),
+    )
+
+
+def cached_result(question, sql, max_rows):
+    """Return a run_sql result from the result cache, or None on a miss."""
+    if not RESULT_CACHE_ENABLED:
+        return None
+
+    cached = result_cache.get(sql)
+    if cached is None:
+        return None
+
+    logger.info("DB cache hit: returning %d cached rows.", len(cached))
+
+    return build_result(
+        question, sql, True,
+        data=cached.head(max_rows),
+        truncated=len(cached) > max_rows,
+        cached=True
+    )
+
+
+def error_result(question, sql, error, timeout_ms):
+    """Turn a failed query into a run_sql result with a reason."""
+    if is_timeout(error):
+        logger.warning("DB timeout: query cancelled after %d ms.", timeout_ms)
+
+        return build_result(
+            question, sql, False,
+            reason="timeout",
+            error=(
+                f"Query cancelled after the {timeout_ms} ms statement timeout. "
+                "Rewrite it to scan less data: filter by date, aggregate earlier "
+                "and make sure every join has a key."
+            )
+        )
+
+    logger.error("DB error: %s", error)
+
+    return build_result(question, sql, False, reason="db_error", error=str(error))
+
+
+@traced("run_sql", record=record_sql_result)
+def run_sql(question: str, sql: str, timeout_ms: int = None, max_rows: int = None):
+    timeout_ms = timeout_ms or SQL_STATEMENT_TIMEOUT_MS
+    max_rows = max_rows or SQL_MAX_ROWS
+
+    cached = cached_result(question, sql, max_rows)
+    if cached is not None:
+        return cached
+
     try:
-        df = pd.read_sql(sql, engine)
+        rejected = cost_gate(question, sql, max_rows, timeout_ms)
+        if rejected is not None:
+            return rejected
+
+        with engine.begin() as conn:
+            set_statement_timeout(conn, timeout_ms)
+            df = pd.read_sql(cap_rows(sql, max_rows), conn)
+
+        truncated = len(df) > max_rows
+        if truncated:
+            df = df.head(max_rows)
+            logger.warning("DB result capped at %d rows.", max_rows)
 
         if df.empty:
-            print("DB WARNING: Query returned no results.")
-
-            return {
-                "success": False,
-                "reason": "empty_result",
-                "error": None,
-                "rows": 0,
-                "data": df,
-                "sql": sql,
-                "question": question
-            }
-
-        print("DB SUCCESS: Retrieved", len(df), "rows.")
-
-        return {
-            "success": True,
-            "reason": None,
-            "error": None,
-            "rows": len(df),
-            "data": df,
-            "sql": sql,
-            "question": question
-        }
+            logger.warning("DB query returned no results.")
+
+            return build_result(question, sql, False, reason="empty_result", data=df)
+
+        logger.info("DB success: retrieved %d rows.", len(df))
+
+        # Capped results depend on max_rows, so only complete ones are reused
+        if RESULT_CACHE_ENABLED and not truncated:
+            result_cache.put(sql, df)
+
+        return build_result(question, sql, True, data=df, truncated=truncated)
 
     except Exception as e:
-        print("DB ERROR:", e)
-
-        return {
-            "success": False,
-            "reason": "db_error",
-            "error": str(e),
-            "rows": 0,
-            "data": pd.DataFrame(),
-            "sql": sql,
-            "question": question
-        }
+        return error_result(question, sql, e, timeout_ms)
+
+
+def stream_sql(sql: str, page_size: int = None, timeout_ms: int = None, max_rows: int = None):
+    """Yield the result of ``sql`` as DataFrame pages from a server-side cursor.
+
+    Rows are fetched from the database one page at a time, so nothing beyond
+    the current page is held in memory. The connection stays checked out
+    until the generator is exhausted or closed.
+    """
+    page_size = page_size or SQL_PAGE_SIZE
+    timeout_ms = timeout_ms or SQL_STATEMENT_TIMEOUT_MS
+    max_rows = max_rows or SQL_MAX_ROWS
+
+    with engine.connect().execution_options(stream_results=True, max_row_buffer=page_size) as conn:
+        with conn.begin():
+            set_statement_timeout(conn, timeout_ms)
+            yield from pd.read_sql(cap_rows(sql, max_rows), conn, chunksize=page_size)
+
+
+@traced("run_sql_preview", record=record_sql_result)
+def run_sql_preview(question: str, sql: str, page_size: int = None,
+                    timeout_ms: int = None, max_rows: int = None):
+    """Run ``sql`` but only fetch its first page before returning.
+
+    The result looks like run_sql's, with ``data`` holding the first page.
+    ``pages`` is a lazy iterator over the remaining pages and ``complete``
+    says whether the first page already is the whole result. Use
+    collect_pages() when the full frame is needed.
+    """
+    page_size = page_size or SQL_PAGE_SIZE
+    max_rows = max_rows or SQL_MAX_ROWS
+
+    cached = cached_result(question, sql, max_rows)
+    if cached is not None:
+        return {**cached, "pages": iter(()), "complete": True, "max_rows": max_rows}
+
+    try:
+        rejected = cost_gate(question, sql, max_rows, timeout_ms or SQL_STATEMENT_TIMEOUT_MS)
+    except Exception as e:
+        return error_result(question, sql, e, timeout_ms or SQL_STATEMENT_TIMEOUT_MS)
+    if rejected is not None:
+        return rejected
+
+    pages = stream_sql(sql, page_size, timeout_ms, max_rows)
+    try:
+        first_page = next(pages, pd.DataFrame())
+    except Exception as e:
+        pages.close()
+        return error_result(question, sql, e, timeout_ms or SQL_STATEMENT_TIMEOUT_MS)
+
+    complete = len(first_page) < page_size
+    truncated = False
+    if complete:
+        pages.close()
+        truncated = len(first_page) > max_rows
+        first_page = first_page.head(max_rows)
+
+    if first_page.empty:
+        logger.warning("DB query returned no results.")
+
+        return build_result(question, sql, False, reason="empty_result", data=first_page)
+
+    logger.info("DB preview: retrieved first %d rows.", len(first_page))
+
+    if RESULT_CACHE_ENABLED and complete and not truncated:
+        result_cache.put(sql, first_page)
+
+    return build_result(
+        question, sql, True,
+        data=first_page,
+        pages=iter(()) if complete else pages,
+        complete=complete,
+        truncated=truncated,
+        max_rows=max_rows
+    )
+
+
+@traced("collect_pages", record=record_sql_result)
+def collect_pages(result):
+    """Materialise a run_sql_preview result into a full run_sql result."""
+    if not result["success"] or result.get("complete", True):
+        return {**result, "complete": True}
+
+    max_rows = result["max_rows"]
+    try:
+        df = pd.concat([result["data"], *result["pages"]], ignore_index=True)
+    except Exception as e:
+        close_pages(result)
+        return error_result(result["question"], result["sql"], e, SQL_STATEMENT_TIMEOUT_MS)
+
+    truncated = len(df) > max_rows
+    if truncated:
+        df = df.head(max_rows)
+        logger.warning("DB result capped at %d rows.", max_rows)
+
+    logger.info("DB success: retrieved %d rows.", len(df))
+
+    if RESULT_CACHE_ENABLED and not truncated:
+        result_cache.put(result["sql"], df)
+
+    return build_result(
+        result["question"], result["sql"], True,
+        data=df, truncated=truncated, complete=True
+    )
 
-    
 
+def close_pages(result):
+    """Release the connection behind a preview that will not be collected."""
+    pages = result.get("pages")
+    if hasattr(pages, "close"):
+        pages.close()
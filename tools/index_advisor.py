@@ -0,0 +1,501 @@
+"""
+Index advisor driven by the logged agent SQL.
+
+Replays the queries saved by append_result_to_csv (data_3.csv by default)
+with EXPLAIN (ANALYZE, BUFFERS, VERBOSE, FORMAT JSON), aggregates which
+tables are sequentially scanned and which of their columns the queries
+filter, join, group and read, and proposes:
+
+- composite B-tree indexes on the filter + join keys of scanned tables,
+  with the columns the scans read as INCLUDE columns (index-only scans)
+- BRIN indexes on range-filtered date columns whose rows are stored in
+  date order (pg_stats correlation), e.g. fact_sales.order_date
+
+With --apply the proposals are created and every query is replayed again,
+reporting its execution time before and after. Postgres only.
+
+Usage:
+    python -m tools.index_advisor [--log data_3.csv] [--apply] [--output advice.json]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+from collections import Counter, defaultdict
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from tools.data_extractor_tool import (
+    IS_POSTGRES,
+    SQL_STATEMENT_TIMEOUT_MS,
+    engine,
+    set_statement_timeout,
+)
+from utils.tracing import configure_logging
+
+load_dotenv()
+
+DEFAULT_LOG_FILES = ["data_3.csv"]
+
+# Tables smaller than this are cheaper to scan than to index
+INDEX_ADVISOR_MIN_ROWS = int(os.getenv("INDEX_ADVISOR_MIN_ROWS", "10000"))
+# EXPLAIN ANALYZE runs per query; the median execution time is reported
+INDEX_ADVISOR_RUNS = int(os.getenv("INDEX_ADVISOR_RUNS", "3"))
+# Columns a covering index may carry in INCLUDE
+INDEX_ADVISOR_MAX_INCLUDE = int(os.getenv("INDEX_ADVISOR_MAX_INCLUDE", "4"))
+# |pg_stats.correlation| above which a date column gets a BRIN index
+BRIN_MIN_CORRELATION = float(os.getenv("BRIN_MIN_CORRELATION", "0.9"))
+
+# Postgres truncates identifiers longer than this
+MAX_IDENTIFIER_LENGTH = 63
+
+DATE_TYPES = {"date", "timestamp without time zone", "timestamp with time zone"}
+
+# Strip literals and casts before looking for column names, so '2022-01-01'
+# or ::date are not mistaken for columns
+LITERAL = re.compile(r"'(?:[^']|'')*'")
+CAST = re.compile(r"::[a-z_ ]+?(?=[\s),]|$)(?:\[\])?")
+QUALIFIED_COLUMN = re.compile(r"\b([a-z_][a-z0-9_]*)\.([a-z_][a-z0-9_]*)\b")
+IDENTIFIER = re.compile(r"\b([a-z_][a-z0-9_]*)\b")
+
+JOIN_CONDITIONS = ("Hash Cond", "Merge Cond", "Join Filter")
+FILTER_CONDITIONS = ("Filter", "Index Cond", "Recheck Cond")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Propose indexes from the logged agent SQL.")
+    parser.add_argument("--log", nargs="*", default=DEFAULT_LOG_FILES,
+                        help="CSV files with a 'sql_query' column (see save_results.py)")
+    parser.add_argument("--runs", type=int, default=INDEX_ADVISOR_RUNS,
+                        help="EXPLAIN ANALYZE runs per query")
+    parser.add_argument("--apply", action="store_true",
+                        help="Create the proposed indexes and replay the log again")
+    parser.add_argument("--output", help="Write proposals and per-query timings as JSON")
+    return parser.parse_args()
+
+
+def load_query_log(paths):
+    """Distinct read-only statements from the SQL logs, in first-seen order."""
+    queries = []
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"SQL log not found, skipping: {path}")
+            continue
+        queries.extend(pd.read_csv(path)["sql_query"].dropna().astype(str))
+
+    statements = dict.fromkeys(query.strip().rstrip(";").strip() for query in queries)
+    return [sql for sql in statements if sql.lower().startswith(("select", "with"))]
+
+
+# -------- Catalog --------
+
+def load_catalog(conn):
+    """Row counts, column types, partition parents and existing indexes."""
+    rows = conn.exec_driver_sql("""
+        SELECT c.relname, GREATEST(c.reltuples, 0)::bigint
+        FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p', 'm')
+    """).fetchall()
+    row_counts = dict(rows)
+
+    columns = defaultdict(dict)
+    for table_name, column, data_type in conn.exec_driver_sql("""
+        SELECT c.relname, a.attname, format_type(a.atttypid, a.atttypmod)
+        FROM pg_attribute a
+        JOIN pg_class c ON c.oid = a.attrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p', 'm')
+          AND a.attnum > 0 AND NOT a.attisdropped
+    """):
+        columns[table_name][column] = data_type
+
+    parents = dict(conn.exec_driver_sql("""
+        SELECT c.relname, p.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+    """).fetchall())
+
+    indexes = defaultdict(list)
+    for table_name, method, key_columns in conn.exec_driver_sql("""
+        SELECT t.relname, am.amname,
+               ARRAY(
+                   SELECT a.attname
+                   FROM unnest(ix.indkey[0:ix.indnkeyatts - 1]) WITH ORDINALITY AS k(attnum, ord)
+                   JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum
+                   ORDER BY k.ord
+               )
+        FROM pg_index ix
+        JOIN pg_class i ON i.oid = ix.indexrelid
+        JOIN pg_class t ON t.oid = ix.indrelid
+        JOIN pg_am am ON am.oid = i.relam
+        JOIN pg_namespace n ON n.oid = t.relnamespace
+        WHERE n.nspname = 'public'
+    """):
+        indexes[table_name].append((method, list(key_columns)))
+
+    return {"rows": with_partition_rows(row_counts, parents), "columns": columns,
+            "parents": parents, "indexes": indexes}
+
+
+def with_partition_rows(row_counts, parents):
+    """Give each partitioned table the rows of its partitions.
+
+    A partitioned parent stores nothing itself, so its own reltuples is 0
+    (or only an estimate from ANALYZE on the parent).
+    """
+    totals = defaultdict(int)
+    for child, parent in parents.items():
+        totals[parent] += row_counts.get(child, 0)
+    return {
+        table_name: max(rows, totals.get(table_name, 0))
+        for table_name, rows in row_counts.items()
+    }
+
+
+def correlation(conn, table_name, column):
+    """Physical order correlation of a column, or 0 without statistics.
+
+    For a partitioned table this is the row-weighted mean over its
+    partitions' own statistics: a BRIN index on the parent is built per
+    partition, and the parent has no physical order of its own.
+    """
+    value = conn.exec_driver_sql("""
+        SELECT COALESCE(
+            SUM(ABS(s.correlation) * GREATEST(c.reltuples, 0)) / NULLIF(SUM(GREATEST(c.reltuples, 0)), 0),
+            AVG(ABS(s.correlation))
+        )
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        JOIN pg_stats s ON s.schemaname = n.nspname AND s.tablename = c.relname
+                       AND s.attname = %(column)s AND NOT s.inherited
+        WHERE n.nspname = 'public'
+          AND (c.relname = %(table)s
+               OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %(table)s::regclass))
+    """, {"table": table_name, "column": column}).scalar()
+    return float(value or 0)
+
+
+# -------- Replay --------
+
+def explain_analyze(sql, runs):
+    """Run EXPLAIN (ANALYZE, BUFFERS, VERBOSE, FORMAT JSON) ``runs`` times.
+
+    Each run is a read-only transaction that is rolled back, under the
+    usual statement timeout. Returns the last plan and the median
+    execution time in ms.
+    """
+    plan, times = None, []
+    for _ in range(max(1, runs)):
+        with engine.connect() as conn:
+            with conn.begin() as transaction:
+                conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+                set_statement_timeout(conn, SQL_STATEMENT_TIMEOUT_MS)
+                result = conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS, VERBOSE, FORMAT JSON) {sql}"
+                ).scalar()
+                transaction.rollback()
+
+        plan = (json.loads(result) if isinstance(result, str) else result)[0]
+        times.append(plan["Execution Time"])
+    return plan, statistics.median(times)
+
+
+def replay(queries, runs):
+    """EXPLAIN ANALYZE every logged query; failures are kept with their error."""
+    replays = []
+    for number, sql in enumerate(queries, 1):
+        try:
+            plan, ms = explain_analyze(sql, runs)
+            replays.append({"sql": sql, "plan": plan, "ms": ms, "error": None})
+            print(f"   [{number}/{len(queries)}] {ms:10.1f} ms")
+        except Exception as e:
+            error = str(getattr(e, "orig", e)).splitlines()[0]
+            replays.append({"sql": sql, "plan": None, "ms": None, "error": error})
+            print(f"   [{number}/{len(queries)}]     failed: {error[:80]}")
+    return replays
+
+
+# -------- Plan analysis --------
+
+def walk_plan(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk_plan(child)
+
+
+def strip_expression(expression):
+    return CAST.sub("", LITERAL.sub("", expression.lower()))
+
+
+def scan_columns(expression, table_columns):
+    """Columns of the scanned table referenced in a scan's condition."""
+    return [
+        column for column in dict.fromkeys(IDENTIFIER.findall(strip_expression(expression)))
+        if column in table_columns
+    ]
+
+
+def qualified_columns(expression, aliases, catalog):
+    """(table, column) pairs referenced as alias.column in an expression."""
+    found = []
+    for alias, column in QUALIFIED_COLUMN.findall(strip_expression(expression)):
+        table_name = aliases.get(alias)
+        if table_name and column in catalog["columns"].get(table_name, {}):
+            found.append((table_name, column))
+    return list(dict.fromkeys(found))
+
+
+def observe(plan, catalog):
+    """Sequential scans and column usage of one executed plan.
+
+    Partitions are reported under their parent table, since that is where
+    the indexes are created.
+    """
+    nodes = list(walk_plan(plan["Plan"]))
+    parents = catalog["parents"]
+
+    aliases = {}
+    for node in nodes:
+        if "Relation Name" in node:
+            aliases[node.get("Alias", node["Relation Name"])] = node["Relation Name"]
+
+    usage = {"filter": Counter(), "join": Counter(), "group": Counter(), "output": Counter()}
+    seq_scans = []
+
+    for node in nodes:
+        relation = node.get("Relation Name")
+        if relation:
+            table_name = parents.get(relation, relation)
+            table_columns = catalog["columns"].get(relation, {})
+            filtered = []
+            for key in FILTER_CONDITIONS:
+                if key in node:
+                    filtered.extend(scan_columns(node[key], table_columns))
+            for column in dict.fromkeys(filtered):
+                usage["filter"][(table_name, column)] += 1
+            for output in node.get("Output", []):
+                for column in scan_columns(output, table_columns):
+                    usage["output"][(table_name, column)] += 1
+
+            if node["Node Type"] == "Seq Scan":
+                seq_scans.append({
+                    "table": table_name,
+                    "relation": relation,
+                    "rows": node.get("Actual Rows", 0) * node.get("Actual Loops", 1),
+                    "removed": node.get("Rows Removed by Filter", 0),
+                    "ms": node.get("Actual Total Time", 0) * node.get("Actual Loops", 1),
+                    "buffers": node.get("Shared Hit Blocks", 0) + node.get("Shared Read Blocks", 0),
+                    "filter": list(dict.fromkeys(filtered)),
+                })
+
+        for key in JOIN_CONDITIONS:
+            if key in node:
+                for table_name, column in qualified_columns(node[key], aliases, catalog):
+                    usage["join"][(parents.get(table_name, table_name), column)] += 1
+        for key in node.get("Group Key", []):
+            for table_name, column in qualified_columns(key, aliases, catalog):
+                usage["group"][(parents.get(table_name, table_name), column)] += 1
+
+    return seq_scans, usage
+
+
+def summarize_usage(replays, catalog):
+    """Seq scans per table and column usage summed over the whole log."""
+    scans = defaultdict(lambda: {"queries": 0, "ms": 0.0, "buffers": 0, "rows": 0})
+    totals = {"filter": Counter(), "join": Counter(), "group": Counter(), "output": Counter()}
+
+    for run in replays:
+        if run["plan"] is None:
+            continue
+        seq_scans, usage = observe(run["plan"], catalog)
+        for table_name in {scan["table"] for scan in seq_scans}:
+            scans[table_name]["queries"] += 1
+        for scan in seq_scans:
+            stats = scans[scan["table"]]
+            stats["ms"] += scan["ms"]
+            stats["buffers"] += scan["buffers"]
+            stats["rows"] += scan["rows"] + scan["removed"]
+        for kind, counter in usage.items():
+            totals[kind].update(counter)
+
+    return dict(scans), totals
+
+
+# -------- Proposals --------
+
+def ranked(counter, table_name, exclude=()):
+    """The table's columns in a usage counter, most used first."""
+    return [
+        column for (table, column), _ in counter.most_common()
+        if table == table_name and column not in exclude
+    ]
+
+
+def index_exists(catalog, table_name, method, key_columns):
+    """True when an index of ``method`` already leads with ``key_columns``."""
+    return any(
+        existing_method == method and existing[:len(key_columns)] == key_columns
+        for existing_method, existing in catalog["indexes"].get(table_name, [])
+    )
+
+
+def index_name(table_name, key_columns, suffix=""):
+    return f"idx_adv_{table_name}_{'_'.join(key_columns)}{suffix}"[:MAX_IDENTIFIER_LENGTH]
+
+
+def propose_indexes(conn, scans, usage, catalog):
+    """Composite/covering B-tree and BRIN proposals for the scanned tables."""
+    proposals = []
+
+    for table_name, stats in sorted(scans.items(), key=lambda item: -item[1]["ms"]):
+        if catalog["rows"].get(table_name, 0) < INDEX_ADVISOR_MIN_ROWS:
+            continue
+        column_types = catalog["columns"].get(table_name, {})
+        filters = ranked(usage["filter"], table_name)
+        scanned = f"seq-scanned by {stats['queries']} queries ({stats['ms']:.0f} ms, {stats['buffers']:,} buffers)"
+
+        # Range filters on ordered dates are served best by a tiny BRIN
+        for column in filters:
+            if column_types.get(column) not in DATE_TYPES:
+                continue
+            if index_exists(catalog, table_name, "brin", [column]):
+                continue
+            corr = correlation(conn, table_name, column)
+            if corr >= BRIN_MIN_CORRELATION:
+                name = index_name(table_name, [column], "_brin")
+                proposals.append({
+                    "table": table_name,
+                    "name": name,
+                    "sql": f"CREATE INDEX IF NOT EXISTS {name} ON {table_name} USING brin ({column});",
+                    "reason": f"{scanned}; range filter on {column} (correlation {corr:.2f})",
+                })
+
+        # Equality filter first, then the join key the scans feed
+        key_columns = [
+            column for column in filters
+            if column_types.get(column) not in DATE_TYPES
+        ][:1]
+        key_columns += ranked(usage["join"], table_name, exclude=key_columns)[:1]
+        if not key_columns:
+            continue
+        if index_exists(catalog, table_name, "btree", key_columns):
+            continue
+
+        include = ranked(usage["output"], table_name, exclude=key_columns)[:INDEX_ADVISOR_MAX_INCLUDE]
+        include_sql = f" INCLUDE ({', '.join(include)})" if include else ""
+        name = index_name(table_name, key_columns)
+        proposals.append({
+            "table": table_name,
+            "name": name,
+            "sql": f"CREATE INDEX IF NOT EXISTS {name} ON {table_name} ({', '.join(key_columns)}){include_sql};",
+            "reason": f"{scanned}; keys {', '.join(key_columns)}"
+                      + (f", covering {', '.join(include)}" if include else ""),
+        })
+
+    return proposals
+
+
+def apply_proposals(proposals):
+    """Create the proposed indexes and refresh statistics on their tables."""
+    with engine.begin() as conn:
+        for proposal in proposals:
+            conn.exec_driver_sql(proposal["sql"])
+            print(f"   ✓ Created {proposal['name']}")
+        for table_name in dict.fromkeys(proposal["table"] for proposal in proposals):
+            conn.exec_driver_sql(f"ANALYZE {table_name}")
+
+
+# -------- Report --------
+
+def print_scans(scans, usage):
+    print("\n" + "=" * 70)
+    print("SEQUENTIAL SCANS")
+    print("=" * 70)
+    print(f"{'table':<28}{'queries':>8}{'ms':>12}{'buffers':>12}")
+    for table_name, stats in sorted(scans.items(), key=lambda item: -item[1]["ms"]):
+        print(f"{table_name:<28}{stats['queries']:>8}{stats['ms']:>12.1f}{stats['buffers']:>12,}")
+        for kind in ("filter", "join", "group"):
+            columns = ranked(usage[kind], table_name)
+            if columns:
+                print(f"   {kind + ':':<8}{', '.join(columns)}")
+
+
+def print_proposals(proposals):
+    print("\n" + "=" * 70)
+    print("PROPOSED INDEXES")
+    print("=" * 70)
+    if not proposals:
+        print("No new indexes proposed.")
+    for proposal in proposals:
+        print(f"{proposal['sql']}\n   -- {proposal['reason']}")
+
+
+def print_timings(before, after):
+    print("\n" + "=" * 70)
+    print("BEFORE / AFTER (median execution time)")
+    print("=" * 70)
+    print(f"{'#':>3}  {'before ms':>11}{'after ms':>11}{'change':>9}  query")
+    for number, (old, new) in enumerate(zip(before, after), 1):
+        snippet = " ".join(old["sql"].split())[:40]
+        if old["ms"] is None or new["ms"] is None:
+            print(f"{number:>3}  {'-':>11}{'-':>11}{'-':>9}  {snippet}")
+            continue
+        change = (new["ms"] - old["ms"]) / old["ms"] * 100 if old["ms"] else 0.0
+        print(f"{number:>3}  {old['ms']:>11.1f}{new['ms']:>11.1f}{change:>8.0f}%  {snippet}")
+
+
+def main():
+    args = parse_args()
+    configure_logging()
+
+    if not IS_POSTGRES:
+        print("✗ The index advisor needs PostgreSQL (EXPLAIN ANALYZE plans and pg_stats).")
+        sys.exit(1)
+
+    queries = load_query_log(args.log)
+    if not queries:
+        print("✗ No SELECT statements found in the SQL log.")
+        sys.exit(1)
+
+    print(f"Replaying {len(queries)} logged queries ({args.runs} runs each)...")
+    before = replay(queries, args.runs)
+
+    with engine.connect() as conn:
+        catalog = load_catalog(conn)
+        scans, usage = summarize_usage(before, catalog)
+        proposals = propose_indexes(conn, scans, usage, catalog)
+
+    print_scans(scans, usage)
+    print_proposals(proposals)
+
+    after = None
+    if args.apply and proposals:
+        print("\nCreating indexes...")
+        apply_proposals(proposals)
+        print(f"\nReplaying {len(queries)} logged queries with the new indexes...")
+        after = replay(queries, args.runs)
+        print_timings(before, after)
+        print("\nAdd the statements you keep to INDEX_COMMANDS in load_data.py; "
+              "a full reload recreates the tables without them.")
+
+    if args.output:
+        report = {
+            "scans": scans,
+            "proposals": proposals,
+            "queries": [
+                {"sql": old["sql"], "before_ms": old["ms"], "error": old["error"],
+                 "after_ms": new["ms"] if new else None}
+                for old, new in zip(before, after or [None] * len(before))
+            ],
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Saved advice to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,521 @@
+import json
+import logging
+import os
+import re
+from dotenv import load_dotenv
+
+from prompts.schema_prompt import USE_AGGREGATES
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Answer common KPI questions from SQL templates, without any LLM call
+KPI_TEMPLATES_ENABLED = os.getenv("KPI_TEMPLATES_ENABLED", "true").lower() == "true"
+
+DEFAULT_TOP_N = 10
+
+# -------- Slot vocabularies --------
+# Every SQL fragment below is fixed text; questions only choose between them
+
+# Revenue and profit are stored on fact_sales, so no product join is needed
+METRICS = {
+    "revenue": ("SUM(s.revenue)", "revenue"),
+    "profit": ("SUM(s.profit)", "profit"),
+    "profit_margin": (
+        "ROUND(100.0 * SUM(s.profit) / NULLIF(SUM(s.revenue), 0), 2)",
+        "profit_margin_pct",
+    ),
+    "units": ("SUM(s.order_quantity)", "units_sold"),
+    "orders": ("COUNT(DISTINCT s.order_number)", "orders"),
+}
+
+METRIC_WORDS = [
+    (r"profit margins?|margins?", "profit_margin"),
+    (r"revenue|sales|turnover", "revenue"),
+    (r"profits?", "profit"),
+    (r"units sold|units|quantity sold|quantity|volume", "units"),
+    (r"number of orders|order count|orders", "orders"),
+    (r"return rates?|returns? rates?", "return_rate"),
+]
+
+# name -> (label expression, column alias, dimension tables it needs)
+DIMENSIONS = {
+    "product": ("p.product_name", "product_name", ["dim_products"]),
+    "subcategory": ("sc.subcategory_name", "subcategory_name", ["dim_products", "dim_product_subcategories"]),
+    "category": ("pc.category_name", "category_name",
+                 ["dim_products", "dim_product_subcategories", "dim_product_categories"]),
+    "customer": ("cu.first_name || ' ' || cu.last_name", "customer_name", ["dim_customers"]),
+    "region": ("t.region", "region", ["dim_territories"]),
+    "country": ("t.country", "country", ["dim_territories"]),
+    "continent": ("t.continent", "continent", ["dim_territories"]),
+}
+
+DIMENSION_WORDS = [
+    (r"subcategor(?:y|ies)|sub categor(?:y|ies)", "subcategory"),
+    (r"product categor(?:y|ies)|categor(?:y|ies)", "category"),
+    (r"products?|items?", "product"),
+    (r"customers?|clients?", "customer"),
+    (r"regions?|territor(?:y|ies)", "region"),
+    (r"countr(?:y|ies)|markets?", "country"),
+    (r"continents?", "continent"),
+]
+
+# name -> (label expression, column alias, group key); grouping by the
+# consecutive keys keeps periods in order across years
+GRAINS = {
+    "year": ("c.year", "year", "c.year"),
+    "quarter": ("MIN(c.date)", "quarter_start", "c.quarter_key"),
+    "month": ("MIN(c.date)", "month_start", "c.month_key"),
+}
+
+GRAIN_WORDS = [
+    (r"(?:by |per |each )?years?|yearly|annual(?:ly)?|year over year", "year"),
+    (r"(?:by |per |each )?quarters?|quarterly", "quarter"),
+    (r"(?:by |per |each )?months?|monthly|trends?|over time", "month"),
+]
+
+# How each table joins back to a fact table (``{fact}`` is its alias)
+JOINS = {
+    "dim_products": "JOIN dim_products p ON {fact}.product_key = p.product_key",
+    "dim_product_subcategories": "JOIN dim_product_subcategories sc ON p.product_subcategory_key = sc.product_subcategory_key",
+    "dim_product_categories": "JOIN dim_product_categories pc ON sc.product_category_key = pc.product_category_key",
+    "dim_customers": "JOIN dim_customers cu ON {fact}.customer_key = cu.customer_key",
+    "dim_territories": "JOIN dim_territories t ON {fact}.territory_key = t.sales_territory_key",
+    "dim_calendar": "JOIN dim_calendar c ON {fact}.{date_column} = c.date",
+}
+JOIN_ORDER = list(JOINS)
+
+# -------- Aggregate rollups (see AGGREGATE_VIEWS in load_data.py) --------
+# ``{a}`` is the rollup's alias; orders and customers need the fact table
+
+AGGREGATE_METRICS = {
+    "revenue": "SUM({a}.revenue)",
+    "profit": "SUM({a}.profit)",
+    "profit_margin": "ROUND(100.0 * SUM({a}.profit) / NULLIF(SUM({a}.revenue), 0), 2)",
+    "units": "SUM({a}.order_quantity)",
+}
+
+# Product-level questions need the product rollup, the rest fit the smaller one
+AGGREGATE_ALIASES = {"agg_sales_monthly": "am", "agg_subcategory_monthly": "asm"}
+
+# dimension -> join from the rollup, which carries every hierarchy key
+AGGREGATE_JOINS = {
+    "product": "JOIN dim_products p ON {a}.product_key = p.product_key",
+    "subcategory": "JOIN dim_product_subcategories sc ON {a}.product_subcategory_key = sc.product_subcategory_key",
+    "category": "JOIN dim_product_categories pc ON {a}.product_category_key = pc.product_category_key",
+    "region": "JOIN dim_territories t ON {a}.territory_key = t.sales_territory_key",
+    "country": "JOIN dim_territories t ON {a}.territory_key = t.sales_territory_key",
+    "continent": "JOIN dim_territories t ON {a}.territory_key = t.sales_territory_key",
+}
+
+AGGREGATE_GRAINS = {
+    "year": ("{a}.year", "year", "{a}.year"),
+    "quarter": ("MIN({a}.month_start)", "quarter_start", "{a}.quarter_key"),
+    "month": ("MIN({a}.month_start)", "month_start", "{a}.month_key"),
+}
+
+# Words that may surround the slots without changing the question
+FILLER = {
+    "what", "whats", "is", "are", "was", "were", "the", "our", "my", "me", "show", "give",
+    "list", "tell", "get", "find", "total", "overall", "of", "for", "in", "by", "per",
+    "a", "an", "which", "have", "has", "had", "with", "do", "does", "did", "we", "us",
+    "all", "each", "and", "to", "how", "much", "many", "made", "make", "generated",
+    "sold", "selling", "sellers", "seller", "please", "current", "company", "business",
+}
+
+LEADING_DIRECTION = re.compile(r"\b(top|best|highest|most|bottom|worst|lowest|least)\b(?: (\d{1,3}))?")
+LAST_QUARTER = re.compile(r"\b(?:last|previous|prior) quarter\b")
+YEAR = re.compile(r"\b(?:in |during |for )?(20\d{2})\b")
+SELLING = re.compile(r"\b(?:selling|sellers?)\b")
+
+
+def normalize(question: str) -> str:
+    text = question.lower().replace("-", " ")
+    text = re.sub(r"[^a-z0-9 ]+", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _take(text, patterns):
+    """Find the first vocabulary phrase in ``text`` and cut it out."""
+    for pattern, name in patterns:
+        match = re.search(rf"\b(?:{pattern})\b", text)
+        if match:
+            return name, (text[:match.start()] + " " + text[match.end():]).strip()
+    return None, text
+
+
+def _take_regex(pattern, text):
+    match = pattern.search(text)
+    if not match:
+        return None, text
+    return match, (text[:match.start()] + " " + text[match.end():]).strip()
+
+
+def match_kpi_question(question: str):
+    """Extract KPI slots from a question, or None if it is not a known KPI.
+
+    Slots are metric, dimension, grain, year, top-N and direction. A
+    question only matches when every remaining word is filler, so anything
+    more specific than the templates can express goes to the agent graph.
+    """
+    text = normalize(question)
+
+    last_quarter, text = _take_regex(LAST_QUARTER, text)
+    year, text = _take_regex(YEAR, text)
+    direction, text = _take_regex(LEADING_DIRECTION, text)
+    selling = SELLING.search(text) is not None
+    metric, text = _take(text, METRIC_WORDS)
+    grain, text = _take(text, GRAIN_WORDS)
+    dimension, text = _take(text, DIMENSION_WORDS)
+
+    leftover = [word for word in text.split() if word not in FILLER]
+    if leftover:
+        return None
+
+    if metric is None:
+        if selling:
+            metric = "units"
+        elif direction is not None and dimension is not None:
+            metric = "revenue"
+        else:
+            return None
+
+    slots = {
+        "metric": metric,
+        "dimension": dimension,
+        "grain": grain,
+        "year": int(year.group(1)) if year else None,
+        "last_quarter": last_quarter is not None,
+        "top_n": None,
+        "ascending": False,
+    }
+
+    if direction is not None:
+        if dimension is None:
+            return None
+        slots["top_n"] = int(direction.group(2)) if direction.group(2) else DEFAULT_TOP_N
+        slots["ascending"] = direction.group(1) in ("bottom", "worst", "lowest", "least")
+
+    return slots
+
+
+# -------- SQL templates --------
+
+def _joins(tables, fact="s", date_column="order_date"):
+    ordered = [table for table in JOIN_ORDER if table in tables]
+    return "\n".join(JOINS[table].format(fact=fact, date_column=date_column) for table in ordered)
+
+
+def _year_filter(year, fact="s", date_column="order_date"):
+    """Calendar-year filter; bounding the fact's own date column lets
+    Postgres prune fact_sales / fact_returns to that year's partition."""
+    year = int(year)
+    return (
+        f"c.year = {year} AND {fact}.{date_column} >= '{year}-01-01' "
+        f"AND {fact}.{date_column} < '{year + 1}-01-01'"
+    )
+
+
+def _indent(joins):
+    """Join lines for use inside a CTE body."""
+    return "".join(f"\n  {line}" for line in joins.splitlines())
+
+
+def _metric_sql(slots):
+    expression, alias = METRICS[slots["metric"]]
+    dimension, grain = slots["dimension"], slots["grain"]
+
+    # One breakdown at a time keeps the result chartable as x / y
+    if dimension and grain:
+        return None
+
+    tables = set()
+
+    select, group_by, order_by = [], [], f"{alias} {'ASC' if slots['ascending'] else 'DESC'}"
+    x = None
+
+    if dimension:
+        label, x, dim_tables = DIMENSIONS[dimension]
+        tables.update(dim_tables)
+        select.append(f"{label} AS {x}")
+        group_by.append(label)
+
+    if grain:
+        label, x, key = GRAINS[grain]
+        tables.add("dim_calendar")
+        select.append(f"{label} AS {x}")
+        group_by.append(key)
+        order_by = x
+
+    where = ""
+    if slots["year"]:
+        tables.add("dim_calendar")
+        where = f"WHERE {_year_filter(slots['year'])}"
+
+    select.append(f"{expression} AS {alias}")
+
+    columns = ",\n  ".join(select)
+    sql = f"SELECT\n  {columns}\nFROM fact_sales s"
+    joins = _joins(tables)
+    if joins:
+        sql += f"\n{joins}"
+    if where:
+        sql += f"\n{where}"
+    if group_by:
+        sql += f"\nGROUP BY {', '.join(group_by)}\nORDER BY {order_by}"
+    if slots["top_n"]:
+        sql += f"\nLIMIT {int(slots['top_n'])}"
+
+    return sql, x, alias
+
+
+def _last_quarter_sql(slots):
+    expression, alias = METRICS[slots["metric"]]
+    if slots["dimension"] or slots["grain"] or slots["top_n"] or slots["year"]:
+        return None
+
+    tables = {"dim_calendar"}
+
+    # Same shape as the last-quarter pattern in prompts/schema_prompt.py
+    sql = (
+        "WITH last_q AS (\n"
+        "  SELECT MAX(quarter_key) - 1 AS quarter_key FROM dim_calendar\n"
+        ")\n"
+        "SELECT\n"
+        "  c.year AS target_year,\n"
+        "  c.quarter AS target_quarter,\n"
+        f"  {expression} AS {alias}_last_quarter\n"
+        "FROM fact_sales s\n"
+        f"{_joins(tables)}\n"
+        "JOIN last_q lq ON c.quarter_key = lq.quarter_key\n"
+        "GROUP BY\n"
+        "  c.year,\n"
+        "  c.quarter"
+    )
+    return sql, None, f"{alias}_last_quarter"
+
+
+def _return_rate_sql(slots):
+    dimension = slots["dimension"]
+    if slots["grain"] or slots["last_quarter"] or dimension == "customer":
+        return None
+
+    sales_tables, returns_tables = set(), set()
+    where_sales = where_returns = ""
+    if slots["year"]:
+        sales_tables.add("dim_calendar")
+        returns_tables.add("dim_calendar")
+        where_sales = f"\n  WHERE {_year_filter(slots['year'])}"
+        where_returns = f"\n  WHERE {_year_filter(slots['year'], fact='r', date_column='return_date')}"
+
+    if dimension:
+        label, x, dim_tables = DIMENSIONS[dimension]
+        sales_tables.update(dim_tables)
+        returns_tables.update(dim_tables)
+        label_select = f"{label} AS {x}, "
+        group_by = f"\n  GROUP BY {label}"
+        final_select = f"sold.{x}, "
+        join_on = f"LEFT JOIN returned ON returned.{x} = sold.{x}"
+    else:
+        x = None
+        label_select = group_by = final_select = ""
+        join_on = "CROSS JOIN returned"
+
+    sales_joins = _joins(sales_tables)
+    returns_joins = _joins(returns_tables, fact="r", date_column="return_date")
+
+    order = "ASC" if slots["ascending"] else "DESC"
+    sql = (
+        "WITH sold AS (\n"
+        f"  SELECT {label_select}SUM(s.order_quantity) AS units_sold\n"
+        "  FROM fact_sales s"
+        f"{_indent(sales_joins)}{where_sales}{group_by}\n"
+        "), returned AS (\n"
+        f"  SELECT {label_select}SUM(r.return_quantity) AS units_returned\n"
+        "  FROM fact_returns r"
+        f"{_indent(returns_joins)}{where_returns}{group_by}\n"
+        ")\n"
+        "SELECT\n"
+        f"  {final_select}sold.units_sold,\n"
+        "  COALESCE(returned.units_returned, 0) AS units_returned,\n"
+        "  ROUND(100.0 * COALESCE(returned.units_returned, 0) / NULLIF(sold.units_sold, 0), 2) AS return_rate_pct\n"
+        "FROM sold\n"
+        f"{join_on}"
+    )
+    if dimension:
+        sql += f"\nORDER BY return_rate_pct {order}"
+        if slots["top_n"]:
+            sql += f"\nLIMIT {int(slots['top_n'])}"
+
+    return sql, x, "return_rate_pct"
+
+
+def _aggregate_sql(slots):
+    """Build the answer from an agg_* rollup, or None if it needs the facts.
+
+    Covers the same questions as the fact-table templates (plus return
+    rate per period) while reading a few thousand pre-joined rows.
+    """
+    metric, dimension, grain = slots["metric"], slots["dimension"], slots["grain"]
+    if not USE_AGGREGATES or dimension not in (None, *AGGREGATE_JOINS):
+        return None
+    if metric not in AGGREGATE_METRICS and metric != "return_rate":
+        return None
+    if dimension and grain:
+        return None
+    if slots["last_quarter"] and (metric == "return_rate" or dimension or grain or slots["year"]):
+        return None
+
+    table = "agg_sales_monthly" if dimension == "product" else "agg_subcategory_monthly"
+    a = AGGREGATE_ALIASES[table]
+
+    select, group_by, x = [], [], None
+    if dimension:
+        label, x, _ = DIMENSIONS[dimension]
+        select.append(f"{label} AS {x}")
+        group_by.append(label)
+    if grain:
+        label, x, key = (part.format(a=a) for part in AGGREGATE_GRAINS[grain])
+        select.append(f"{label} AS {x}")
+        group_by.append(key)
+
+    if metric == "return_rate":
+        alias = "return_rate_pct"
+        select.extend([
+            f"SUM({a}.order_quantity) AS units_sold",
+            f"SUM({a}.return_quantity) AS units_returned",
+            f"ROUND(100.0 * SUM({a}.return_quantity) / NULLIF(SUM({a}.order_quantity), 0), 2) AS {alias}",
+        ])
+    elif slots["last_quarter"]:
+        alias = f"{METRICS[metric][1]}_last_quarter"
+        select = [f"{a}.year AS target_year", f"{a}.quarter AS target_quarter",
+                  f"{AGGREGATE_METRICS[metric].format(a=a)} AS {alias}"]
+        group_by = [f"{a}.year", f"{a}.quarter"]
+    else:
+        alias = METRICS[metric][1]
+        select.append(f"{AGGREGATE_METRICS[metric].format(a=a)} AS {alias}")
+
+    columns = ",\n  ".join(select)
+    sql = f"SELECT\n  {columns}\nFROM {table} {a}"
+    if slots["last_quarter"]:
+        # Same shape as the last-quarter pattern in prompts/schema_prompt.py
+        sql = (
+            "WITH last_q AS (\n"
+            "  SELECT MAX(quarter_key) - 1 AS quarter_key FROM dim_calendar\n"
+            f")\n{sql}\n"
+            f"JOIN last_q lq ON {a}.quarter_key = lq.quarter_key"
+        )
+    if dimension:
+        sql += "\n" + AGGREGATE_JOINS[dimension].format(a=a)
+    if slots["year"]:
+        sql += f"\nWHERE {a}.year = {int(slots['year'])}"
+    if group_by:
+        sql += f"\nGROUP BY {', '.join(group_by)}"
+    if grain:
+        sql += f"\nORDER BY {x}"
+    elif dimension:
+        sql += f"\nORDER BY {alias} {'ASC' if slots['ascending'] else 'DESC'}"
+    if slots["top_n"]:
+        sql += f"\nLIMIT {int(slots['top_n'])}"
+
+    return sql, x, alias
+
+
+METRIC_LABELS = {
+    "revenue": "revenue",
+    "profit": "profit",
+    "profit_margin": "profit margin",
+    "units": "units sold",
+    "orders": "orders",
+    "return_rate": "return rate",
+}
+
+DIMENSION_PLURALS = {
+    "product": "products",
+    "subcategory": "subcategories",
+    "category": "categories",
+    "customer": "customers",
+    "region": "regions",
+    "country": "countries",
+    "continent": "continents",
+}
+
+
+def describe_slots(slots) -> str:
+    """Human-readable analysis goal for the matched slots."""
+    metric = METRIC_LABELS[slots["metric"]]
+
+    if slots["top_n"]:
+        direction = "bottom" if slots["ascending"] else "top"
+        goal = f"{direction} {slots['top_n']} {DIMENSION_PLURALS[slots['dimension']]} by {metric}"
+    elif slots["dimension"]:
+        goal = f"{metric} by {slots['dimension']}"
+    else:
+        goal = metric
+
+    if slots["grain"]:
+        goal += f" per {slots['grain']}"
+    if slots["year"]:
+        goal += f" in {slots['year']}"
+    if slots["last_quarter"]:
+        goal += " for the last quarter"
+    return goal
+
+
+def build_kpi_answer(question: str):
+    """Answer a common KPI question from a template, or return None.
+
+    The result has the same shape as the agent graph's (question, validator,
+    sql_query) plus ``visual_spec``, a ready-made chart spec for
+    render_plotly, so no LLM is involved at all.
+    """
+    if not KPI_TEMPLATES_ENABLED:
+        return None
+
+    slots = match_kpi_question(question)
+    if slots is None:
+        return None
+
+    # Rollups first; the fact-table templates cover orders and customers
+    built = _aggregate_sql(slots)
+    if built is None:
+        if slots["metric"] == "return_rate":
+            built = _return_rate_sql(slots)
+        elif slots["last_quarter"]:
+            built = _last_quarter_sql(slots)
+        else:
+            built = _metric_sql(slots)
+
+    if built is None:
+        return None
+
+    sql, x, y = built
+    goal = describe_slots(slots)
+    visualization = x is not None
+
+    visual_spec = None
+    if visualization:
+        visual_spec = json.dumps({
+            "chart_type": "line" if slots["grain"] else "bar",
+            "x": x,
+            "y": y,
+            "title": goal[0].upper() + goal[1:],
+        })
+
+    logger.info("KPI template match: %s (%s table)", goal, "aggregate" if "FROM agg_" in sql else "fact")
+
+    return {
+        "question": question,
+        "validator": {
+            "is_valid": True,
+            "is_analytics": True,
+            "analysis_goal": goal,
+            "require_sql": True,
+            "visualization": visualization,
+            "dashboard": False
+        },
+        "sql_query": sql,
+        "visual_spec": visual_spec,
+        "kpi_slots": slots
+    }
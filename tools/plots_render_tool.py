@@ -1,24 +1,35 @@
 import json
+import logging
 import plotly.express as px
 import os
 from datetime import datetime
 from utils.file_utils import slugify
 from utils.clean_utils import clean_json
+from utils.tracing import traced
+
+logger = logging.getLogger(__name__)
 
 BASE_DIR = "visualizations"
 
+
+def record_render(span, result):
+    path, fig = result
+    span.set(path=path, file_bytes=os.path.getsize(path), chart_type=fig.data[0].type if fig.data else None)
+
+
+@traced("render_plotly", record=record_render)
 def render_plotly(df, spec_json, dashboard_mode=False):
-    print("\nRAW VISUAL SPEC:", repr(spec_json))
+    logger.debug("Raw visual spec: %r", spec_json)
 
     spec = json.loads(clean_json(spec_json))
-    print("CLEANED VISUAL SPEC:", spec)
+    logger.debug("Cleaned visual spec: %s", spec)
 
     chart_type = spec["chart_type"]
     x = spec["x"]
     y = spec["y"]
     title = spec["title"]
 
-    print(f"Rendering {chart_type} chart: {title} (x: {x}, y: {y})")
+    logger.info("Rendering %s chart: %s (x: %s, y: %s)", chart_type, title, x, y)
 
     # -------- Build figure ----------
     if chart_type == "bar":
@@ -50,6 +61,6 @@ def render_plotly(df, spec_json, dashboard_mode=False):
     # -------- Save image -------------
     fig.write_image(full_path)
 
-    print(f"Chart saved to: {full_path}")
+    logger.info("Chart saved to: %s", full_path)
 
     return full_path, fig
@@ -0,0 +1,238 @@
+import ast
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from dotenv import load_dotenv
+from langchain_core.messages import AIMessage
+
+from prompts.dashboard_prompt import DASHBOARD_SYSTEM_PROMPT
+from prompts.schema_prompt import USE_AGGREGATES
+from prompts.sql_fallback_prompt import SQL_FALLBACK_SYSTEM
+from prompts.validator_prompt import VALIDATOR_SYSTEM_PROMPT
+from prompts.visualization_prompt import VISUALIZATION_SYSTEM_PROMPT
+from tools.kpi_templates import build_kpi_answer
+from utils.llm_cache import prompt_payload
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Simulated model latency per call (mean and +/- jitter)
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "0"))
+FAKE_LLM_JITTER_MS = float(os.getenv("FAKE_LLM_JITTER_MS", "0"))
+# JSONL of {"prompt_hash", "content"} recorded with LLM_RECORD_PATH
+FAKE_LLM_REPLAY_PATH = os.getenv("FAKE_LLM_REPLAY_PATH")
+
+ANALYTICS_WORDS = (
+    "sales", "revenue", "profit", "margin", "product", "customer", "order", "return",
+    "region", "country", "territor", "categor", "sold", "selling", "seller", "kpi",
+    "trend", "performance", "dashboard", "quarter", "month", "year", "units",
+)
+
+CHART_WORDS = (" by ", "top ", "best", "worst", "trend", "monthly", "quarterly", "yearly", "per ", "each ")
+
+# Answers for SQL the rules cannot build from a KPI template
+FACT_FALLBACK_SQL = """SELECT
+  pc.category_name AS category_name,
+  SUM(s.revenue) AS revenue
+FROM fact_sales s
+JOIN dim_products p ON s.product_key = p.product_key
+JOIN dim_product_subcategories sc ON p.product_subcategory_key = sc.product_subcategory_key
+JOIN dim_product_categories pc ON sc.product_category_key = pc.product_category_key
+GROUP BY pc.category_name
+ORDER BY revenue DESC"""
+
+AGGREGATE_FALLBACK_SQL = """SELECT
+  pc.category_name AS category_name,
+  SUM(asm.revenue) AS revenue
+FROM agg_subcategory_monthly asm
+JOIN dim_product_categories pc ON asm.product_category_key = pc.product_category_key
+GROUP BY pc.category_name
+ORDER BY revenue DESC"""
+
+FALLBACK_SQL = AGGREGATE_FALLBACK_SQL if USE_AGGREGATES else FACT_FALLBACK_SQL
+
+DASHBOARD_QUESTIONS = [
+    ("Revenue by month", True),
+    ("Top 10 products by revenue", True),
+    ("Profit by category", True),
+    ("Revenue by country", True),
+    ("Return rate by category", True),
+]
+
+
+def prompt_hash(messages) -> str:
+    """Stable hash of a prompt, shared by recording and replay."""
+    encoded = json.dumps(prompt_payload(messages), sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def load_replay(path):
+    responses = {}
+    if not path or not os.path.exists(path):
+        return responses
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                responses[record["prompt_hash"]] = record["content"]
+    logger.info("Fake LLM: %d recorded responses loaded from %s", len(responses), path)
+    return responses
+
+
+def estimate_usage(messages, content):
+    """Rough token counts (~4 characters per token) so traces show prompt size."""
+    prompt_chars = sum(len(message["content"] or "") for message in prompt_payload(messages))
+    input_tokens = prompt_chars // 4
+    output_tokens = len(content) // 4
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+    }
+
+
+# -------- Rule-based answers, one per agent --------
+
+def _question_from(text):
+    match = re.search(r"User question:\s*(.+?)\n\s*\n", text, re.S)
+    return match.group(1).strip() if match else text.strip()
+
+
+def _plan_for(question):
+    lowered = f" {question.lower()} "
+    is_analytics = any(word in lowered for word in ANALYTICS_WORDS)
+    dashboard = "dashboard" in lowered
+    return {
+        "is_valid": is_analytics,
+        "is_analytics": is_analytics,
+        "analysis_goal": question,
+        "require_sql": is_analytics and not dashboard,
+        "visualization": any(word in lowered for word in CHART_WORDS),
+        "dashboard": dashboard,
+    }
+
+
+def _sql_for(goal):
+    templated = build_kpi_answer(goal) if goal else None
+    return templated["sql_query"] if templated else FALLBACK_SQL
+
+
+def _goal_from(text):
+    match = re.search(r"""['"]analysis_goal['"]:\s*['"](.*?)['"]\s*[,}]""", text)
+    return match.group(1) if match else None
+
+
+def _chart_for(text):
+    match = re.search(r"COLUMNS:\s*(\[.*?\])", text, re.S)
+    columns = ast.literal_eval(match.group(1)) if match else ["x", "y"]
+    x, y = columns[0], columns[-1]
+    periodic = any(word in x for word in ("date", "month", "quarter", "year"))
+    return {"chart_type": "line" if periodic else "bar", "x": x, "y": y, "title": f"{y} by {x}"}
+
+
+def rule_based_response(messages) -> str:
+    """Deterministic stand-in for each agent's expected JSON output."""
+    payload = prompt_payload(messages)
+    system = payload[0]["content"] if payload else ""
+    user = payload[-1]["content"] or ""
+
+    if system == VALIDATOR_SYSTEM_PROMPT:
+        question = _question_from(user)
+        plan = _plan_for(question)
+        # Fused planner+SQL prompt
+        if "SQL RULES AND DATABASE SCHEMA" in user:
+            needs_sql = plan["is_analytics"] and not plan["dashboard"]
+            plan["sql"] = _sql_for(question) if needs_sql else None
+        return json.dumps(plan)
+
+    if system == DASHBOARD_SYSTEM_PROMPT:
+        return json.dumps({"questions": [
+            {"question": question, "analysis_goal": question, "visualization": visualization}
+            for question, visualization in DASHBOARD_QUESTIONS
+        ]})
+
+    if system == VISUALIZATION_SYSTEM_PROMPT:
+        return json.dumps(_chart_for(user))
+
+    if system == SQL_FALLBACK_SYSTEM:
+        return json.dumps({"sql": FALLBACK_SQL})
+
+    # SQL agent
+    return json.dumps({"sql": _sql_for(_goal_from(user))})
+
+
+class FakeChatModel:
+    """Offline chat model: replays recorded responses or follows rules.
+
+    Set LLM_BACKEND=fake to use it instead of Gemini. Each call sleeps for
+    FAKE_LLM_LATENCY_MS +/- FAKE_LLM_JITTER_MS; the jitter is seeded by the
+    prompt, so a run is reproducible.
+    """
+
+    model = "fake"
+
+    def __init__(self, latency_ms=FAKE_LLM_LATENCY_MS, jitter_ms=FAKE_LLM_JITTER_MS,
+                 replay_path=FAKE_LLM_REPLAY_PATH):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.replay = load_replay(replay_path)
+
+    def _delay(self, key):
+        jitter = random.Random(key).uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def _respond(self, messages):
+        key = prompt_hash(messages)
+        content = self.replay.get(key)
+        if content is None:
+            content = rule_based_response(messages)
+        return key, AIMessage(content=content, usage_metadata=estimate_usage(messages, content))
+
+    def invoke(self, messages, **kwargs):
+        key, response = self._respond(messages)
+        time.sleep(self._delay(key))
+        return response
+
+    async def ainvoke(self, messages, **kwargs):
+        key, response = self._respond(messages)
+        await asyncio.sleep(self._delay(key))
+        return response
+
+
+class RecordingLLM:
+    """Appends every prompt hash and response to a JSONL file for replay."""
+
+    def __init__(self, llm, path):
+        self.llm = llm
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    def _record(self, messages, response):
+        line = json.dumps({"prompt_hash": prompt_hash(messages), "content": response.content})
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def invoke(self, messages, **kwargs):
+        response = self.llm.invoke(messages, **kwargs)
+        self._record(messages, response)
+        return response
+
+    async def ainvoke(self, messages, **kwargs):
+        response = await self.llm.ainvoke(messages, **kwargs)
+        self._record(messages, response)
+        return response
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import os
+import random
+import weakref
+from dotenv import load_dotenv
+
+from config.settings import llm
+from utils.tracing import add_to_span
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# LLM calls in flight at once across every async request in the process
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+
+# Network failures worth retrying when the error carries no HTTP status
+TRANSIENT_ERRORS = (TimeoutError, asyncio.TimeoutError, ConnectionError)
+try:
+    import httpx
+    TRANSIENT_ERRORS += (httpx.TransportError,)
+except ImportError:
+    pass
+
+# asyncio primitives belong to one event loop (Streamlit and asyncio.run
+# create new ones), so each loop gets its own semaphore
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def get_llm_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+def error_status(error: Exception):
+    """HTTP status of ``error`` or of the error it was raised from, or None.
+
+    LangChain re-raises the Gemini client's APIError (which has ``code``)
+    as ChatGoogleGenerativeAIError, so the cause chain is followed.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        response = getattr(error, "response", None)
+        for status in (getattr(error, "status_code", None), getattr(error, "code", None),
+                       getattr(response, "status_code", None)):
+            if isinstance(status, int) and not isinstance(status, bool):
+                return int(status)
+        error = error.__cause__ or error.__context__
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for rate limits (429), server errors (5xx) and network failures."""
+    status = error_status(error)
+    if status is not None:
+        return status == 429 or 500 <= status < 600
+
+    cause = error
+    while cause is not None:
+        if isinstance(cause, TRANSIENT_ERRORS):
+            return True
+        cause = cause.__cause__
+    return False
+
+
+async def ainvoke_llm(messages, **kwargs):
+    """``llm.ainvoke`` behind the shared semaphore, retried on 429 / 5xx.
+
+    Retries back off exponentially with full jitter, and the semaphore is
+    released while waiting so other requests can use the slot.
+    """
+    for attempt in range(1, LLM_MAX_RETRIES + 1):
+        try:
+            async with get_llm_semaphore():
+                return await llm.ainvoke(messages, **kwargs)
+        except Exception as e:
+            if not is_retryable(e) or attempt == LLM_MAX_RETRIES:
+                raise
+
+            delay = random.uniform(0, LLM_RETRY_BASE_DELAY * 2 ** attempt)
+            add_to_span("llm_retries")
+            logger.warning("LLM call failed (%s) — retry %d in %.1fs", type(e).__name__, attempt, delay)
+            await asyncio.sleep(delay)
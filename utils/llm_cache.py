@@ -0,0 +1,176 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+from langchain_core.messages import AIMessage
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_responses.sqlite"))
+
+# Model settings that change the response and so belong in the cache key
+MODEL_PARAMS = ("temperature", "top_p", "top_k", "max_output_tokens", "model_kwargs")
+
+
+def message_payload(message):
+    """JSON-friendly form of one prompt message (dict, str or LangChain message)."""
+    if isinstance(message, dict):
+        return {"role": message.get("role"), "content": message.get("content")}
+    if isinstance(message, str):
+        return {"role": "user", "content": message}
+    return {"role": getattr(message, "type", None), "content": getattr(message, "content", None)}
+
+
+def prompt_payload(prompt):
+    if isinstance(prompt, (list, tuple)):
+        return [message_payload(m) for m in prompt]
+    return [message_payload(prompt)]
+
+
+class CachedLLM:
+    """Content-addressed response cache in front of a chat model.
+
+    Responses are keyed by the model name, its sampling parameters and the
+    prompt messages, and stored in SQLite so they survive restarts. Entries
+    expire after ``ttl_seconds`` and the least recently used ones are dropped
+    once the store grows past ``max_bytes``. Everything else is delegated to
+    the wrapped model.
+    """
+
+    def __init__(self, llm, path=LLM_CACHE_PATH, ttl_seconds=LLM_CACHE_TTL_SECONDS,
+                 max_bytes=LLM_CACHE_MAX_BYTES):
+        self.llm = llm
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # -------- keys --------
+
+    def key_for(self, prompt, **kwargs) -> str:
+        params = {name: getattr(self.llm, name, None) for name in MODEL_PARAMS}
+        payload = {
+            "model": getattr(self.llm, "model", None) or getattr(self.llm, "model_name", None),
+            "params": params,
+            "kwargs": kwargs,
+            "messages": prompt_payload(prompt),
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    # -------- store --------
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT content, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            content, created_at = row
+            if now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                return None
+
+            conn.execute("UPDATE llm_responses SET last_used = ? WHERE key = ?", (now, key))
+            return content
+
+    def put(self, key, content):
+        size = len(content.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?, ?)",
+                (key, content, size, now, now)
+            )
+            conn.execute(
+                "DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        """Drop least recently used responses until the store fits max_bytes."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in conn.execute(
+            "SELECT key, size FROM llm_responses ORDER BY last_used"
+        ).fetchall():
+            conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM llm_responses")
+
+    # -------- model interface --------
+
+    def invoke(self, prompt, **kwargs):
+        key = self.key_for(prompt, **kwargs)
+        content = self.get(key)
+        if content is not None:
+            logger.info("LLM cache hit: %s", key[:12])
+            return AIMessage(content=content)
+
+        response = self.llm.invoke(prompt, **kwargs)
+        if isinstance(response.content, str) and response.content:
+            self.put(key, response.content)
+        return response
+
+    async def ainvoke(self, prompt, **kwargs):
+        key = self.key_for(prompt, **kwargs)
+        content = self.get(key)
+        if content is not None:
+            logger.info("LLM cache hit: %s", key[:12])
+            return AIMessage(content=content)
+
+        response = await self.llm.ainvoke(prompt, **kwargs)
+        if isinstance(response.content, str) and response.content:
+            self.put(key, response.content)
+        return response
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Shared with load_data.py, which stamps reloaded tables here
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join(".cache", "query_results"))
+# Also keep results on disk as Parquet (needs pyarrow or fastparquet)
+RESULT_CACHE_PERSIST = os.getenv("RESULT_CACHE_PERSIST", "false").lower() == "true"
+RESULT_CACHE_DISK_MAX_BYTES = int(os.getenv("RESULT_CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+TABLE_VERSIONS_FILE = "_table_versions.json"
+
+_STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+# FROM / JOIN target, plus any comma-joined tables ("FROM a x, b y"), each
+# optionally schema-qualified ("public.fact_sales")
+_TABLE_ITEM = r"(?:[a-z_][a-z0-9_]*\.)?[a-z_][a-z0-9_]*(?:\s+(?:as\s+)?[a-z_][a-z0-9_]*)?"
+_TABLE_REFERENCE = re.compile(rf"\b(?:from|join)\s+({_TABLE_ITEM}(?:\s*,\s*{_TABLE_ITEM})*)")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and lowercase SQL, leaving string literals intact."""
+    parts = _STRING_LITERAL.split(sql.strip().rstrip(";"))
+    normalized = [
+        part if part.startswith("'") else re.sub(r"\s+", " ", part).lower()
+        for part in parts
+    ]
+    return "".join(normalized).strip()
+
+
+def referenced_tables(sql: str):
+    """Names of the tables a query reads from (FROM / JOIN targets), without
+    their schema, as invalidate_tables() stamps them."""
+    text = _STRING_LITERAL.sub("''", normalize_sql(sql))
+    return sorted({
+        item.split()[0].rsplit(".", 1)[-1]
+        for match in _TABLE_REFERENCE.findall(text)
+        for item in match.split(",")
+    })
+
+
+def _versions_path():
+    return os.path.join(RESULT_CACHE_DIR, TABLE_VERSIONS_FILE)
+
+
+def invalidate_tables(tables):
+    """Mark tables as reloaded so cached results that read them are dropped.
+
+    Called by load_data.py; works across processes through a small stamp
+    file in RESULT_CACHE_DIR.
+    """
+    os.makedirs(RESULT_CACHE_DIR, exist_ok=True)
+    path = _versions_path()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            versions = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        versions = {}
+
+    now = time.time()
+    versions.update({table: now for table in tables})
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(versions, f)
+    os.replace(tmp_path, path)
+    logger.info("Result cache invalidated for: %s", ", ".join(sorted(tables)))
+
+
+class ResultCache:
+    """LRU + TTL cache of query results, bounded by their in-memory size.
+
+    Cached DataFrames are shared between callers and must be treated as
+    read-only.
+    """
+
+    def __init__(self, ttl_seconds=RESULT_CACHE_TTL_SECONDS, max_bytes=RESULT_CACHE_MAX_BYTES,
+                 cache_dir=RESULT_CACHE_DIR, persist=RESULT_CACHE_PERSIST,
+                 disk_max_bytes=RESULT_CACHE_DISK_MAX_BYTES):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.cache_dir = cache_dir
+        self.persist = persist
+        self._entries = OrderedDict()  # key -> (df, created_at, size, tables)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._versions_mtime = None
+
+    # -------- keys and invalidation --------
+
+    @staticmethod
+    def key_for(sql: str) -> str:
+        return hashlib.sha256(normalize_sql(sql).encode("utf-8")).hexdigest()
+
+    def _table_versions(self):
+        """Reload the table stamp file only when it has changed on disk."""
+        try:
+            mtime = os.stat(_versions_path()).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+
+        if mtime != self._versions_mtime:
+            try:
+                with open(_versions_path(), "r", encoding="utf-8") as f:
+                    self._versions = json.load(f)
+                self._versions_mtime = mtime
+            except (OSError, json.JSONDecodeError):
+                return self._versions
+        return self._versions
+
+    def _is_fresh(self, created_at, tables):
+        if time.time() - created_at > self.ttl_seconds:
+            return False
+        versions = self._table_versions()
+        return all(versions.get(table, 0) < created_at for table in tables)
+
+    # -------- memory tier --------
+
+    def _evict(self, key):
+        df, _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, sql: str):
+        """Return the cached DataFrame for ``sql``, or None."""
+        key = self.key_for(sql)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                df, created_at, _, tables = entry
+                if self._is_fresh(created_at, tables):
+                    self._entries.move_to_end(key)
+                    return df
+                self._evict(key)
+
+        if self.persist:
+            return self._load_from_disk(key)
+        return None
+
+    def put(self, sql: str, df: pd.DataFrame, created_at=None):
+        """Cache ``df`` as the result of ``sql``, evicting LRU entries to fit."""
+        key = self.key_for(sql)
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return
+
+        tables = referenced_tables(sql)
+        created_at = created_at or time.time()
+
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            while self._entries and self._bytes + size > self.max_bytes:
+                self._evict(next(iter(self._entries)))
+            self._entries[key] = (df, created_at, size, tables)
+            self._bytes += size
+
+        if self.persist:
+            self._save_to_disk(key, df, created_at, tables)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    # -------- disk tier --------
+
+    def _disk_paths(self, key):
+        return (
+            os.path.join(self.cache_dir, f"{key}.parquet"),
+            os.path.join(self.cache_dir, f"{key}.json"),
+        )
+
+    def _save_to_disk(self, key, df, created_at, tables):
+        data_path, meta_path = self._disk_paths(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            df.to_parquet(data_path, index=False)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"created_at": created_at, "tables": tables}, f)
+        except (ImportError, ValueError, OSError) as e:
+            logger.warning("Result cache: disk persistence disabled: %s", e)
+            self.persist = False
+            return
+        self._trim_disk()
+
+    def _trim_disk(self):
+        """Delete least recently used results until the disk tier fits disk_max_bytes."""
+        entries, total = [], 0
+        try:
+            with os.scandir(self.cache_dir) as scan:
+                for item in scan:
+                    if item.name.endswith(".parquet"):
+                        key = item.name[:-len(".parquet")]
+                        size = sum(
+                            os.path.getsize(path) for path in self._disk_paths(key) if os.path.exists(path)
+                        )
+                        entries.append((item.stat().st_mtime, key, size))
+                        total += size
+        except OSError:
+            return
+
+        for _, key, size in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            for path in self._disk_paths(key):
+                if os.path.exists(path):
+                    os.remove(path)
+            total -= size
+
+    def _load_from_disk(self, key):
+        data_path, meta_path = self._disk_paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if not self._is_fresh(meta["created_at"], meta["tables"]):
+            for path in (data_path, meta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            return None
+
+        try:
+            df = pd.read_parquet(data_path)
+            os.utime(data_path)  # recently used, for _trim_disk
+        except (ImportError, ValueError, OSError):
+            return None
+
+        # Promote into memory without rewriting the file
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                while self._entries and self._bytes + size > self.max_bytes:
+                    self._evict(next(iter(self._entries)))
+                self._entries[key] = (df, meta["created_at"], size, meta["tables"])
+                self._bytes += size
+        return df
+
+
+result_cache = ResultCache()
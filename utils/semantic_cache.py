@@ -0,0 +1,209 @@
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+from dotenv import load_dotenv
+
+from tools.kpi_templates import DIMENSION_WORDS, FILLER, METRIC_WORDS, normalize
+
+load_dotenv()
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+# Cosine similarity needed to reuse an earlier question's plan and SQL
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+
+VECTOR_DIM = 4096
+NGRAM_SIZES = (3, 4, 5)
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_NUMBER = re.compile(r"\d+")
+
+# Filler words that carry no meaning for the query itself
+STOP_WORDS = {
+    "a", "an", "the", "of", "for", "in", "on", "by", "to", "is", "are", "was",
+    "were", "what", "which", "who", "show", "me", "give", "list", "our", "we",
+    "us", "do", "does", "have", "has", "please", "tell", "can", "you", "i",
+}
+
+# Business phrasing that means the same thing
+SYNONYMS = {
+    "top": "best",
+    "sellers": "selling",
+    "seller": "selling",
+    "selling": "selling",
+    "sold": "selling",
+    "highest": "best",
+    "most": "best",
+    "revenues": "revenue",
+    "margins": "margin",
+    "clients": "customers",
+}
+
+# Words that flip or rescope a query's meaning: two questions only match
+# when they agree on all of these (and on every number they mention)
+GUARD_WORDS = {
+    "best", "worst", "lowest", "least", "bottom", "fewest", "increase", "decrease",
+    "growth", "decline", "not", "without", "excluding",
+    "day", "daily", "week", "weekly", "month", "monthly", "quarter", "quarterly",
+    "year", "yearly", "annual", "today", "yesterday", "last", "this", "previous", "next",
+}
+
+
+# What a question measures and groups by: two questions only match when
+# they name the same ones. The KPI template vocabularies come first, so
+# "subcategory" is taken before "category" can match inside it.
+SCOPE_WORDS = METRIC_WORDS + DIMENSION_WORDS + [
+    (r"average|avg|mean", "average"),
+    (r"median", "median"),
+    (r"count|number of", "count"),
+    (r"costs?", "cost"),
+    (r"prices?", "price"),
+    (r"(?:annual )?incomes?", "income"),
+    (r"genders?|male|female", "gender"),
+    (r"ages?|age groups?", "age"),
+    (r"occupations?|jobs?", "occupation"),
+    (r"education(?: levels?)?", "education"),
+    (r"marital status|married|single", "marital_status"),
+    (r"home owners?|homeowners?", "home_owner"),
+    (r"children", "children"),
+    (r"colou?rs?", "color"),
+    (r"sizes?", "size"),
+    (r"styles?", "style"),
+    (r"models?", "model"),
+]
+_SCOPE_PATTERNS = [(re.compile(rf"\b(?:{pattern})\b"), name) for pattern, name in SCOPE_WORDS]
+
+
+def normalize_question(question: str) -> str:
+    words = _NON_WORD.sub(" ", question.lower()).split()
+    return " ".join(SYNONYMS.get(word, word) for word in words if word not in STOP_WORDS)
+
+
+def guard_terms(question: str):
+    words = normalize_question(question).split()
+    return sorted(word for word in words if word in GUARD_WORDS or _NUMBER.fullmatch(word))
+
+
+def scope_terms(question: str):
+    """Metrics and grouping dimensions a question names, e.g. revenue + category."""
+    text = normalize(question)
+    terms = set()
+    for pattern, name in _SCOPE_PATTERNS:
+        text, found = pattern.subn(" ", text)
+        if found:
+            terms.add(name)
+    return sorted(terms)
+
+
+def value_terms(question: str):
+    """Words outside every vocabulary, e.g. the region or product a question
+    filters on; "Northwest" and "Southwest" must not share an answer."""
+    text = normalize(question)
+    for pattern, _ in _SCOPE_PATTERNS:
+        text = pattern.sub(" ", text)
+    words = normalize_question(text).split()
+    return sorted({
+        word for word in words
+        if word not in GUARD_WORDS and word not in FILLER and not _NUMBER.fullmatch(word)
+    })
+
+
+def question_key(question: str):
+    """What two questions must agree on exactly, however similar they read."""
+    return guard_terms(question), scope_terms(question), value_terms(question)
+
+
+def embed_question(question: str) -> np.ndarray:
+    """Hashed word + character n-gram vector, L2-normalised.
+
+    Character n-grams make "best-selling" and "best sellers" overlap
+    without a stemmer or a model download.
+    """
+    text = normalize_question(question)
+    vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+
+    features = text.split()
+    padded = f" {text} "
+    for n in NGRAM_SIZES:
+        features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+    for feature in features:
+        vector[zlib.crc32(feature.encode("utf-8")) % VECTOR_DIM] += 1.0
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticCache:
+    """In-memory nearest-neighbour index of answered questions.
+
+    Each entry keeps the validated plan and the SQL that ran successfully.
+    Questions that differ in a number or a guard word ("top 5" vs "top 10",
+    "highest" vs "lowest", "last month" vs "last quarter"), in what they
+    measure and group by ("by category" vs "by subcategory"), or in the
+    values they filter on ("Northwest" vs "Southwest") never match, however
+    similar the rest of the wording.
+    """
+
+    def __init__(self, threshold=SEMANTIC_CACHE_THRESHOLD, max_entries=SEMANTIC_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._vectors = np.zeros((0, VECTOR_DIM), dtype=np.float32)
+        self._entries = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, question: str):
+        """Return the closest cached entry above the threshold, or None."""
+        if not self._entries:
+            return None
+
+        vector = embed_question(question)
+        key = question_key(question)
+
+        with self._lock:
+            scores = self._vectors @ vector
+            for index in np.argsort(scores)[::-1][:5]:
+                if scores[index] < self.threshold:
+                    break
+                entry = self._entries[index]
+                if entry["key"] == key:
+                    return {**entry, "similarity": float(scores[index])}
+        return None
+
+    def remember(self, question: str, validator: dict, sql: str):
+        """Record a question whose SQL ran successfully."""
+        vector = embed_question(question)
+        entry = {
+            "question": question,
+            "validator": validator,
+            "sql": sql,
+            "key": question_key(question),
+        }
+
+        with self._lock:
+            normalized = normalize_question(question)
+            for index, existing in enumerate(self._entries):
+                if normalize_question(existing["question"]) == normalized:
+                    self._entries[index] = entry
+                    return
+
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(0)
+                self._vectors = self._vectors[1:]
+
+            self._entries.append(entry)
+            self._vectors = np.vstack([self._vectors, vector])
+
+    def clear(self):
+        with self._lock:
+            self._entries = []
+            self._vectors = np.zeros((0, VECTOR_DIM), dtype=np.float32)
+
+
+semantic_cache = SemanticCache()
@@ -0,0 +1,183 @@
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+# One OpenTelemetry-style span per line
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", os.path.join(".cache", "traces.jsonl"))
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+logger = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+
+
+class Span:
+    """One timed unit of work, exported with OpenTelemetry field names."""
+
+    def __init__(self, name, parent=None, **attributes):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent else None
+        self.attributes = dict(attributes)
+        self.status = "OK"
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, key, amount=1):
+        """Increment a numeric attribute (token counts, retries...)."""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    @property
+    def duration_ms(self):
+        end = self.end_ns or time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+def configure_logging(level=LOG_LEVEL):
+    """Root logging setup, called once by each entry point (never on import)."""
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+
+
+def current_span():
+    return _current_span.get()
+
+
+def add_to_span(key, amount=1):
+    """Increment an attribute on the active span, if there is one."""
+    active = _current_span.get()
+    if active is not None:
+        active.add(key, amount)
+
+
+def export_span(finished: Span):
+    if not TRACING_ENABLED:
+        return
+
+    line = json.dumps(finished.to_dict(), default=str)
+    directory = os.path.dirname(TRACE_EXPORT_PATH)
+    with _export_lock:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(TRACE_EXPORT_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time a block as a child of the active span (or as a new trace).
+
+    The span is exported to TRACE_EXPORT_PATH when the block exits; an
+    exception marks it as an error and is re-raised.
+    """
+    active = Span(name, parent=_current_span.get(), **attributes)
+    token = _current_span.set(active)
+    try:
+        yield active
+    except Exception as e:
+        active.status = "ERROR"
+        active.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        active.end_ns = time.time_ns()
+        _current_span.reset(token)
+        logger.debug("span %s %.1f ms %s", name, active.duration_ms, active.attributes)
+        export_span(active)
+
+
+def traced(name, record=None):
+    """Decorator form of span(); ``record(span, result)`` adds result attributes."""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name) as active:
+                    result = await fn(*args, **kwargs)
+                    if record:
+                        record(active, result)
+                    return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name) as active:
+                result = fn(*args, **kwargs)
+                if record:
+                    record(active, result)
+                return result
+        return wrapper
+    return decorator
+
+
+def record_llm_usage(active: Span, response):
+    """Copy token usage from a LangChain AIMessage onto a span and its parents' totals."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    input_tokens = usage.get("input_tokens", 0)
+    output_tokens = usage.get("output_tokens", 0)
+    active.set(input_tokens=input_tokens, output_tokens=output_tokens)
+    return input_tokens, output_tokens
+
+
+class TracedLLM:
+    """Wraps a chat model so every call is an ``llm`` span with token counts.
+
+    Token totals and call counts are also added to the calling span, so a
+    node span shows what its LLM calls cost.
+    """
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    def _finish(self, parent, active, response):
+        input_tokens, output_tokens = record_llm_usage(active, response)
+        if parent is not None:
+            parent.add("llm_calls")
+            parent.add("input_tokens", input_tokens)
+            parent.add("output_tokens", output_tokens)
+
+    def invoke(self, messages, **kwargs):
+        parent = _current_span.get()
+        with span("llm", model=getattr(self.llm, "model", None)) as active:
+            response = self.llm.invoke(messages, **kwargs)
+            self._finish(parent, active, response)
+            return response
+
+    async def ainvoke(self, messages, **kwargs):
+        parent = _current_span.get()
+        with span("llm", model=getattr(self.llm, "model", None)) as active:
+            response = await self.llm.ainvoke(messages, **kwargs)
+            self._finish(parent, active, response)
+            return response